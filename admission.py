@@ -0,0 +1,111 @@
+"""
+上传准入控制：在解析台账前按文件大小、并发解析数与预估内存决定是否受理，
+超出容量时立即拒绝（附 Retry-After），避免多个大文件同时解析导致服务器内存耗尽。
+
+限制为单个工作进程内的计数；多进程部署时每个进程各自生效。
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.environ.get("ANALYSIS_MAX_UPLOAD_BYTES", str(200 * 1024 ** 2)))
+MAX_CONCURRENT_PARSES = int(os.environ.get("ANALYSIS_MAX_CONCURRENT_PARSES", "2"))
+MEMORY_BUDGET_BYTES = int(os.environ.get("ANALYSIS_MEMORY_BUDGET_BYTES", str(4 * 1024 ** 3)))
+RETRY_AFTER_SECONDS = int(os.environ.get("ANALYSIS_RETRY_AFTER", "10"))
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # 按 Content-Length 预检时为 multipart 边界、字段头预留的余量
+
+# 解析峰值内存相对文件大小的估算倍数（xlsx 为压缩 XML，解压并构建单元格对象后膨胀最明显）
+# 分块模式按块流式读取，内存与文件大小基本无关，仅按 1 倍计入
+MEMORY_FACTORS = {"xlsx": 30, "csv": 4, "parquet": 8, "chunked": 1}
+
+
+class AdmissionError(Exception):
+    """拒绝受理：status_code 为 413 / 429 / 503，retry_after 为建议重试秒数（None 表示无需重试）"""
+
+    def __init__(self, status_code, detail, retry_after=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def available_memory_bytes():
+    """系统当前可用内存（读取 /proc/meminfo），无法获取时返回 None"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def estimate_memory(size_bytes, fmt):
+    """估算解析该文件的峰值内存"""
+    return size_bytes * MEMORY_FACTORS.get(fmt, MEMORY_FACTORS["xlsx"])
+
+
+class AdmissionController:
+    def __init__(self, max_upload_bytes=MAX_UPLOAD_BYTES, max_concurrent=MAX_CONCURRENT_PARSES,
+                 memory_budget=MEMORY_BUDGET_BYTES, retry_after=RETRY_AFTER_SECONDS):
+        self.max_upload_bytes = max_upload_bytes
+        self.max_concurrent = max_concurrent
+        self.memory_budget = memory_budget
+        self.retry_after = retry_after
+        self.active = 0
+        self.reserved_bytes = 0
+        self._lock = threading.Lock()
+
+    def check_declared_size(self, content_length, files=1):
+        """读取请求体之前按 Content-Length 拒绝必然超限的上传（files 为请求最多携带的文件数）
+
+        分块传输等未声明长度的请求仍由 acquire 在接收完成后按实际文件大小检查。
+        """
+        limit = self.max_upload_bytes * files + MULTIPART_OVERHEAD_BYTES
+        if self.max_upload_bytes > 0 and content_length > limit:
+            raise AdmissionError(
+                413, f"上传内容过大：{content_length / 1024 ** 2:.1f} MB，上限 {limit / 1024 ** 2:.1f} MB"
+            )
+
+    def acquire(self, size_bytes, fmt="xlsx"):
+        """通过检查则占用并发名额和内存预算并返回预估内存，否则抛出 AdmissionError"""
+        if self.max_upload_bytes > 0 and size_bytes > self.max_upload_bytes:
+            raise AdmissionError(
+                413, f"上传文件过大：{size_bytes / 1024 ** 2:.1f} MB，上限 {self.max_upload_bytes / 1024 ** 2:.1f} MB"
+            )
+        estimate = estimate_memory(size_bytes, fmt)
+        if self.memory_budget > 0 and estimate > self.memory_budget:
+            raise AdmissionError(413, f"文件预计需要 {estimate / 1024 ** 2:.0f} MB 内存，超出服务内存预算，请拆分后上传")
+
+        with self._lock:
+            if self.max_concurrent > 0 and self.active >= self.max_concurrent:
+                logger.warning(f"并发解析数已满（{self.active}），拒绝新的上传")
+                raise AdmissionError(429, "当前解析任务过多，请稍后重试", self.retry_after)
+            if self.memory_budget > 0 and self.reserved_bytes + estimate > self.memory_budget:
+                logger.warning(f"内存预算不足：已占用 {self.reserved_bytes}，本次预计 {estimate}")
+                raise AdmissionError(503, "服务器内存繁忙，请稍后重试", self.retry_after)
+            available = available_memory_bytes()
+            if available is not None and estimate > available:
+                logger.warning(f"系统可用内存不足：可用 {available}，本次预计 {estimate}")
+                raise AdmissionError(503, "服务器可用内存不足，请稍后重试", self.retry_after)
+            self.active += 1
+            self.reserved_bytes += estimate
+        return estimate
+
+    def release(self, estimate):
+        with self._lock:
+            self.active -= 1
+            self.reserved_bytes -= estimate
+
+    @contextmanager
+    def admit(self, size_bytes, fmt="xlsx"):
+        """受理一次解析，名额与内存预算占用到退出上下文为止"""
+        estimate = self.acquire(size_bytes, fmt)
+        try:
+            yield estimate
+        finally:
+            self.release(estimate)
@@ -0,0 +1,72 @@
+"""
+金额列解析：在 pd.to_numeric 的基础上识别中文台账中常见的金额写法，
+如 “1,234.56”、“12.5万”、“3000元”、全角数字、“(12.5)” 括号负数。
+
+只对去重后的文本取值做一次向量化解析，再按编码映射回全列，重复取值多时开销很小。
+不带单位的数值视为已是目标单位（台账金额单位为万元）。
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_UNIT = "万元"
+UNIT_MULTIPLIERS = {"元": 1, "万": 10 ** 4, "万元": 10 ** 4, "亿": 10 ** 8, "亿元": 10 ** 8}
+
+# 视为空值（不计入无法解析）的占位写法
+EMPTY_MARKERS = ("", "-", "—", "--", "/", "无")
+
+_FULL_WIDTH = str.maketrans({
+    **{chr(0xFF10 + i): str(i) for i in range(10)},
+    "，": ",", "．": ".", "。": ".", "－": "-", "＋": "+", "（": "(", "）": ")", "　": " ",
+})
+_AMOUNT_PATTERN = re.compile(
+    r"^(?P<lparen>\()?(?P<sign>[+-])?(?P<number>\d+(?:\.\d*)?|\.\d+)(?P<rparen>\))?(?P<unit>亿元|亿|万元|万|元)?$"
+)
+
+
+def _parse_unique(texts, unit):
+    """对去重后的文本向量化解析，返回 float64 数组（无法解析为 NaN）"""
+    normalized = (
+        pd.Series(texts, dtype=object).astype(str)
+        .str.translate(_FULL_WIDTH)
+        .str.replace(r"[\s,]", "", regex=True)
+    )
+    parts = normalized.str.extract(_AMOUNT_PATTERN)
+    numbers = pd.to_numeric(parts["number"], errors="coerce").to_numpy(dtype="float64")
+
+    parenthesized = parts["lparen"].notna().to_numpy() & parts["rparen"].notna().to_numpy()
+    unbalanced = parts["lparen"].notna().to_numpy() ^ parts["rparen"].notna().to_numpy()
+    negative = parenthesized ^ (parts["sign"] == "-").to_numpy()
+    numbers = np.where(negative, -numbers, numbers)
+    numbers[unbalanced] = np.nan
+
+    scale = parts["unit"].map(UNIT_MULTIPLIERS).fillna(UNIT_MULTIPLIERS[unit]).to_numpy(dtype="float64")
+    return numbers * scale / UNIT_MULTIPLIERS[unit]
+
+
+def parse_amounts(series, unit=DEFAULT_UNIT):
+    """将金额列解析为 float64，返回 (数值 Series, 统计)
+
+    统计含 rescued（pd.to_numeric 无法转换、本解析器成功解析的单元格数）与
+    rejected（非空但仍无法解析、按空值处理的单元格数）。
+    """
+    if unit not in UNIT_MULTIPLIERS:
+        raise ValueError(f"不支持的金额单位：{unit}")
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype("float64"), {"rescued": 0, "rejected": 0}
+
+    result = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    pending = np.flatnonzero(np.isnan(result) & series.notna().to_numpy())
+    if len(pending) == 0:
+        return pd.Series(result, index=series.index, name=series.name), {"rescued": 0, "rejected": 0}
+
+    texts = series.iloc[pending].astype(str).str.strip().to_numpy(dtype=object)
+    filled = ~pd.Series(texts).isin(EMPTY_MARKERS).to_numpy()
+    codes, uniques = pd.factorize(texts[filled])
+    parsed = _parse_unique(uniques, unit)[codes]
+    result[pending[filled]] = parsed
+
+    rescued = int(np.count_nonzero(~np.isnan(parsed)))
+    stats = {"rescued": rescued, "rejected": len(parsed) - rescued}
+    return pd.Series(result, index=series.index, name=series.name), stats
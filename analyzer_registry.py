@@ -0,0 +1,79 @@
+"""
+分析器注册表：集中登记全部分析器、结果表名与分析参数（API、桌面端、命令行共用），
+并根据各分析器声明的 required_columns 计算列裁剪读取所需的列。
+"""
+import re
+
+from construction_analyzer import ConstructionAnalyzer
+from design_analyzer import DesignAnalyzer
+from excel_reader import _clean_name
+from leader_analyzer import LeaderFrequencyAnalyzer
+from loss_analyzer import LossDataAnalyzer
+from loss_over_analyzer import LossOverAnalyzer
+from top_k_analyzer import TopKAnalyzer
+
+# 分析器之外仍需读取的列：分类统计、负责人项目清单与跨期对比按项目名称 / 项目编号归并
+KEY_COLUMNS = ("项目名称", "项目编号")
+
+ANALYZER_REGISTRY = []
+
+
+def register_analyzer(analyzer_class, sheet_name, report_sheet_name=None, classify=True, **analyze_kwargs):
+    """登记分析器；report_sheet_name 为桌面端导出报告中带附表编号的表名，
+    classify=False 表示结果为排名清单而非异常标记，不计入项目异常点分类统计"""
+    ANALYZER_REGISTRY.append({
+        "class": analyzer_class,
+        "sheet_name": sheet_name,
+        "report_sheet_name": report_sheet_name or sheet_name,
+        "classify": classify,
+        "analyze_kwargs": analyze_kwargs,
+    })
+
+
+register_analyzer(LeaderFrequencyAnalyzer, "亏损3个项目项目负责人", "附表1  亏损3个项目项目负责人", min_count=3)
+register_analyzer(DesignAnalyzer, "亏损大于合同", "附表2  亏损大于合同")
+register_analyzer(ConstructionAnalyzer, "施工项目亏损金额占合同金额30%", "附表3  施工项目亏损金额占合同金额30%")
+register_analyzer(LossOverAnalyzer, "亏损大于1000万", "附表4  亏损大于1000万", threshold=1000)
+register_analyzer(LossDataAnalyzer, "成本费用异常情况", "附表5  成本费用异常情况")
+register_analyzer(TopKAnalyzer, "亏损金额前50名", "附表6  亏损金额前50名", classify=False, k=50)
+register_analyzer(
+    TopKAnalyzer, "各项目类别亏损金额前50名", "附表7  各项目类别亏损金额前50名",
+    classify=False, k=50, group_by="项目类别",
+)
+
+
+def analyzers_config(report_names=False):
+    """返回分析器配置列表（class / sheet_name / classify / analyze_kwargs）；report_names=True 时使用带附表编号的表名"""
+    return [
+        {
+            "class": entry["class"],
+            "sheet_name": entry["report_sheet_name"] if report_names else entry["sheet_name"],
+            "classify": entry["classify"],
+            "analyze_kwargs": dict(entry["analyze_kwargs"]),
+        }
+        for entry in ANALYZER_REGISTRY
+    ]
+
+
+def ranking_sheet_names(configs):
+    """不计入异常分类统计（classify=False）的结果表名"""
+    return {cfg["sheet_name"] for cfg in configs if not cfg.get("classify", True)}
+
+
+def required_columns(configs):
+    """各分析器声明读取的列（去重、保持顺序），附加项目键列"""
+    names = [col for cfg in configs for col in cfg["class"].required_columns]
+    return list(dict.fromkeys([*names, *KEY_COLUMNS]))
+
+
+def projected_positions(original_columns, configs):
+    """按 _find_col 规则及各分析器的列名规则找出需要读取的列位置（按原列顺序）；重名匹配全部保留，由分析器照常报错"""
+    targets = [_clean_name(name) for name in required_columns(configs)]
+    patterns = [re.compile(p) for p in dict.fromkeys(p for cfg in configs for p in cfg["class"].required_column_patterns)]
+    positions = []
+    for idx, col in enumerate(original_columns):
+        col_clean = _clean_name(col)
+        if (any(col_clean == t or col_clean.endswith(f"_{t}") for t in targets)
+                or any(p.search(col_clean) for p in patterns)):
+            positions.append(idx)
+    return positions
@@ -1,21 +1,37 @@
 import json
 import os
+import queue
+import shutil
+import tempfile
+import threading
 import pandas as pd
 import numpy as np
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from io import BytesIO
-from openpyxl import load_workbook, Workbook
-from fastapi.responses import FileResponse, JSONResponse  # <-- 导入 JSONResponse
+from contextlib import ExitStack, closing, contextmanager, nullcontext
+from typing import Optional
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Header
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse  # <-- 导入 JSONResponse
 from fastapi.encoders import jsonable_encoder
+from starlette.background import BackgroundTask
 import logging
 from datetime import datetime
 # 导入所需的分析器类
 from leader_analyzer import LeaderFrequencyAnalyzer
-from construction_analyzer import ConstructionAnalyzer
-from design_analyzer import DesignAnalyzer
-from loss_over_analyzer import LossOverAnalyzer
 from loss_analyzer import LossDataAnalyzer
 from excel_saver import ExcelResultSaver
+from analyzer_registry import analyzers_config, projected_positions, ranking_sheet_names
+from excel_reader import CHUNK_SIZE, find_column, load_ledger, load_ledger_file, ledger_format
+from chunked_analysis import ChunkedAnalysisRunner
+from workbook_analysis import WorkbookAnalysisRunner
+from shared_analysis import MAX_WORKERS as ANALYZER_WORKERS, SharedMemoryAnalysisRunner
+from leader_store import LeaderStatsStore
+from results_store import ResultsStore
+from ledger_cache import LedgerCache, file_key
+from profiling import RequestProfiler, is_admin_token, load_report
+from admission import AdmissionController, AdmissionError
+from diff_report import diff_results, summarize
+from summary import DEFAULT_BINS, DEFAULT_TOP_LEADERS, summarize_frames
+from result_exporter import EXPORT_FORMATS, export_results
+from session_store import CLASSIFICATION_BUCKETS, LOW_LOSS_BUCKET, AnalysisSession, SessionStore
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -46,72 +62,50 @@ class AnalysisAPI:
         self.raw_data = None  
         self.analyzers = []
 
-        self.analyzers_config = [
-            {
-                "class": LeaderFrequencyAnalyzer,
-                "sheet_name": "亏损3个项目项目负责人",
-                "analyze_kwargs": {"min_count": 3}
-            },
-            {
-                "class": DesignAnalyzer,
-                "sheet_name": "亏损大于合同",
-                "analyze_kwargs": {}
-            },
-            {
-                "class": ConstructionAnalyzer,
-                "sheet_name": "施工项目亏损金额占合同金额30%",
-                "analyze_kwargs": {}
-            },
-            {
-                "class": LossOverAnalyzer,
-                "sheet_name": "亏损大于1000万",
-                "analyze_kwargs": {"threshold": 1000}
-            },
-            {
-                "class": LossDataAnalyzer,
-                "sheet_name": "成本费用异常情况",
-                "analyze_kwargs": {}
-            }
-        ]
+        self.analyzers_config = analyzers_config()
+        self.analysis_columns = []  # 分析器读取的列（列裁剪读取时为 original_columns 的子集）
+        self.row_source = None  # 列裁剪读取时命中行回填完整列所用的缓存键
+        self.project_columns = True  # 缓存命中时是否按分析器声明的列裁剪读取
+        self.progress = None  # 进度回调 progress(event, **data)，流式接口使用
+
+    def _emit(self, event, **data):
+        if self.progress is not None:
+            self.progress(event, **data)
 
-    def upload_excel(self, file: UploadFile):
-        """解析上传的Excel文件并读取数据"""
+    def upload_excel(self, file: UploadFile, engine=None):
+        """解析上传的台账文件（xlsx / csv / parquet）并读取数据；engine 为 xlsx 读取引擎（openpyxl / fast）"""
         try:
-            content = file.file.read()
-            wb = load_workbook(BytesIO(content), data_only=True)
-            sheet = wb.active
-            max_col = sheet.max_column
-            self.original_columns = []
-            for col_idx in range(1, max_col + 1):
-                main_header = self.get_merged_value(sheet, row=3, col=col_idx)
-                sub1_header = self.get_merged_value(sheet, row=4, col=col_idx)
-                sub2_header = self.get_merged_value(sheet, row=5, col=col_idx)
-
-                parts = []
-                seen = set()
-                for p in [main_header, sub1_header, sub2_header]:
-                    if p is not None:
-                        p_str = str(p)
-                        if p_str not in seen:
-                            seen.add(p_str)
-                            parts.append(p_str)
-
-                col_name = "_".join(parts) if parts else f"未知列_{col_idx}"
-                self.original_columns.append(col_name)
-
-            data = []
-            for row in sheet.iter_rows(min_row=6, values_only=True):
-                row_data = row[:len(self.original_columns)]
-                if row_data and row_data[0] is None:
-                    break
-                data.append(row_data)
-
-            self.raw_data = pd.DataFrame(data, columns=self.original_columns)
-
-            self.analyzers = [
-                cfg["class"](original_columns=self.original_columns)
-                for cfg in self.analyzers_config
-            ]
+            # 上传内容已由框架按块落入临时文件（SpooledTemporaryFile），直接按文件对象交给解析器，
+            # 不再整体读入内存
+            self.row_source = None
+            if ledger_format(file.filename) != "xlsx":
+                # CSV / Parquet 走向量化读取，无需解析缓存
+                self.original_columns, self.raw_data = load_ledger_file(
+                    file.file, file.filename, progress=self.progress
+                )
+            else:
+                # 缓存键不在接收上传时计算：框架接收完成后按块再读一遍临时文件得到
+                cache_key = file_key(file.file)
+                cached = None
+                cached_columns = ledger_cache.header(cache_key)
+                if cached_columns is not None and self.project_columns:
+                    # 缓存命中时只读取分析器声明的列，命中行的完整列在分析后回填
+                    positions = projected_positions(cached_columns, self.analyzers_config)
+                    cached = ledger_cache.get(cache_key, column_positions=positions)
+                    self.row_source = cache_key if cached is not None else None
+                elif cached_columns is not None:
+                    cached = ledger_cache.get(cache_key)
+                if cached is not None:
+                    self.original_columns, self.raw_data = cached
+                    self._emit("header_parsed", columns=len(self.original_columns))
+                    self._emit("rows_loaded", rows=len(self.raw_data), done=True)
+                else:
+                    self.original_columns, self.raw_data = load_ledger(
+                        file.file, engine=engine, progress=self.progress
+                    )
+                    ledger_cache.put(cache_key, self.original_columns, self.raw_data, source=file.filename)
+
+            self._init_analyzers()
             logger.info(f"Excel 文件上传并读取成功，共 {len(self.raw_data)} 行数据")
             return True
         except Exception as e:
@@ -119,97 +113,285 @@ class AnalysisAPI:
             logger.error(f"Excel 读取失败：{str(e)}")
             raise HTTPException(status_code=400, detail=f"Excel 读取失败：{str(e)}")
 
-    # def run_analysis(self):
-    #     """执行所有分析器"""
-    #     if self.raw_data is None or not self.analyzers:
-    #         raise HTTPException(status_code=400, detail="请先上传Excel文件！")
-
-    #     logger.info("开始执行数据分析...")
-        
-    #     # 汇总所有分析器的结果
-    #     all_analyzed_data = []
-
-    #     # 先执行所有分析器，汇总所有结果
-    #     for i, cfg in enumerate(self.analyzers_config):
-    #         analyzer = self.analyzers[i]
-    #         logger.info(f"开始执行分析器：{analyzer.__class__.__name__}")
-    #         success = analyzer.analyze(df=self.raw_data, **cfg["analyze_kwargs"])
-
-    #         if success:
-    #             analyzed_df = analyzer.get_analyzed_data()
-
-    #             # 清理特殊的 float 值（NaN, Infinity 等）
-    #             cleaned_df = analyzed_df.applymap(self.replace_invalid_floats)
-
-    #             # Convert datetime objects to string
-    #             cleaned_data = cleaned_df.to_dict(orient="records")
-    #             cleaned_data = convert_datetime_to_string(cleaned_data)  # Apply the conversion
-
-    #             # 汇总所有分析器的结果，并在每个结果中添加分析器名称
-    #             all_analyzed_data.append({
-    #                 "analyzer_name": analyzer.__class__.__name__,
-    #                 "sheet_name": cfg["sheet_name"],
-    #                 "status": "success",
-    #                 "data": cleaned_data,
-    #                 'analyzer':analyzer.__class__.__name__
-    #             })
-    #             logger.info(f"{analyzer.__class__.__name__} 分析完成，包含 {len(cleaned_df)} 条数据")
-    #         else:
-    #             logger.error(f"{analyzer.__class__.__name__} 分析失败或无结果")
-
-    #     logger.info("所有分析器执行完毕")
-    #     return all_analyzed_data
+    def load_file(self, path):
+        """读取本地台账文件（命令行使用）"""
+        self.original_columns, self.raw_data = load_ledger_file(path)
+        self.row_source = None
+        self._init_analyzers()
+        logger.info(f"台账读取成功：{path}，共 {len(self.raw_data)} 行数据")
+
+    def _init_analyzers(self):
+        self.analysis_columns = list(self.raw_data.columns) if self.row_source else list(self.original_columns)
+        self.analyzers = [
+            cfg["class"](original_columns=self.analysis_columns)
+            for cfg in self.analyzers_config
+        ]
 
     def run_analysis(self):
         """执行所有分析器"""
+        frames, low_loss_df = self.run_analysis_frames()
+        return self.frames_to_results(frames, low_loss_df)
+
+    def frames_to_results(self, frames, low_loss_df):
+        """将 run_analysis_frames 的结果转为记录结构（all_analyzed_data / low_loss_projects）"""
+        all_analyzed_data = []
+        for analyzer, cfg, analyzed_df in frames:
+            cleaned_data = self.frame_to_records(analyzed_df)
+            all_analyzed_data.append({
+                "analyzer_name": analyzer.__class__.__name__,
+                "sheet_name": cfg["sheet_name"],
+                "status": "success",
+                "data": cleaned_data,
+                'analyzer': analyzer.__class__.__name__
+            })
+
+        # ✅ 最终返回时增加一个字段 “low_loss_projects”（亏损<10万元数据）
+        return {
+            "all_analyzed_data": all_analyzed_data,
+            "low_loss_projects": self.frame_to_records(low_loss_df) if not low_loss_df.empty else []
+        }
+
+    def run_analysis_frames(self):
+        """执行所有分析器，返回 ([(analyzer, cfg, 结果 DataFrame)], 低额亏损 DataFrame)，不做记录转换"""
         if self.raw_data is None or not self.analyzers:
             raise HTTPException(status_code=400, detail="请先上传Excel文件！")
 
         logger.info("开始执行数据分析...")
-        
-        all_analyzed_data = []
-        low_loss_data = []  # ✅ 新增：用于返回前端的亏损<10万元数据
-
-        for i, cfg in enumerate(self.analyzers_config):
-            analyzer = self.analyzers[i]
-            logger.info(f"开始执行分析器：{analyzer.__class__.__name__}")
-            success = analyzer.analyze(df=self.raw_data, **cfg["analyze_kwargs"])
 
-            if success:
+        frames = []
+        low_loss_df = pd.DataFrame(columns=self.original_columns)
+        outcomes = self._process_pool_outcomes() if ANALYZER_WORKERS > 1 else None
+        # 进程池结果生成器停在最后一个分析器处，须显式关闭以释放进程池与共享内存
+        with closing(outcomes) if outcomes is not None else nullcontext():
+            for i, (analyzer, cfg) in enumerate(zip(self.analyzers, self.analyzers_config)):
+                name = analyzer.__class__.__name__
+                logger.info(f"开始执行分析器：{name}")
+                self._emit("analyzer_started", analyzer=name, sheet_name=cfg["sheet_name"])
+                if outcomes is not None:
+                    # 进程池模式：分析器在工作进程中执行，返回的分析器已按命中行位置取回结果
+                    analyzer, success = next(outcomes)
+                    self.analyzers[i] = analyzer
+                else:
+                    success = analyzer.analyze(df=self.raw_data, **cfg["analyze_kwargs"])
+                if not success:
+                    logger.error(f"{name} 分析失败或无结果")
+                    self._emit("analyzer_failed", analyzer=name, sheet_name=cfg["sheet_name"], logs=analyzer.get_logs())
+                    continue
                 analyzed_df = analyzer.get_analyzed_data()
-                cleaned_df = analyzed_df.applymap(self.replace_invalid_floats)
-                cleaned_data = cleaned_df.to_dict(orient="records")
-                cleaned_data = convert_datetime_to_string(cleaned_data)
-
-                # ✅ 如果是 LossDataAnalyzer，则额外收集亏损<10万元的数据
+                # 如果是 LossDataAnalyzer，则额外收集亏损<10万元的数据
                 if isinstance(analyzer, LossDataAnalyzer):
                     low_loss_df = analyzer.get_low_loss_data()
-                    if not low_loss_df.empty:
-                        low_loss_cleaned = low_loss_df.applymap(self.replace_invalid_floats)
-                        low_loss_cleaned_data = convert_datetime_to_string(
-                            low_loss_cleaned.to_dict(orient="records")
-                        )
-                        low_loss_data = low_loss_cleaned_data  # 保存到变量中
-
-                all_analyzed_data.append({
-                    "analyzer_name": analyzer.__class__.__name__,
-                    "sheet_name": cfg["sheet_name"],
-                    "status": "success",
-                    "data": cleaned_data,
-                    'analyzer': analyzer.__class__.__name__
-                })
-                logger.info(f"{analyzer.__class__.__name__} 分析完成，包含 {len(cleaned_df)} 条数据")
-            else:
-                logger.error(f"{analyzer.__class__.__name__} 分析失败或无结果")
+                frames.append((analyzer, cfg, analyzed_df))
+                logger.info(f"{name} 分析完成，包含 {len(analyzed_df)} 条数据")
+                # frame 为该分析器的命中行（列裁剪读取时只含分析列）
+                self._emit("analyzer_finished", analyzer=name, sheet_name=cfg["sheet_name"],
+                           rows=len(analyzed_df), frame=analyzed_df)
 
         logger.info("所有分析器执行完毕")
+        if self.row_source:
+            frames, low_loss_df = self._join_full_rows(frames, low_loss_df)
+        return frames, low_loss_df
+
+    def _process_pool_outcomes(self):
+        """以共享内存进程池执行全部分析器，只共享分析器声明读取的列"""
+        positions = projected_positions(self.analysis_columns, self.analyzers_config)
+        runner = SharedMemoryAnalysisRunner(self.analyzers_config, max_workers=ANALYZER_WORKERS)
+        return runner.run(self.raw_data, positions, self.analysis_columns)
+
+    def _join_full_rows(self, frames, low_loss_df):
+        """列裁剪分析后，仅为命中行从缓存读取完整列，并保留分析器附加的辅助列"""
+        positions = sorted(set().union(*(df.index for _, _, df in frames), low_loss_df.index))
+        full = ledger_cache.take_rows(self.row_source, positions)
+        if full is None:
+            raise HTTPException(status_code=500, detail="台账缓存已失效，请重新上传文件")
+        analysis_columns = set(self.analysis_columns)
+
+        def with_full_columns(df):
+            extras = [c for c in df.columns if c not in analysis_columns]
+            result = full.loc[df.index]
+            return pd.concat([result, df[extras]], axis=1) if extras else result
+
+        logger.info(f"命中行回填完整列：{len(positions)} 行")
+        return [(a, cfg, with_full_columns(df)) for a, cfg, df in frames], with_full_columns(low_loss_df)
+
+    def result_frames(self):
+        """执行所有分析器，返回 {结果表名: 命中行 DataFrame}，并附 low_loss_projects（导出使用）"""
+        frames, low_loss_df = self.run_analysis_frames()
+        result = {cfg["sheet_name"]: df for _, cfg, df in frames}
+        result[LOW_LOSS_BUCKET] = low_loss_df
+        return result
+
+    def analyze_rule_frames(self):
+        """执行所有分析器，返回 {结果表名: 命中行 DataFrame}（跨期对比使用）"""
+        frames, _ = self.run_analysis_frames()
+        return {cfg["sheet_name"]: df for _, cfg, df in frames}
+
+    def summarize(self, bins=DEFAULT_BINS, top_leaders=DEFAULT_TOP_LEADERS):
+        """执行所有分析器并返回服务端汇总统计（不返回命中行）"""
+        return summarize_frames(
+            self.analyze_rule_frames(), ledger=self.raw_data, bins=bins, top_leaders=top_leaders,
+            ranking_rules=ranking_sheet_names(self.analyzers_config),
+        )
+
+    def create_session(self, source=None, analysis=None):
+        """执行分析并将结果保存为服务端会话，供分页接口按需读取；analysis 为已有的 run_analysis_frames 结果"""
+        frames, low_loss_df = analysis if analysis is not None else self.run_analysis_frames()
+        name_col = find_column(self.original_columns, "项目名称")
+        loss_col = find_column(self.original_columns, "亏损金额")
+
+        # 分类统计只需要项目名称，无需转换整表记录
+        name_only = [
+            {
+                "sheet_name": cfg["sheet_name"],
+                "data": [{"项目名称": name} for name in (df[name_col].tolist() if name_col else [None] * len(df))],
+            }
+            for _, cfg, df in frames
+        ]
+        statistics = self.classify_projects(name_only)
+        session = AnalysisSession(
+            frames={cfg["sheet_name"]: df for _, cfg, df in frames} | {LOW_LOSS_BUCKET: low_loss_df},
+            classification={bucket: statistics[bucket] for bucket in CLASSIFICATION_BUCKETS},
+            loss_col=loss_col,
+            name_col=name_col,
+            source=source,
+        )
+        session_store.add(session)
+        logger.info(f"分析会话已创建：{session.session_id}")
+        return session
+
+    def run_chunked_analysis(self, file: UploadFile, chunk_size=CHUNK_SIZE):
+        """分块模式：流式读取上传的 xlsx 并执行所有分析器，适用于超出内存的大台账
+
+        返回结构同 run_analysis，另附 low_loss_total（低额亏损总行数）；low_loss_projects 只含亏损金额最大的
+        ANALYSIS_CHUNKED_LOW_LOSS_LIMIT 行。
+        """
+        runner = ChunkedAnalysisRunner(self.analyzers_config, chunk_size=chunk_size)
+        try:
+            analyzers, frames, low_loss_df = runner.run(file.file)
+        except Exception as e:
+            self.raw_data = None
+            logger.error(f"Excel 分块读取失败：{str(e)}")
+            raise HTTPException(status_code=400, detail=f"Excel 读取失败：{str(e)}")
+
+        # 分块模式不保留全表数据
+        self.original_columns = runner.original_columns
+        self.raw_data = None
+        self.row_source = None
+        self.analyzers = analyzers
+
+        all_analyzed_data = []
+        for analyzer, cfg, analyzed_df in zip(analyzers, self.analyzers_config, frames):
+            if analyzed_df is None:
+                logger.error(f"{analyzer.__class__.__name__} 分析失败或无结果")
+                continue
+            all_analyzed_data.append({
+                "analyzer_name": analyzer.__class__.__name__,
+                "sheet_name": cfg["sheet_name"],
+                "status": "success",
+                "data": self.frame_to_records(analyzed_df),
+                'analyzer': analyzer.__class__.__name__
+            })
+            logger.info(f"{analyzer.__class__.__name__} 分析完成，包含 {len(analyzed_df)} 条数据")
 
-        # ✅ 最终返回时增加一个字段 “low_loss_projects”
         return {
             "all_analyzed_data": all_analyzed_data,
-            "low_loss_projects": low_loss_data  # 直接返回给前端
+            "low_loss_projects": self.frame_to_records(low_loss_df) if not low_loss_df.empty else [],
+            "low_loss_total": runner.low_loss_total,
         }
 
+    def run_workbook_analysis(self, file: UploadFile, engine=None):
+        """多工作表模式：并行分析工作簿中所有符合台账版式的工作表，返回各表摘要与汇总视图
+
+        汇总视图结构同 run_analysis + classify_projects，每条记录带“来源工作表”列，
+        分类统计按工作表分别计算（不同工作表的同名项目不合并），各条目附 sheet 字段。
+        """
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                file.file.seek(0)
+                shutil.copyfileobj(file.file, f)  # 工作进程按路径各自读取
+            runner = WorkbookAnalysisRunner(self.analyzers_config, engine=engine)
+            sheet_results = runner.run(path)
+        except ValueError as e:
+            logger.error(f"Excel 读取失败：{str(e)}")
+            raise HTTPException(status_code=400, detail=f"Excel 读取失败：{str(e)}")
+        finally:
+            os.remove(path)
+
+        combined = {cfg["sheet_name"]: [] for cfg in self.analyzers_config}
+        combined_low_loss = []
+        classification = {bucket: [] for bucket in CLASSIFICATION_BUCKETS}
+        sheets = []
+        for sheet in sheet_results:
+            name = sheet["sheet_name"]
+
+            def tagged_records(df):
+                df = df.copy(deep=False)
+                df.insert(0, SHEET_COLUMN, name)
+                return self.frame_to_records(df)
+
+            all_analyzed_data = []
+            for cfg, analyzed_df in zip(self.analyzers_config, sheet["results"]):
+                if analyzed_df is None:
+                    continue
+                records = tagged_records(analyzed_df)
+                combined[cfg["sheet_name"]].extend(records)
+                all_analyzed_data.append({"sheet_name": cfg["sheet_name"], "data": records})
+            low_loss = sheet["low_loss"]
+            if not low_loss.empty:
+                combined_low_loss.extend(tagged_records(low_loss))
+
+            statistics = self.classify_projects(all_analyzed_data)
+            for bucket in CLASSIFICATION_BUCKETS:
+                classification[bucket].extend({**item, "sheet": name} for item in statistics[bucket])
+            sheets.append({
+                "sheet_name": name,
+                "rows": sheet["rows"],
+                "rule_counts": {
+                    cfg["sheet_name"]: None if df is None else len(df)
+                    for cfg, df in zip(self.analyzers_config, sheet["results"])
+                },
+                "classification_counts": {bucket: len(statistics[bucket]) for bucket in CLASSIFICATION_BUCKETS},
+                "low_loss_projects": len(low_loss),
+            })
+            logger.info(f"工作表 {name} 分析完成，共 {sheet['rows']} 行")
+
+        all_analyzed_data = [
+            {
+                "analyzer_name": cfg["class"].__name__,
+                "sheet_name": cfg["sheet_name"],
+                "status": "success",
+                "data": combined[cfg["sheet_name"]],
+                "analyzer": cfg["class"].__name__,
+            }
+            for cfg in self.analyzers_config
+        ]
+        return {
+            "sheets": sheets,
+            "skipped_sheets": runner.skipped_sheets,
+            "combined": {
+                **classification,
+                "low_loss_projects": combined_low_loss,
+                "source": all_analyzed_data,
+            },
+        }
+
+    def save_leader_period(self, period, source=None):
+        """将本次负责人统计按报告期持久化（分块模式下仅保存次数）"""
+        analyzer = next((a for a in self.analyzers if isinstance(a, LeaderFrequencyAnalyzer)), None)
+        if analyzer is None or analyzer.get_leader_stats() is None:
+            raise HTTPException(status_code=400, detail="没有可保存的负责人统计，请先执行分析！")
+        leader_projects = None
+        if self.raw_data is not None:
+            leader_projects = analyzer.get_leader_projects(self.raw_data)
+        saved = leader_store.save_period(period, analyzer.get_leader_stats(), leader_projects, source=source)
+        logger.info(f"报告期 {period} 负责人统计已保存，共 {saved} 人")
+
+    def frame_to_records(self, df):
+        """将结果 DataFrame 转为记录列表（清理 NaN/Inf，日期转字符串）"""
+        cleaned_df = df.applymap(self.replace_invalid_floats)
+        return convert_datetime_to_string(cleaned_df.to_dict(orient="records"))
+
     def classify_projects(self, all_analyzed_data):
         """根据每个项目的异常点数量进行分类"""
         statistics = {
@@ -222,9 +404,12 @@ class AnalysisAPI:
         }
 
         project_stats = {}
+        ranking = ranking_sheet_names(self.analyzers_config)  # 排名清单不计入异常点
 
         # 遍历所有分析器的结果
         for item in all_analyzed_data:
+            if item["sheet_name"] in ranking:
+                continue
             cleaned_data = item["data"]
             analyzer_name = item["sheet_name"]
             
@@ -268,7 +453,9 @@ class AnalysisAPI:
         return statistics
 
     def replace_invalid_floats(self, value):
-        """替换无效的 float 值（NaN, Infinity）"""
+        """替换空值（None、NaT、NA）与无效的 float 值（NaN, Infinity）；各类型列的空单元格均输出为空字符串"""
+        if value is None or value is pd.NaT or value is pd.NA:
+            return ""
         if isinstance(value, float):
             if pd.isna(value) or value == float('inf') or value == float('-inf'):
                 return ""  # 或者返回一个替代字符串 "NaN"
@@ -306,17 +493,18 @@ class AnalysisAPI:
         
         return file_path
 
-    def save_results_to_excel_v2(self, results: list):
-        """将分析结果保存为新的 Excel 文件 (使用 pandas)"""
+    def save_results_to_excel_v2(self, results: list, file_path=None):
+        """将分析结果保存为新的 Excel 文件 (使用 pandas)；file_path 缺省为 output/分析报告.xlsx"""
         if not results:
             raise HTTPException(status_code=400, detail="没有结果需要保存！")
 
-        output_dir = "output"
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Set the path for the saved Excel file
-        file_name = "分析报告.xlsx"
-        file_path = os.path.join(output_dir, file_name)
+        if file_path is None:
+            output_dir = "output"
+            os.makedirs(output_dir, exist_ok=True)
+
+            # Set the path for the saved Excel file
+            file_name = "分析报告.xlsx"
+            file_path = os.path.join(output_dir, file_name)
         
         with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
             for result in results:
@@ -330,49 +518,15 @@ class AnalysisAPI:
         logger.info(f"分析结果已保存到：{file_path}")
         # Return the file path
         return file_path
-    def get_merged_value(self, sheet, row, col):
-        """获取指定行列的单元格值（处理合并单元格）"""
-        for merged_range in sheet.merged_cells.ranges:
-            if merged_range.min_row <= row <= merged_range.max_row and merged_range.min_col <= col <= merged_range.max_col:
-                return sheet.cell(row=merged_range.min_row, column=merged_range.min_col).value
-        return sheet.cell(row=row, column=col).value
-    def run_analysis_source(self):
-        """执行所有分析器"""
-        if self.raw_data is None or not self.analyzers:
-            raise HTTPException(status_code=400, detail="请先上传Excel文件！")
-        logger.info("开始执行数据分析...")
-        # 汇总所有分析器的结果
-        all_analyzed_data = []
-        # 先执行所有分析器，汇总所有结果
-        for i, cfg in enumerate(self.analyzers_config):
-            analyzer = self.analyzers[i]
-            logger.info(f"开始执行分析器：{analyzer.__class__.__name__}")
-            success = analyzer.analyze(df=self.raw_data, **cfg["analyze_kwargs"])
-            if success:
-                analyzed_df = analyzer.get_analyzed_data()
-                # 清理特殊的 float 值（NaN, Infinity 等）
-                cleaned_df = analyzed_df.applymap(self.replace_invalid_floats)
-
-                # Convert datetime objects to string
-                cleaned_data = cleaned_df.to_dict(orient="records")
-                cleaned_data = convert_datetime_to_string(cleaned_data)  # Apply the conversion
-
-                # 汇总所有分析器的结果，并在每个结果中添加分析器名称
-                all_analyzed_data.append({
-                    "analyzer_name": analyzer.__class__.__name__,
-                    "sheet_name": cfg["sheet_name"],
-                    "status": "success",
-                    "data": cleaned_data,
-                    'analyzer':analyzer.__class__.__name__
-                })
-                logger.info(f"{analyzer.__class__.__name__} 分析完成，包含 {len(cleaned_df)} 条数据")
-            else:
-                logger.error(f"{analyzer.__class__.__name__} 分析失败或无结果")
-
-        logger.info("所有分析器执行完毕")
-        return all_analyzed_data
 
 analysis_api = AnalysisAPI()    
+ledger_cache = LedgerCache()
+leader_store = LeaderStatsStore()
+results_store = ResultsStore()
+session_store = SessionStore()
+admission_controller = AdmissionController()
+SHEET_COLUMN = "来源工作表"  # 多工作表模式下记录所属工作表的列名
+PERSIST_RESULTS = os.environ.get("ANALYSIS_PERSIST_RESULTS", "1") != "0"  # 是否保存每次分析的被标记项目
 
 def convert_all_non_json_compliant_to_string(obj):
     """Recursively convert all non-JSON-compliant types to string."""
@@ -388,30 +542,176 @@ def convert_all_non_json_compliant_to_string(obj):
         return [convert_all_non_json_compliant_to_string(item) for item in obj]
     return str(obj)  # 处理其他类型，直接转换为字符串
 
-@app.post("/upload_and_analyze_json/", tags=["一站式API"])
-async def upload_and_analyze_json(file: UploadFile = File(..., description="要分析的项目数据 Excel 文件")):
-    """
-    【一站式】上传 Excel 文件，立即执行所有分析，并返回 JSON 格式的结果。
-    """
+def _request_profiler(label, profile, x_profile, x_admin_token):
+    """按查询参数 profile=true 或请求头 X-Profile 开启单次请求剖析（仅限管理员）"""
+    requested = profile or (x_profile or "").lower() in ("1", "true", "yes")
+    if requested and not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="请求剖析仅限管理员使用")
+    return RequestProfiler(label=label, enabled=requested)
+
+
+def _upload_size(file: UploadFile):
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+# 接收台账上传的接口及单个请求最多携带的文件数
+UPLOAD_ROUTES = {
+    "/upload_and_analyze_json/": 1,
+    "/upload_and_download_excel/": 1,
+    "/upload_and_export/": 1,
+    "/upload_and_analyze_workbook/": 1,
+    "/upload_and_summarize/": 1,
+    "/upload_and_analyze_stream/": 1,
+    "/sessions/": 1,
+    "/diff/": 2,
+}
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request, call_next):
+    """按 Content-Length 在接收请求体之前拒绝超限上传（413），避免先占满带宽与磁盘"""
+    files = UPLOAD_ROUTES.get(request.url.path) if request.method == "POST" else None
+    length = request.headers.get("content-length")
+    if files and length and length.isdigit():
+        try:
+            admission_controller.check_declared_size(int(length), files)
+        except AdmissionError as e:
+            logger.warning(f"拒绝上传：{e.detail}")
+            return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+    return await call_next(request)
+
+
+@contextmanager
+def _admitted(file: UploadFile, chunked=False):
+    """上传准入控制：超出文件大小、并发解析数或内存预算时返回 413 / 429 / 503（附 Retry-After）"""
+    try:
+        fmt = "chunked" if chunked else ledger_format(file.filename)
+        estimate = admission_controller.acquire(_upload_size(file), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Excel 读取失败：{str(e)}")
+    except AdmissionError as e:
+        headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+    try:
+        yield
+    finally:
+        admission_controller.release(estimate)
+
+
+def _check_export_format(fmt):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式：{fmt}（可选 {', '.join(EXPORT_FORMATS)}）")
+
+
+def _write_export(frames, fmt):
+    """将结果 DataFrame 导出为临时文件，返回文件路径"""
+    _check_export_format(fmt)
+    fd, path = tempfile.mkstemp(suffix=EXPORT_FORMATS[fmt][0])
+    os.close(fd)
     try:
-        analysis_api.upload_excel(file)
-        results = analysis_api.run_analysis()
-        # 这里的 run_analysis() 现在返回 dict，包括：
-        # { "all_analyzed_data": [...], "low_loss_projects": [...] }
+        export_results(frames, fmt, path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
 
-        all_analyzed_data = results["all_analyzed_data"]
-        low_loss_projects = results.get("low_loss_projects", [])
 
-        # 对主要分析数据执行分类统计
-        classified_results = analysis_api.classify_projects(all_analyzed_data)
+def _export_file_response(path, fmt, basename="分析结果", background=None):
+    suffix, media_type = EXPORT_FORMATS[fmt]
+    filename = f"{basename}_{fmt}{suffix}" if fmt != "ndjson" else f"{basename}{suffix}"
+    return FileResponse(path, media_type=media_type, filename=filename, background=background)
 
-        # 把低额亏损项目附加进最终返回结果
-        classified_results["low_loss_projects"] = low_loss_projects
 
-        # 转换为可序列化结构
-        classified_results = convert_all_non_json_compliant_to_string(classified_results)
-        classified_results = jsonable_encoder(classified_results)
-        return JSONResponse(content=classified_results)
+def _excel_report_response(api, all_analyzed_data, headers=None):
+    """将分析结果写入本请求独立的临时 Excel 文件并返回下载，响应发送后删除（并发请求互不覆盖）"""
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        api.save_results_to_excel_v2(all_analyzed_data, file_path=path)
+    except Exception:
+        os.remove(path)
+        raise
+    return FileResponse(
+        path,
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        filename="分析报告.xlsx",
+        headers=headers,
+        background=BackgroundTask(os.remove, path),
+    )
+
+
+def _export_response(frames, fmt, basename="分析结果"):
+    """将结果 DataFrame 导出为临时文件并返回下载，响应发送后删除临时文件"""
+    path = _write_export(frames, fmt)
+    return _export_file_response(path, fmt, basename, background=BackgroundTask(os.remove, path))
+
+
+@app.post("/upload_and_analyze_json/", tags=["一站式API"])
+def upload_and_analyze_json(
+    file: UploadFile = File(..., description="要分析的项目数据文件（xlsx / csv / parquet）"),
+    profile: bool = Query(False, description="是否剖析本次请求（需管理员令牌）"),
+    chunked: bool = Query(False, description="分块流式分析（超大 xlsx 台账，内存占用与文件大小无关；低额亏损只返回亏损金额最大的若干行）"),
+    chunk_size: int = Query(CHUNK_SIZE, ge=1000, description="分块模式每块行数"),
+    period: Optional[str] = Query(None, description="报告期（如 2025Q3），提供时持久化负责人统计"),
+    engine: Optional[str] = Query(None, description="xlsx 读取引擎：openpyxl / fast（多进程），缺省取服务配置"),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """
+    【一站式】上传 Excel 文件，立即执行所有分析，并返回 JSON 格式的结果。
+    开启剖析时，响应头 X-Profile-Report 给出剖析报告编号。
+    """
+    api = AnalysisAPI()  # 每个请求独立实例：同步处理函数在线程池中并发执行
+    try:
+        profiler = _request_profiler("analyze_json", profile, x_profile, x_admin_token)
+        chunked = chunked and ledger_format(file.filename) == "xlsx"
+        with _admitted(file, chunked=chunked), profiler:
+            if chunked:
+                with profiler.stage("chunked_analyze"):
+                    results = api.run_chunked_analysis(file, chunk_size=chunk_size)
+            else:
+                with profiler.stage("upload"):
+                    api.upload_excel(file, engine=engine)
+                with profiler.stage("analyze"):
+                    results = api.run_analysis()
+            # 这里的 run_analysis() 现在返回 dict，包括：
+            # { "all_analyzed_data": [...], "low_loss_projects": [...] }
+
+            all_analyzed_data = results["all_analyzed_data"]
+            low_loss_projects = results.get("low_loss_projects", [])
+            if period:
+                api.save_leader_period(period, source=file.filename)
+            run_id = None
+            if PERSIST_RESULTS:
+                # 排名清单（如前 K 名）不是异常标记，不写入被标记项目库
+                ranking = ranking_sheet_names(api.analyzers_config)
+                flagged = [item for item in all_analyzed_data if item["sheet_name"] not in ranking]
+                run_id = results_store.save_run(flagged, source=file.filename, period=period)
+
+            with profiler.stage("classify"):
+                # 对主要分析数据执行分类统计
+                classified_results = api.classify_projects(all_analyzed_data)
+
+                # 把低额亏损项目附加进最终返回结果
+                classified_results["low_loss_projects"] = low_loss_projects
+                if "low_loss_total" in results:
+                    classified_results["low_loss_total"] = results["low_loss_total"]
+                classified_results["run_id"] = run_id
+
+            with profiler.stage("serialize"):
+                # 转换为可序列化结构
+                classified_results = convert_all_non_json_compliant_to_string(classified_results)
+                classified_results = jsonable_encoder(classified_results)
+                response = JSONResponse(content=classified_results)
+        if profiler.report_id:
+            response.headers["X-Profile-Report"] = profiler.report_id
+        return response
     except HTTPException as e:
         logger.error(f"HTTP 错误：{e.detail}")
         raise e
@@ -422,32 +722,36 @@ async def upload_and_analyze_json(file: UploadFile = File(..., description="要
         raise HTTPException(status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
 
 @app.post("/upload_and_download_excel/", tags=["一站式API"])
-async def upload_and_download_excel(file: UploadFile = File(..., description="要分析的项目数据 Excel 文件")):
+def upload_and_download_excel(
+    file: UploadFile = File(..., description="要分析的项目数据文件（xlsx / csv / parquet）"),
+    profile: bool = Query(False, description="是否剖析本次请求（需管理员令牌）"),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
     """
     【一站式】上传 Excel 文件，执行分析，并将结果保存为 Excel 文件并直接返回下载。
     """
+    api = AnalysisAPI()
     try:
         logger.info("开始上传并分析 Excel 文件...")
-        
-        # 上传并解析Excel文件
-        analysis_api.upload_excel(file)
+        profiler = _request_profiler("download_excel", profile, x_profile, x_admin_token)
+        with _admitted(file), profiler:
+            # 上传并解析Excel文件
+            with profiler.stage("upload"):
+                api.upload_excel(file)
 
-        # 执行分析并获取所有分析的结果
-        all_analyzed_data = analysis_api.run_analysis()
+            # 执行分析并获取所有分析的结果
+            with profiler.stage("analyze"):
+                results = api.run_analysis()
 
-        # Use the new save method to save results to Excel
-        file_path = analysis_api.save_results_to_excel_v2(all_analyzed_data)
-
-        # Ensure that the file exists before sending the response
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="生成的Excel文件未找到")
+            # Use the new save method to save results to Excel
+            with profiler.stage("export"):
+                response = _excel_report_response(api, results["all_analyzed_data"])
 
         # Return the file as a response to the client
-        return FileResponse(
-            file_path, 
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 
-            filename="分析报告.xlsx"
-        )
+        if profiler.report_id:
+            response.headers["X-Profile-Report"] = profiler.report_id
+        return response
 
     except HTTPException as e:
         logger.error(f"HTTP 错误：{e.detail}")
@@ -456,27 +760,111 @@ async def upload_and_download_excel(file: UploadFile = File(..., description="
         logger.error(f"发生未知错误：{str(e)}")
         raise HTTPException(status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
 
+
+@app.get("/admin/profiles/{report_id}", tags=["管理"])
+async def get_profile_report(
+    report_id: str,
+    format: str = Query("json", description="json（摘要报告）或 prof（pstats 原始文件）"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """下载请求剖析报告（仅限管理员）"""
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="仅限管理员访问")
+    path = load_report(report_id, fmt=format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="剖析报告不存在")
+    if format == "prof":
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{report_id}.prof")
+    with open(path, "r", encoding="utf-8") as f:
+        return JSONResponse(content=json.load(f))
+
 from fastapi import Body
 
 @app.post("/download_excel/", tags=["一站式API"])
-async def upload_and_download_excel(all_analyzed_data: list = Body(...)):
+def upload_and_download_excel(all_analyzed_data: list = Body(...)):
     """
     【一站式】上传 Excel 文件，执行分析，并将结果保存为 Excel 文件并直接返回下载。
     """
     try:
         logger.info("开始上传并分析 Excel 文件...")
 
-        file_path = analysis_api.save_results_to_excel_v2(all_analyzed_data)
+        return _excel_report_response(analysis_api, all_analyzed_data)
 
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="生成的Excel文件未找到")
+    except HTTPException as e:
+        logger.error(f"HTTP 错误：{e.detail}")
+        raise e
+    except Exception as e:
+        logger.error(f"发生未知错误：{str(e)}")
+        raise HTTPException(status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
 
-        return FileResponse(
-            file_path,
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            filename="分析报告.xlsx"
-        )
 
+@app.post("/upload_and_export/", tags=["一站式API"])
+def upload_and_export(
+    file: UploadFile = File(..., description="要分析的项目数据文件（xlsx / csv / parquet）"),
+    format: str = Query("parquet", description="导出格式：parquet（zip）/ csv（zip）/ ndjson"),
+):
+    """
+    【一站式】上传台账并执行分析，将各分析器结果及 low_loss_projects 按所选格式直接导出下载。
+    """
+    api = AnalysisAPI()
+    try:
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"不支持的导出格式：{format}（可选 {', '.join(EXPORT_FORMATS)}）")
+        with _admitted(file):
+            api.upload_excel(file)
+            frames = api.result_frames()
+            return _export_response(frames, format)
+    except HTTPException as e:
+        logger.error(f"HTTP 错误：{e.detail}")
+        raise e
+    except Exception as e:
+        logger.error(f"发生未知错误：{str(e)}")
+        raise HTTPException(status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
+
+
+@app.post("/upload_and_analyze_workbook/", tags=["一站式API"])
+def upload_and_analyze_workbook(
+    file: UploadFile = File(..., description="包含多个台账工作表的 xlsx 工作簿（如每个子公司一个工作表）"),
+    engine: Optional[str] = Query(None, description="xlsx 读取引擎：openpyxl / fast，缺省取服务配置"),
+):
+    """
+    【一站式】上传多工作表工作簿，并行分析所有符合台账版式的工作表。
+    返回各工作表摘要（sheets）、跳过的工作表（skipped_sheets）与汇总视图（combined，记录带“来源工作表”列）。
+    """
+    api = AnalysisAPI()
+    try:
+        if ledger_format(file.filename) != "xlsx":
+            raise HTTPException(status_code=400, detail="多工作表分析仅支持 xlsx 工作簿")
+        with _admitted(file):
+            results = api.run_workbook_analysis(file, engine=engine)
+        # 汇总视图与单文件接口保持一致（取值转字符串），工作表摘要中的计数保持数值
+        results["combined"] = convert_all_non_json_compliant_to_string(results["combined"])
+        return JSONResponse(content=jsonable_encoder(results))
+    except HTTPException as e:
+        logger.error(f"HTTP 错误：{e.detail}")
+        raise e
+    except Exception as e:
+        logger.error(f"发生未知错误：{str(e)}")
+        raise HTTPException(status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
+
+
+@app.post("/upload_and_summarize/", tags=["一站式API"])
+def upload_and_summarize(
+    file: UploadFile = File(..., description="要分析的项目数据文件（xlsx / csv / parquet）"),
+    bins: int = Query(DEFAULT_BINS, ge=1, le=200, description="亏损金额直方图分箱数"),
+    top_leaders: int = Query(DEFAULT_TOP_LEADERS, ge=1, le=5000, description="按亏损金额返回的负责人数量"),
+    engine: Optional[str] = Query(None, description="xlsx 读取引擎：openpyxl / fast，缺省取服务配置"),
+):
+    """
+    【一站式】上传台账并执行分析，只返回汇总统计：各规则命中数与亏损合计、按项目类别 / 负责人汇总、
+    亏损金额直方图与分位数（供看板使用，不返回命中行）。
+    """
+    api = AnalysisAPI()
+    try:
+        with _admitted(file):
+            api.upload_excel(file, engine=engine)
+            summary = api.summarize(bins=bins, top_leaders=top_leaders)
+        return JSONResponse(content=jsonable_encoder(summary))
     except HTTPException as e:
         logger.error(f"HTTP 错误：{e.detail}")
         raise e
@@ -485,6 +873,276 @@ async def upload_and_download_excel(all_analyzed_data: list = Body(...)):
         raise HTTPException(status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
 
 
+def _sse(event, data):
+    """格式化一条 Server-Sent Events 消息"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+@app.post("/upload_and_analyze_stream/", tags=["一站式API"])
+async def upload_and_analyze_stream(
+    file: UploadFile = File(..., description="要分析的项目数据文件（xlsx / csv / parquet）"),
+    engine: Optional[str] = Query(None, description="xlsx 读取引擎：openpyxl / fast，缺省取服务配置"),
+    partial: bool = Query(True, description="analyzer_finished 事件是否附带该分析器的命中行（data）"),
+    export: Optional[str] = Query(None, description="分析完成后写出的导出格式：parquet / csv / ndjson，缺省不导出"),
+):
+    """
+    【一站式】上传台账并以 Server-Sent Events（text/event-stream）实时推送分析进度，前端可边分析边展示结果。
+
+    事件依次为：received（已接收字节数）→ header_parsed（列数）→ rows_loaded（已读取行数，done 为 true 时读取完成）
+    → 每个分析器的 analyzer_started / analyzer_finished（命中行数，partial 时附命中行）或 analyzer_failed
+    → export_written（指定 export 时，附下载地址）→ complete（会话编号与各结果分组条数）；出错时为 error。
+    分析结果保存为服务端会话，可继续通过 /sessions/{session_id}/… 分页读取或导出。
+    """
+    if export is not None:
+        _check_export_format(export)
+    # 准入检查在开始推送前完成，超限时仍返回 413 / 429 / 503；名额在后台分析结束时释放
+    size = _upload_size(file)
+    admission = ExitStack()
+    admission.enter_context(_admitted(file))
+    events = queue.Queue()
+    api = AnalysisAPI()
+    api.project_columns = False  # 逐个推送的命中行需包含完整列
+
+    def progress(event, **data):
+        frame = data.pop("frame", None)
+        if partial and frame is not None:
+            data["data"] = convert_all_non_json_compliant_to_string(api.frame_to_records(frame))
+        events.put((event, data))
+
+    api.progress = progress
+
+    def run():
+        try:
+            with admission:
+                progress("received", filename=file.filename, bytes=size)
+                api.upload_excel(file, engine=engine)
+                session = api.create_session(source=file.filename, analysis=api.run_analysis_frames())
+                if export is not None:
+                    path = _write_export(session.frames, export)
+                    session.exports[export] = path
+                    progress("export_written", format=export, bytes=os.path.getsize(path),
+                             url=f"/sessions/{session.session_id}/export?format={export}")
+                progress("complete", session_id=session.session_id, buckets=session.buckets(),
+                         expires_in=session_store.ttl_seconds)
+        except HTTPException as e:
+            logger.error(f"HTTP 错误：{e.detail}")
+            progress("error", status_code=e.status_code, detail=e.detail)
+        except Exception as e:
+            logger.error(f"发生未知错误：{str(e)}")
+            progress("error", status_code=500, detail=f"处理请求时发生未知错误: {str(e)}")
+        finally:
+            events.put(None)
+
+    def stream():
+        while True:
+            item = events.get()
+            if item is None:
+                return
+            yield _sse(*item)
+
+    try:
+        threading.Thread(target=run, daemon=True).start()
+    except BaseException:
+        admission.close()  # 后台分析未能启动时立即释放准入名额
+        raise
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/sessions/{session_id}/summary", tags=["分页结果"])
+async def session_summary(
+    session_id: str,
+    bins: int = Query(DEFAULT_BINS, ge=1, le=200, description="亏损金额直方图分箱数"),
+    top_leaders: int = Query(DEFAULT_TOP_LEADERS, ge=1, le=5000, description="按亏损金额返回的负责人数量"),
+):
+    """返回分析会话的汇总统计（基于会话中已保存的结果，无需重新分析）"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="分析会话不存在或已过期")
+    return summarize_frames(
+        session.rule_frames(), bins=bins, top_leaders=top_leaders,
+        ranking_rules=ranking_sheet_names(analysis_api.analyzers_config),
+    )
+
+
+@app.get("/sessions/{session_id}/export", tags=["分页结果"])
+async def export_session(
+    session_id: str,
+    format: str = Query("parquet", description="导出格式：parquet（zip）/ csv（zip）/ ndjson"),
+):
+    """将分析会话中的全部结果表导出下载（无需重新分析）；流式接口已写出的导出文件直接返回"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="分析会话不存在或已过期")
+    path = session.exports.get(format)
+    if path is not None and os.path.exists(path):
+        return _export_file_response(path, format)
+    return _export_response(session.frames, format)
+
+
+@app.get("/leaders/periods", tags=["负责人跨期统计"])
+async def list_leader_periods():
+    """列出已保存负责人统计的报告期"""
+    return leader_store.list_periods()
+
+
+@app.get("/leaders/frequent", tags=["负责人跨期统计"])
+async def frequent_leaders(
+    min_count: int = Query(3, ge=1, description="累计项目数下限"),
+    last_periods: Optional[int] = Query(None, ge=1, description="最近报告期数（缺省为全部）"),
+):
+    """查询最近若干报告期内累计项目数达到下限的负责人"""
+    return leader_store.frequent_leaders(min_count=min_count, last_periods=last_periods)
+
+
+@app.get("/leaders/{leader}/history", tags=["负责人跨期统计"])
+async def leader_history(leader: str, with_projects: bool = Query(True, description="是否返回项目清单")):
+    """查询某负责人各报告期的项目数及项目清单"""
+    history = leader_store.leader_history(leader, with_projects=with_projects)
+    if not history:
+        raise HTTPException(status_code=404, detail=f"未找到负责人「{leader}」的统计记录")
+    return history
+
+
+@app.get("/results/runs", tags=["结果查询"])
+async def list_result_runs(limit: int = Query(50, ge=1, le=1000)):
+    """列出已保存的分析记录"""
+    return results_store.list_runs(limit=limit)
+
+
+@app.get("/results/projects/{project_name}", tags=["结果查询"])
+async def project_flags(project_name: str, limit: int = Query(200, ge=1, le=5000)):
+    """查询某项目在历次分析中的全部标记"""
+    return results_store.project_flags(project_name, limit=limit)
+
+
+@app.get("/results/leaders/{leader}", tags=["结果查询"])
+async def leader_flags(
+    leader: str,
+    run_id: Optional[int] = Query(None, description="分析记录编号（缺省为最近一次）"),
+    limit: int = Query(200, ge=1, le=5000),
+):
+    """查询某负责人名下被标记的项目"""
+    return results_store.leader_flags(leader, run_id=run_id, limit=limit)
+
+
+@app.get("/results/top_losses", tags=["结果查询"])
+async def top_losses(
+    category: Optional[str] = Query(None, description="项目类别，如 房建工程"),
+    category_class: Optional[str] = Query(None, description="类别归类，如 施工类 / 其他类"),
+    analyzer: Optional[str] = Query(None, description="分析器类名或结果表名"),
+    run_id: Optional[int] = Query(None, description="分析记录编号（缺省为最近一次）"),
+    limit: int = Query(50, ge=1, le=5000),
+):
+    """按亏损金额倒序返回被标记项目"""
+    return results_store.top_losses(
+        category=category, category_class=category_class, analyzer=analyzer, run_id=run_id, limit=limit
+    )
+
+
+@app.post("/sessions/", tags=["分页结果"])
+def create_analysis_session(
+    file: UploadFile = File(..., description="要分析的项目数据文件（xlsx / csv / parquet）"),
+):
+    """
+    上传并分析台账，结果保留在服务端会话中，返回会话编号及各结果分组的条数；
+    再通过 /sessions/{session_id}/results/{bucket} 分页读取。
+    """
+    api = AnalysisAPI()
+    with _admitted(file):
+        api.upload_excel(file)
+        session = api.create_session(source=file.filename)
+    return {
+        "session_id": session.session_id,
+        "buckets": session.buckets(),
+        "expires_in": session_store.ttl_seconds,
+    }
+
+
+@app.get("/sessions/{session_id}", tags=["分页结果"])
+async def get_analysis_session(session_id: str):
+    """查询会话中各结果分组的条数"""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="分析会话不存在或已过期")
+    return {"session_id": session_id, "source": session.source, "buckets": session.buckets()}
+
+
+@app.get("/sessions/{session_id}/results/{bucket}", tags=["分页结果"])
+async def get_session_results(
+    session_id: str,
+    bucket: str,
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，缺省为第一页"),
+    page_size: int = Query(100, ge=1, le=5000, description="每页条数"),
+    sort: str = Query("none", description="排序：none / loss_desc / loss_asc（按亏损金额）"),
+):
+    """
+    分页读取会话结果。bucket 为结果表名（如 亏损大于1000万）、分类统计
+    （all / one_exception / two_exceptions / more_than_two_exceptions）或 low_loss_projects。
+    """
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="分析会话不存在或已过期")
+    try:
+        total, items, next_cursor = session.page(bucket, cursor=cursor, page_size=page_size, sort=sort)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"结果分组不存在：{bucket}（可选 {', '.join(session.buckets())}）")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if isinstance(items, pd.DataFrame):
+        items = analysis_api.frame_to_records(items)
+    return JSONResponse(content=jsonable_encoder({
+        "session_id": session_id,
+        "bucket": bucket,
+        "total": total,
+        "items": convert_all_non_json_compliant_to_string(items),
+        "next_cursor": next_cursor,
+    }))
+
+
+@app.delete("/sessions/{session_id}", tags=["分页结果"])
+async def delete_analysis_session(session_id: str):
+    """提前释放分析会话"""
+    if not session_store.remove(session_id):
+        raise HTTPException(status_code=404, detail="分析会话不存在或已过期")
+    return {"session_id": session_id, "deleted": True}
+
+
+@app.post("/diff/", tags=["跨期对比"])
+def diff_report(
+    previous_file: Optional[UploadFile] = File(None, description="上期台账"),
+    current_file: Optional[UploadFile] = File(None, description="本期台账"),
+    previous_session: Optional[str] = Query(None, description="上期分析会话编号（代替上期台账）"),
+    current_session: Optional[str] = Query(None, description="本期分析会话编号（代替本期台账）"),
+    summary_only: bool = Query(False, description="仅返回各规则计数"),
+):
+    """对比两期被标记项目：按规则列出新增标记、已解除及内容变化的项目"""
+    api = AnalysisAPI()
+    frames = []
+    for label, upload, session_id in (
+        ("上期", previous_file, previous_session),
+        ("本期", current_file, current_session),
+    ):
+        if session_id:
+            session = session_store.get(session_id)
+            if session is None:
+                raise HTTPException(status_code=404, detail=f"{label}分析会话不存在或已过期")
+            frames.append(session.rule_frames())
+        elif upload is not None:
+            with _admitted(upload):
+                api.upload_excel(upload)
+                frames.append(api.analyze_rule_frames())
+        else:
+            raise HTTPException(status_code=400, detail=f"请提供{label}台账文件或分析会话编号")
+
+    try:
+        report = diff_results(*frames)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if summary_only:
+        return summarize(report)
+    return JSONResponse(content=jsonable_encoder(report))
+
+
 # 运行FastAPI服务器
 if __name__ == "__main__":
     import uvicorn
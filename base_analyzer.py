@@ -1,31 +1,67 @@
+from tkinter import messagebox
+
+from amount_parser import parse_amounts
+from excel_reader import match_columns
+
+
 class BaseAnalyzer:
+    # 分块执行方式："row_local" 各块独立筛选后合并；"aggregate" 需跨块汇总统计后再二次筛选；
+    # "reduce" 各块独立筛选，合并后对合并结果再执行一次 analyze（如前 K 名）
+    chunk_mode = "row_local"
+    # 分析时读取的列（按 _find_col 规则匹配的列名），用于列裁剪读取
+    required_columns = ()
+    # 按列名规则识别的列（正则，匹配去除空格后的列名），如模板中可增减的成本列
+    required_column_patterns = ()
+
     def __init__(self, original_columns):
         self.original_columns = original_columns  # 原始列名（保持结果顺序）
         self.analyzed_data = None  # 分析结果数据
         self.logs = []  # 分析过程日志
+        self.amount_stats = {}  # 金额列解析统计：{列名: {"rescued": n, "rejected": n}}
 
     def _find_col(self, df, col_name):
         """通用列查找方法（适配多级表头）"""
-        target_clean = str(col_name).strip().replace(" ", "").replace("　", "")
-        matches = []
-        for col in df.columns:
-            col_clean = str(col).strip().replace(" ", "").replace("　", "")
-            if col_clean == target_clean or col_clean.endswith(f"_{target_clean}"):
-                matches.append(col)
+        matches = list(match_columns(tuple(df.columns), col_name))
         if not matches:
             raise ValueError(f"未找到「{col_name}」列（候选列示例：{df.columns[:5]}）")
         if len(matches) > 1:
             raise ValueError(f"找到多个「{col_name}」列：{matches}，请确认唯一列")
         return matches[0]
 
+    def _to_amount(self, series):
+        """金额列转数值（识别千分位、万/元单位、全角字符、括号负数），记录修复及无法解析的单元格数"""
+        values, stats = parse_amounts(series)
+        self.amount_stats[series.name] = stats
+        if stats["rescued"] or stats["rejected"]:
+            self._log(f"「{series.name}」列：识别 {stats['rescued']} 个非标准金额写法，"
+                      f"{stats['rejected']} 个无法解析按空值处理")
+        return values
+
     def _log(self, msg):
         """内部日志记录"""
         self.logs.append(msg)
 
+    def _notify(self, kind, title, msg, parent=None):
+        """GUI 调用（提供 parent）时弹窗提示；API、分块等无界面调用时仅记录日志"""
+        if parent is not None:
+            getattr(messagebox, kind)(title, msg, parent=parent)
+
     def analyze(self, df, parent=None, **kwargs):
         """子类必须实现的分析方法"""
         raise NotImplementedError("子类需实现analyze方法")
 
+    def accumulate(self, df, **kwargs):
+        """分块模式第一遍：累加本块的统计量（aggregate 类分析器实现）"""
+        raise NotImplementedError("aggregate 类分析器需实现accumulate方法")
+
+    def finalize(self, **kwargs):
+        """分块模式：全部块累加完成后确定筛选条件"""
+        raise NotImplementedError("aggregate 类分析器需实现finalize方法")
+
+    def select(self, df):
+        """分块模式第二遍：按已确定的条件筛选本块数据"""
+        raise NotImplementedError("aggregate 类分析器需实现select方法")
+
     def get_analyzed_data(self):
         return self.analyzed_data
 
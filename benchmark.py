@@ -0,0 +1,173 @@
+"""
+基准测试：在合成台账上分阶段计时（打开工作簿、表头解析、数据行读取、多进程引擎读取、各分析器、
+run_analysis、classify_projects、JSON 序列化、Excel 导出），输出可跨提交对比的 JSON 报告。
+
+用法：
+    python benchmark.py --sizes 1000 10000 --repeat 3
+    python benchmark.py --sizes 1000 10000 --compare bench_results/<旧报告>.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from openpyxl import load_workbook
+
+from api import AnalysisAPI, convert_all_non_json_compliant_to_string
+from excel_reader import parse_header_columns, read_data_frame
+from ledger_generator import generate_ledger
+from xlsx_fast_reader import load_ledger_fast
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DATA_DIR = "bench_data"
+RESULTS_DIR = "bench_results"
+
+
+@contextmanager
+def _timed(timings, stage):
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+
+
+def ensure_ledger(n_rows, data_dir=DATA_DIR, seed=0):
+    """获取（必要时生成）指定行数的合成台账"""
+    path = os.path.join(data_dir, f"ledger_{n_rows}_s{seed}.xlsx")
+    if not os.path.exists(path):
+        print(f"生成合成台账 {path} ...")
+        generate_ledger(path, n_rows, seed=seed)
+    return path
+
+
+def run_once(path):
+    """对一个台账执行一次完整流程，返回各阶段耗时（秒）"""
+    timings = {}
+    api = AnalysisAPI()
+
+    with _timed(timings, "workbook_open"):
+        wb = load_workbook(path, data_only=True)
+        sheet = wb.active
+    with _timed(timings, "header_parse"):
+        api.original_columns = parse_header_columns(sheet)
+    with _timed(timings, "row_load"):
+        api.raw_data = read_data_frame(sheet, api.original_columns)
+    del wb, sheet
+    with _timed(timings, "fast_load"):  # 多进程引擎的完整读取（对比上面三个阶段之和）
+        load_ledger_fast(path)
+
+    api.analyzers = [cfg["class"](original_columns=api.original_columns) for cfg in api.analyzers_config]
+    for analyzer, cfg in zip(api.analyzers, api.analyzers_config):
+        with _timed(timings, f"analyzer:{analyzer.__class__.__name__}"):
+            analyzer.analyze(df=api.raw_data, **cfg["analyze_kwargs"])
+
+    with _timed(timings, "run_analysis"):
+        results = api.run_analysis()
+    with _timed(timings, "classify_projects"):
+        classified = api.classify_projects(results["all_analyzed_data"])
+        classified["low_loss_projects"] = results["low_loss_projects"]
+    with _timed(timings, "json_serialization"):
+        json.dumps(jsonable_encoder(convert_all_non_json_compliant_to_string(classified)), ensure_ascii=False)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            with _timed(timings, "excel_export"):
+                api.save_results_to_excel_v2(results["all_analyzed_data"])
+        finally:
+            os.chdir(cwd)
+    return timings
+
+
+def run_benchmark(sizes, repeat, data_dir=DATA_DIR):
+    """按规模执行基准测试，返回报告字典"""
+    report = {"meta": _environment(), "results": {}}
+    for n_rows in sizes:
+        path = ensure_ledger(n_rows, data_dir)
+        runs = [run_once(path) for _ in range(repeat)]
+        stages = {}
+        for stage in runs[0]:
+            values = [run[stage] for run in runs]
+            stages[stage] = {
+                "min": min(values),
+                "median": statistics.median(values),
+                "runs": values,
+            }
+        report["results"][str(n_rows)] = {
+            "rows": n_rows,
+            "file_bytes": os.path.getsize(path),
+            "stages": stages,
+        }
+        print(f"[{n_rows} 行] " + ", ".join(f"{k}={v['median']:.3f}s" for k, v in stages.items()))
+    return report
+
+
+def compare_reports(base, current):
+    """对比两份报告的各阶段中位耗时，返回文本表格"""
+    lines = [f"{'规模':>8}  {'阶段':<32}{'基线(s)':>10}{'当前(s)':>10}{'比值':>8}"]
+    for size, cur in current["results"].items():
+        base_stages = base.get("results", {}).get(size, {}).get("stages", {})
+        for stage, stat in cur["stages"].items():
+            if stage not in base_stages:
+                continue
+            b = base_stages[stage]["median"]
+            c = stat["median"]
+            ratio = c / b if b > 0 else float("inf")
+            lines.append(f"{size:>8}  {stage:<32}{b:>10.3f}{c:>10.3f}{ratio:>8.2f}")
+    return "\n".join(lines)
+
+
+def _environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "openpyxl": openpyxl.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="亏损分析流程基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="台账行数（可选 1000 10000 100000 500000）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个规模重复次数")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="合成台账缓存目录")
+    parser.add_argument("--output", help="报告输出路径（默认 bench_results/bench_<commit>_<时间>.json）")
+    parser.add_argument("--compare", help="与之对比的旧报告路径")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.repeat, args.data_dir)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{report['meta']['commit']}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已保存到：{output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        print(compare_reports(base, report))
+
+
+if __name__ == "__main__":
+    main()
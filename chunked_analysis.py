@@ -0,0 +1,115 @@
+"""
+分块（out-of-core）分析：以只读流式模式按块读取台账，内存占用与文件大小无关。
+
+- 逐行判断的分析器（亏损阈值、成本占比、类别筛选）对每块独立执行，只保留命中行；
+- 汇总类分析器（chunk_mode="aggregate"，如负责人频次）第一遍逐块累加统计量，
+  合并后确定筛选条件，再第二遍流式读取，仅提取命中行；
+- 归并类分析器（chunk_mode="reduce"，如前 K 名）各块独立筛选，合并后对合并结果再执行一次。
+
+低额亏损（亏损金额低于 10 万元）的行在台账中占绝大多数，分块模式逐块归并，只保留亏损金额最大的
+low_loss_limit 行，总行数记入 low_loss_total。
+"""
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from amount_parser import parse_amounts
+from excel_reader import CHUNK_SIZE, find_column, iter_ledger_chunks, read_streaming_header
+from loss_analyzer import LossDataAnalyzer
+from top_k_analyzer import top_positions
+
+logger = logging.getLogger(__name__)
+
+LOW_LOSS_LIMIT = int(os.environ.get("ANALYSIS_CHUNKED_LOW_LOSS_LIMIT", "10000"))  # 分块模式保留的低额亏损行数
+
+
+class ChunkedAnalysisRunner:
+    def __init__(self, analyzers_config, chunk_size=CHUNK_SIZE, low_loss_limit=LOW_LOSS_LIMIT):
+        self.analyzers_config = analyzers_config
+        self.chunk_size = chunk_size
+        self.low_loss_limit = low_loss_limit
+        self.original_columns = []
+        self.analyzers = []
+        self.total_rows = 0
+        self.low_loss_total = 0
+
+    def run(self, source):
+        """对台账（路径或可 seek 的文件对象）执行分块分析
+
+        返回 (analyzers, results, low_loss_data)，results 与 analyzers_config 一一对应，
+        元素为命中行 DataFrame（分析失败时为 None）；low_loss_data 至多 low_loss_limit 行。
+        """
+        self.original_columns = read_streaming_header(source)
+        self.analyzers = [
+            cfg["class"](original_columns=self.original_columns)
+            for cfg in self.analyzers_config
+        ]
+        parts = [[] for _ in self.analyzers]
+        failed = set()
+        low_loss = None
+        self.total_rows = 0
+        self.low_loss_total = 0
+
+        # 第一遍：逐行规则直接筛选；汇总类分析器累加统计量
+        for chunk in iter_ledger_chunks(source, self.original_columns, self.chunk_size):
+            self.total_rows += len(chunk)
+            for i, (analyzer, cfg) in enumerate(zip(self.analyzers, self.analyzers_config)):
+                if i in failed:
+                    continue
+                if analyzer.chunk_mode == "aggregate":
+                    analyzer.accumulate(chunk, **cfg["analyze_kwargs"])
+                    continue
+                if not analyzer.analyze(df=chunk, **cfg["analyze_kwargs"]):
+                    logger.error(f"{analyzer.__class__.__name__} 分块分析失败：{analyzer.get_logs()}")
+                    failed.add(i)
+                    continue
+                parts[i].append(analyzer.get_analyzed_data())
+                if isinstance(analyzer, LossDataAnalyzer):
+                    low_loss = self._keep_largest_losses(low_loss, analyzer.get_low_loss_data())
+            logger.info(f"分块分析进度：已处理 {self.total_rows} 行")
+
+        # 第二遍：汇总类分析器按合并后的条件筛选
+        aggregate = [
+            i for i, analyzer in enumerate(self.analyzers)
+            if analyzer.chunk_mode == "aggregate" and i not in failed
+        ]
+        if aggregate:
+            for i in aggregate:
+                self.analyzers[i].finalize(**self.analyzers_config[i]["analyze_kwargs"])
+            for chunk in iter_ledger_chunks(source, self.original_columns, self.chunk_size):
+                for i in aggregate:
+                    parts[i].append(self.analyzers[i].select(chunk))
+
+        results = [
+            None if i in failed else self._concat(parts[i])
+            for i in range(len(self.analyzers))
+        ]
+        for i, analyzer in enumerate(self.analyzers):
+            if analyzer.chunk_mode != "reduce" or i in failed:
+                continue
+            if analyzer.analyze(df=results[i], **self.analyzers_config[i]["analyze_kwargs"]):
+                results[i] = analyzer.get_analyzed_data()
+            else:
+                logger.error(f"{analyzer.__class__.__name__} 合并分析失败：{analyzer.get_logs()}")
+                results[i] = None
+        logger.info(f"分块分析完成，共 {self.total_rows} 行")
+        if self.low_loss_total > self.low_loss_limit:
+            logger.warning(f"低额亏损项目 {self.low_loss_total} 行，仅保留亏损金额最大的 {self.low_loss_limit} 行")
+        return self.analyzers, results, self._concat([low_loss])
+
+    def _keep_largest_losses(self, kept, part):
+        """并入本块的低额亏损行，只保留亏损金额最大的 low_loss_limit 行（保持台账顺序）"""
+        self.low_loss_total += len(part)
+        frame = part if kept is None else pd.concat([kept, part])
+        if len(frame) <= self.low_loss_limit:
+            return frame
+        loss, _ = parse_amounts(frame[find_column(list(frame.columns), "亏损金额")])
+        return frame.iloc[np.sort(top_positions(loss.to_numpy(), self.low_loss_limit))]
+
+    def _concat(self, frames):
+        frames = [f for f in frames if f is not None and len(f) > 0]
+        if not frames:
+            return pd.DataFrame(columns=self.original_columns)
+        return pd.concat(frames)
@@ -0,0 +1,82 @@
+"""
+命令行工具。
+
+用法：
+    python cli.py diff 上期台账.xlsx 本期台账.xlsx [--output 对比报告.json] [--summary-only]
+    python cli.py export 台账.xlsx --format parquet|csv|ndjson [--output 分析结果.zip]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from api import AnalysisAPI
+from diff_report import diff_results, summarize
+from result_exporter import EXPORT_FORMATS, export_results
+
+
+def _analysis_api(path):
+    api = AnalysisAPI()
+    api.load_file(path)
+    return api
+
+
+def _rule_frames(path):
+    return _analysis_api(path).analyze_rule_frames()
+
+
+def cmd_diff(args):
+    report = diff_results(_rule_frames(args.previous), _rule_frames(args.current))
+
+    print(f"{'规则':<24}{'上期':>8}{'本期':>8}{'新增':>8}{'解除':>8}{'变化':>8}")
+    for rule, counts in summarize(report).items():
+        print(f"{rule:<24}{counts['previous']:>8}{counts['current']:>8}"
+              f"{counts['new']:>8}{counts['resolved']:>8}{counts['changed']:>8}")
+
+    if args.output:
+        content = summarize(report) if args.summary_only else report
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False, indent=2, default=str)
+        print(f"对比报告已保存：{args.output}")
+    return 0
+
+
+def cmd_export(args):
+    frames = _analysis_api(args.ledger).result_frames()
+    suffix, _ = EXPORT_FORMATS[args.format]
+    output = args.output or f"{os.path.splitext(os.path.basename(args.ledger))[0]}_分析结果_{args.format}{suffix}"
+    export_results(frames, args.format, output)
+    for name, df in frames.items():
+        print(f"{name:<24}{len(df):>8} 行")
+    print(f"分析结果已导出：{output}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="项目台账分析命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    diff = subparsers.add_parser("diff", help="跨期对比两期台账的被标记项目")
+    diff.add_argument("previous", help="上期台账（xlsx / csv / parquet）")
+    diff.add_argument("current", help="本期台账（xlsx / csv / parquet）")
+    diff.add_argument("--output", help="对比报告 JSON 输出路径")
+    diff.add_argument("--summary-only", action="store_true", help="输出文件仅包含各规则计数")
+    diff.set_defaults(func=cmd_diff)
+
+    export = subparsers.add_parser("export", help="分析台账并导出各结果表")
+    export.add_argument("ledger", help="台账文件（xlsx / csv / parquet）")
+    export.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet", help="导出格式")
+    export.add_argument("--output", help="输出路径（默认 <台账名>_分析结果_<格式>.zip / .ndjson）")
+    export.set_defaults(func=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)  # 命令行下只输出告警与错误
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-from tkinter import messagebox
 import pandas as pd
 import json
 from pathlib import Path
@@ -6,6 +5,8 @@ from base_analyzer import BaseAnalyzer
 
 
 class ConstructionAnalyzer(BaseAnalyzer):
+    required_columns = ("项目类别", "亏损金额", "合同金额")
+
     def __init__(self, original_columns):
         super().__init__(original_columns)
         # 加载外部配置
@@ -36,13 +37,15 @@ class ConstructionAnalyzer(BaseAnalyzer):
             self._log(f"目标类别总数据量：{len(category_data)} 行")
             if len(category_data) == 0:
                 self._log("未找到属于目标类别的数据，分析终止")
-                messagebox.showinfo("提示", "未找到属于目标类别的数据", parent=parent)
+                self.analyzed_data = df.iloc[0:0][self.original_columns]
+                self.category_stats = {}
+                self._notify("showinfo", "提示", "未找到属于目标类别的数据", parent)
                 return True
 
             # 转换金额列为数值
             category_data = category_data.copy()
-            category_data["亏损金额_数值"] = pd.to_numeric(category_data[loss_col], errors="coerce")
-            category_data["合同金额_数值"] = pd.to_numeric(category_data[contract_col], errors="coerce")
+            category_data["亏损金额_数值"] = self._to_amount(category_data[loss_col])
+            category_data["合同金额_数值"] = self._to_amount(category_data[contract_col])
 
             # 筛选有效金额数据（合同金额>0）
             valid_amount_data = category_data[
@@ -73,12 +76,12 @@ class ConstructionAnalyzer(BaseAnalyzer):
         except ValueError as ve:
             err_msg = f"分析失败：{str(ve)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
         except Exception as e:
             err_msg = f"分析失败：{str(e)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
 
     def get_category_stats(self):
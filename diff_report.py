@@ -0,0 +1,140 @@
+"""
+跨期对比报告：比较两期台账（或两个分析会话）各规则的被标记项目，列出新增标记、已解除和内容变化的项目。
+
+每条被标记记录以稳定项目键（有项目编号时用项目编号，否则用项目名称）与整行内容哈希建立索引，
+两期之间按键做一次哈希连接，耗时与数据量成线性关系。序号等位置编号列随行的插入删除整体顺移，
+不计入内容哈希与变化字段。
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from excel_reader import find_column, match_columns
+
+KEY_COLUMNS = ("项目编号", "项目名称")
+POSITIONAL_COLUMNS = ("序号", "行号")  # 位置编号列：表示行在台账中的位置，不属于项目内容
+
+
+def project_key_column(columns):
+    """选择稳定项目键列：优先项目编号，其次项目名称"""
+    for col_name in KEY_COLUMNS:
+        col = find_column(list(columns), col_name)
+        if col is not None:
+            return col
+    return None
+
+
+def content_columns(columns):
+    """去除位置编号列后参与内容比较的列"""
+    positional = {col for name in POSITIONAL_COLUMNS for col in match_columns(tuple(columns), name)}
+    return [col for col in columns if col not in positional]
+
+
+def _normalized(df, columns):
+    """用于哈希与比较的规范化列：数值统一为 float64，其他转为字符串（缺失为 None），消除两期读取类型差异"""
+    result = {}
+    for i, col in enumerate(columns):
+        series = df.iloc[:, list(df.columns).index(col)]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            result[i] = series.astype("float64").to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            # 与 CSV 中的日期文本一致：整日日期不带时间部分
+            text = series.dt.strftime("%Y-%m-%d %H:%M:%S").str.replace(" 00:00:00", "", regex=False)
+            result[i] = text.astype(object).where(series.notna(), None).to_numpy()
+        else:
+            values = series.astype(object)
+            result[i] = values.where(values.notna(), None).map(lambda v: None if v is None else str(v)).to_numpy()
+    return pd.DataFrame(result, index=df.index)
+
+
+def build_index(df, key_col, columns):
+    """建立 {(项目键, 同键序号): (行位置, 内容哈希)} 索引；同一规则下重名项目按出现顺序区分"""
+    keys = df[key_col].astype(object).where(df[key_col].notna(), None).map(lambda v: None if v is None else str(v))
+    occurrence = keys.groupby(keys.fillna("")).cumcount().to_numpy()
+    hashes = pd.util.hash_pandas_object(_normalized(df, columns), index=False).to_numpy()
+    return {
+        (key, int(n)): (pos, int(h))
+        for pos, (key, n, h) in enumerate(zip(keys.tolist(), occurrence, hashes))
+    }
+
+
+def _records(df):
+    """转为可 JSON 序列化的记录（NaN→None，日期→字符串）"""
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, datetime):
+                record[key] = value.strftime("%Y-%m-%d %H:%M:%S")
+    return records
+
+
+def _changed_fields(before, after, columns):
+    """逐行列出内容不同的列名"""
+    left = _normalized(before, columns).to_numpy()
+    right = _normalized(after, columns).to_numpy()
+    differs = ~((left == right) | (pd.isna(left) & pd.isna(right)))
+    return [[columns[j] for j in np.flatnonzero(row)] for row in differs]
+
+
+def diff_rule(previous, current):
+    """对比同一规则两期的命中行，返回新增 / 解除 / 变化三类项目"""
+    columns = content_columns([c for c in dict.fromkeys(current.columns) if c in set(previous.columns)])
+    key_col = project_key_column(columns)
+    if key_col is None:
+        raise ValueError("两期结果中都找不到项目编号或项目名称列，无法对比")
+
+    prev_index = build_index(previous, key_col, columns)
+    curr_index = build_index(current, key_col, columns)
+
+    new_pos = [pos for key, (pos, _) in curr_index.items() if key not in prev_index]
+    resolved_pos = [pos for key, (pos, _) in prev_index.items() if key not in curr_index]
+    changed = [
+        (prev_index[key][0], pos)
+        for key, (pos, h) in curr_index.items()
+        if key in prev_index and prev_index[key][1] != h
+    ]
+
+    changed_items = []
+    if changed:
+        before = previous.iloc[[p for p, _ in changed]]
+        after = current.iloc[[c for _, c in changed]]
+        fields = _changed_fields(before, after, columns)
+        changed_items = [
+            {"key": b[key_col], "changed_fields": f, "before": b, "after": a}
+            for b, a, f in zip(_records(before), _records(after), fields)
+        ]
+
+    return {
+        "key_column": key_col,
+        "counts": {
+            "previous": len(previous),
+            "current": len(current),
+            "new": len(new_pos),
+            "resolved": len(resolved_pos),
+            "changed": len(changed_items),
+            "unchanged": len(curr_index) - len(new_pos) - len(changed_items),
+        },
+        "new": _records(current.iloc[new_pos]),
+        "resolved": _records(previous.iloc[resolved_pos]),
+        "changed": changed_items,
+    }
+
+
+def diff_results(previous_frames, current_frames):
+    """对比两期各规则结果（{规则名: 命中行 DataFrame}），某期缺失的规则按无命中处理"""
+    report = {}
+    for rule in dict.fromkeys([*previous_frames, *current_frames]):
+        previous = previous_frames.get(rule)
+        current = current_frames.get(rule)
+        if previous is None:
+            previous = current.iloc[0:0]
+        if current is None:
+            current = previous.iloc[0:0]
+        report[rule] = diff_rule(previous, current)
+    return report
+
+
+def summarize(report):
+    """各规则的计数汇总"""
+    return {rule: item["counts"] for rule, item in report.items()}
@@ -0,0 +1,398 @@
+import hashlib
+import os
+from functools import lru_cache
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.worksheet.cell_range import CellRange
+
+from header_templates import HeaderTemplateCache
+
+HEADER_ROWS = (3, 4, 5)  # 三级表头所在行
+DATA_START_ROW = 6  # 数据起始行
+LAYOUT_KEY_COLUMN = "项目名称"  # 识别台账工作表时表头须包含的列
+CATEGORICAL_COLUMNS = ("项目类别", "项目负责人")  # 以分类类型存储的低基数列
+CHUNK_SIZE = 50000  # 分块读取时每块行数
+PROGRESS_ROWS = 5000  # 读取数据行时每隔多少行报告一次进度
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+XLSX_ENGINES = ("openpyxl", "fast")  # fast：xlsx_fast_reader 多进程解析
+XLSX_ENGINE = os.environ.get("ANALYSIS_XLSX_ENGINE", "openpyxl")
+
+header_templates = HeaderTemplateCache()
+
+
+def _header_grid(sheet, max_col):
+    """读取表头区域（1-5行）的单元格值，合并区域左上角可能位于第3行以上"""
+    grid = []
+    for row in sheet.iter_rows(min_row=1, max_row=HEADER_ROWS[-1], max_col=max_col, values_only=True):
+        grid.append(list(row) + [None] * (max_col - len(row)))
+    return grid
+
+
+def header_fingerprint(grid, header_ranges, max_col):
+    """表头指纹：3-5 行原始取值、覆盖表头的合并区域布局及其左上角取值（标题行等其他单元格不参与）"""
+    def cell(row, col):
+        return grid[row - 1][col - 1] if row <= len(grid) else None
+
+    layout = sorted((r.min_row, r.min_col, r.max_row, r.max_col) for r in header_ranges)
+    digest = hashlib.sha1(repr((max_col, layout, [cell(r[0], r[1]) for r in layout])).encode("utf-8"))
+    for row_idx in HEADER_ROWS:
+        digest.update(repr(grid[row_idx - 1] if row_idx <= len(grid) else None).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def resolve_header_columns(grid, merged_ranges, max_col):
+    """根据表头单元格值与合并区域解析三级表头（3-5行），返回拼接后的列名列表；相同表头模板复用缓存结果"""
+    header_ranges = [
+        r for r in merged_ranges
+        if r.min_row <= HEADER_ROWS[-1] and r.max_row >= HEADER_ROWS[0]
+    ]
+    fingerprint = header_fingerprint(grid, header_ranges, max_col)
+    cached = header_templates.get(fingerprint)
+    if cached is not None:
+        return cached
+
+    def merged_value(row, col):
+        """获取指定行列的单元格值（处理合并单元格）"""
+        for merged_range in header_ranges:
+            if merged_range.min_row <= row <= merged_range.max_row and merged_range.min_col <= col <= merged_range.max_col:
+                row, col = merged_range.min_row, merged_range.min_col
+                break
+        if row > len(grid):
+            return None
+        return grid[row - 1][col - 1]
+
+    original_columns = []
+    for col_idx in range(1, max_col + 1):
+        # 去重处理
+        parts = []
+        seen = set()
+        for row_idx in HEADER_ROWS:
+            p = merged_value(row_idx, col_idx)
+            if p is not None:
+                p_str = str(p)
+                if p_str not in seen:
+                    seen.add(p_str)
+                    parts.append(p_str)
+
+        col_name = "_".join(parts) if parts else f"未知列_{col_idx}"
+        original_columns.append(col_name)
+    header_templates.put(fingerprint, original_columns)
+    return original_columns
+
+
+def parse_header_columns(sheet):
+    """解析三级表头（3-5行），返回拼接后的列名列表"""
+    max_col = sheet.max_column
+    return resolve_header_columns(_header_grid(sheet, max_col), sheet.merged_cells.ranges, max_col)
+
+
+def read_merged_ranges(sheet):
+    """流式扫描只读工作表的 XML，收集合并区域（只读模式下 openpyxl 不提供 merged_cells）"""
+    ranges = []
+    sheet_data = None
+    with sheet._get_source() as src:
+        for event, elem in iterparse(src, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{SHEET_NS}sheetData":
+                    sheet_data = elem
+                continue
+            if elem.tag == f"{SHEET_NS}row" and sheet_data is not None:
+                sheet_data.remove(elem)  # 及时释放已扫描的行，保持内存恒定
+            elif elem.tag == f"{SHEET_NS}mergeCell":
+                ranges.append(CellRange(elem.get("ref")))
+    return ranges
+
+
+def _clean_name(name):
+    return str(name).strip().replace(" ", "").replace("　", "")
+
+
+@lru_cache(maxsize=1024)
+def match_columns(columns, col_name):
+    """在列名元组中查找与 col_name 匹配的全部列（去除空格后相等或以“_列名”结尾）；
+    同一模板的列名元组相同，列绑定结果按 (列名元组, 目标列) 缓存"""
+    target_clean = _clean_name(col_name)
+    return tuple(
+        col for col in columns
+        if _clean_name(col) == target_clean or _clean_name(col).endswith(f"_{target_clean}")
+    )
+
+
+def find_column(columns, col_name):
+    """按 BaseAnalyzer._find_col 的规则在列名列表中查找唯一匹配列，未找到或不唯一时返回 None"""
+    matches = match_columns(tuple(columns), col_name)
+    return matches[0] if len(matches) == 1 else None
+
+
+def _is_categorical_column(col_name):
+    """列名是否对应分类列（与 BaseAnalyzer._find_col 的匹配规则一致）"""
+    col_clean = _clean_name(col_name)
+    for target in CATEGORICAL_COLUMNS:
+        if col_clean == target or col_clean.endswith(f"_{target}"):
+            return True
+    return False
+
+
+def _compact_string_dtype():
+    """pyarrow 存储、NaN 缺失语义的字符串类型；不可用时返回 None（保持 object）"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)  # pandas >= 2.3
+    except TypeError:
+        pass
+    try:
+        return pd.StringDtype("pyarrow_numpy")  # pandas 2.1 - 2.2
+    except (TypeError, ValueError):
+        return None
+
+
+STRING_DTYPE = _compact_string_dtype()
+
+
+def build_typed_column(values, col_name):
+    """根据单元格取值推断并构造类型化列：数值→float64/int64，分类列→category，文本→紧凑字符串"""
+    inferred = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred == "empty":
+        return np.array(values, dtype=object)
+    has_missing = any(v is None for v in values)
+    if _is_categorical_column(col_name):
+        return pd.Categorical(values)
+    if inferred == "integer" and not has_missing:
+        return np.array(values, dtype=np.int64)
+    if inferred in ("integer", "floating", "mixed-integer-float"):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    if inferred == "datetime" and not has_missing:
+        return pd.to_datetime(pd.Series(values)).to_numpy()
+    if inferred == "string" and STRING_DTYPE is not None:
+        return pd.array(values, dtype=STRING_DTYPE)
+    return np.array(values, dtype=object)
+
+
+def build_typed_frame(columns, original_columns):
+    """由按列存放的取值列表逐列构造类型化 DataFrame（构造后立即释放原始列表）"""
+    data = {}
+    for idx in range(len(original_columns)):
+        data[idx] = build_typed_column(columns[idx], original_columns[idx])
+        columns[idx] = None
+    df = pd.DataFrame(data, copy=False)
+    df.columns = list(original_columns)  # 允许重名列
+    return df
+
+
+def read_data_frame(sheet, original_columns, progress=None):
+    """按列读取数据行（从第6行开始，遇到首列为空的行即停止），返回类型化 DataFrame
+
+    progress(event, **data) 为进度回调：每读取 PROGRESS_ROWS 行报告一次 rows_loaded。
+    """
+    n_cols = len(original_columns)
+    columns = [[] for _ in range(n_cols)]
+    appenders = [col.append for col in columns]
+    for n_rows, row in enumerate(sheet.iter_rows(min_row=DATA_START_ROW, values_only=True)):
+        row_data = row[:n_cols]
+        if row_data and row_data[0] is None:
+            break
+        if progress is not None and n_rows and n_rows % PROGRESS_ROWS == 0:
+            progress("rows_loaded", rows=n_rows, done=False)
+        for append, value in zip(appenders, row_data):
+            append(value)
+        for append in appenders[len(row_data):]:
+            append(None)
+    return build_typed_frame(columns, original_columns)
+
+
+def report_loaded(progress, original_columns, df):
+    """读取完成后报告表头与行数（无逐行进度的读取方式使用）"""
+    if progress is not None:
+        progress("header_parsed", columns=len(original_columns))
+        progress("rows_loaded", rows=len(df), done=True)
+
+
+def load_ledger(source, engine=None, progress=None):
+    """读取台账工作簿（路径或文件对象），返回 (原始列名, DataFrame)；engine 缺省取 ANALYSIS_XLSX_ENGINE，
+    progress(event, **data) 为进度回调（header_parsed / rows_loaded）"""
+    engine = engine or XLSX_ENGINE
+    if engine not in XLSX_ENGINES:
+        raise ValueError(f"不支持的 xlsx 读取引擎：{engine}（可选 {', '.join(XLSX_ENGINES)}）")
+    if engine == "fast":
+        from xlsx_fast_reader import load_ledger_fast  # 避免循环导入
+        original_columns, df = load_ledger_fast(source)
+        report_loaded(progress, original_columns, df)
+        return original_columns, df
+    _rewind(source)
+    wb = load_workbook(source, data_only=True)
+    sheet = wb.active
+    original_columns = parse_header_columns(sheet)
+    if progress is not None:
+        progress("header_parsed", columns=len(original_columns))
+    df = read_data_frame(sheet, original_columns, progress=progress)
+    if progress is not None:
+        progress("rows_loaded", rows=len(df), done=True)
+    return original_columns, df
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _read_only_header(sheet):
+    """解析只读工作表的三级表头"""
+    merged_ranges = read_merged_ranges(sheet)
+    max_col = sheet.max_column
+    if max_col is None:  # 缺少 dimension 信息时以表头行宽度为准
+        max_col = max((len(row) for row in sheet.iter_rows(min_row=1, max_row=HEADER_ROWS[-1])), default=0)
+    return resolve_header_columns(_header_grid(sheet, max_col), merged_ranges, max_col)
+
+
+def read_streaming_header(source):
+    """以只读流式模式解析表头，返回原始列名（不加载数据行）"""
+    _rewind(source)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        return _read_only_header(wb.active)
+    finally:
+        wb.close()
+
+
+def is_ledger_sheet(sheet):
+    """工作表是否符合台账版式：3-5 行表头中含“项目名称”，且第 6 行起有数据"""
+    rows = list(sheet.iter_rows(min_row=1, max_row=DATA_START_ROW, values_only=True))
+    header_cells = [value for row in rows[HEADER_ROWS[0] - 1:HEADER_ROWS[-1]] for value in row]
+    has_key = any(value is not None and _clean_name(value) == LAYOUT_KEY_COLUMN for value in header_cells)
+    has_data = len(rows) >= DATA_START_ROW and len(rows[DATA_START_ROW - 1]) > 0 and rows[DATA_START_ROW - 1][0] is not None
+    return has_key and has_data
+
+
+def ledger_sheet_names(source):
+    """列出工作簿中符合台账版式的工作表，返回 (台账工作表名列表, 跳过的工作表名列表)"""
+    _rewind(source)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        matched, skipped = [], []
+        for sheet in wb.worksheets:
+            (matched if is_ledger_sheet(sheet) else skipped).append(sheet.title)
+        return matched, skipped
+    finally:
+        wb.close()
+
+
+def load_ledger_sheet(source, sheet_name):
+    """以只读模式读取指定工作表（不解析其他工作表），返回 (原始列名, DataFrame)"""
+    _rewind(source)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = wb[sheet_name]
+        original_columns = _read_only_header(sheet)
+        return original_columns, read_data_frame(sheet, original_columns)
+    finally:
+        wb.close()
+
+
+def iter_ledger_chunks(source, original_columns, chunk_size=CHUNK_SIZE):
+    """以只读流式模式按块读取数据行，逐块产出类型化 DataFrame（行索引全表连续）"""
+    _rewind(source)
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = wb.active
+        n_cols = len(original_columns)
+        start = 0
+        columns = [[] for _ in range(n_cols)]
+        for row in sheet.iter_rows(min_row=DATA_START_ROW, max_col=n_cols, values_only=True):
+            row_data = row[:n_cols]
+            if row_data and row_data[0] is None:
+                break
+            for col, value in zip(columns, row_data):
+                col.append(value)
+            for col in columns[len(row_data):]:
+                col.append(None)
+            if len(columns[0]) >= chunk_size:
+                chunk = build_typed_frame(columns, original_columns)
+                chunk.index = pd.RangeIndex(start, start + len(chunk))
+                start += len(chunk)
+                yield chunk
+                columns = [[] for _ in range(n_cols)]
+        if columns and columns[0]:
+            chunk = build_typed_frame(columns, original_columns)
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            yield chunk
+    finally:
+        wb.close()
+
+
+CSV_ENCODINGS = ("utf-8-sig", "gb18030")
+
+
+def ledger_format(filename):
+    """根据文件扩展名判断台账格式：xlsx / csv / parquet"""
+    suffix = os.path.splitext(str(filename or ""))[1].lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    if suffix == ".xls":
+        raise ValueError("不支持旧版 .xls 格式，请另存为 .xlsx 后再上传")
+    return "xlsx"
+
+
+def retype_frame(df):
+    """对向量化读取的 DataFrame 应用与 Excel 导入一致的列类型（分类列、紧凑字符串）"""
+    for idx, col_name in enumerate(df.columns):
+        col = df.iloc[:, idx]
+        if _is_categorical_column(col_name):
+            df.isetitem(idx, col.astype("category"))
+        elif (col.dtype == object and STRING_DTYPE is not None
+              and pd.api.types.infer_dtype(col, skipna=True) == "string"):
+            df.isetitem(idx, col.astype(STRING_DTYPE))
+    return df
+
+
+def _truncate_at_empty_first_column(df):
+    """与 Excel 读取规则一致：遇到首列为空的行即停止"""
+    if df.empty:
+        return df
+    empty = df.iloc[:, 0].isna().to_numpy()
+    if empty.any():
+        df = df.iloc[:empty.argmax()]
+    return df
+
+
+def load_csv(source):
+    """读取 CSV 台账：首行为以“_”拼接的三级表头列名（如 项目主要成本情况_劳务费_结算）"""
+    engine = "pyarrow" if STRING_DTYPE is not None else "c"
+    last_error = None
+    for encoding in CSV_ENCODINGS:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        try:
+            df = pd.read_csv(source, encoding=encoding, engine=engine)
+            break
+        except UnicodeDecodeError as e:
+            last_error = e
+    else:
+        raise ValueError(f"CSV 编码无法识别（已尝试 {', '.join(CSV_ENCODINGS)}）：{last_error}")
+    df = _truncate_at_empty_first_column(df).reset_index(drop=True)
+    return [str(c) for c in df.columns], retype_frame(df)
+
+
+def load_parquet(source):
+    """读取 Parquet 台账：列名为以“_”拼接的三级表头列名"""
+    _rewind(source)
+    df = pd.read_parquet(source)
+    df = _truncate_at_empty_first_column(df).reset_index(drop=True)
+    return [str(c) for c in df.columns], retype_frame(df)
+
+
+def load_ledger_file(source, filename=None, engine=None, progress=None):
+    """按文件格式读取台账，返回 (原始列名, DataFrame)；filename 缺省时取 source 本身，engine 仅对 xlsx 生效"""
+    fmt = ledger_format(filename if filename is not None else source)
+    if fmt == "xlsx":
+        return load_ledger(source, engine=engine, progress=progress)
+    original_columns, df = load_csv(source) if fmt == "csv" else load_parquet(source)
+    report_loaded(progress, original_columns, df)
+    return original_columns, df
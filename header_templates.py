@@ -0,0 +1,69 @@
+"""
+表头模板缓存：各单位每月按同一模板上传台账，表头区域的取值与合并布局不变。按表头指纹缓存解析后的列名，
+相同模板直接复用，不再逐列解析合并单元格。
+
+出现新指纹时记录日志，并与最近使用的模板对比新增 / 缺少的列，便于及时发现模板变更。
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_TEMPLATES = int(os.environ.get("ANALYSIS_HEADER_TEMPLATES", "64"))
+
+
+class HeaderTemplateCache:
+    """表头指纹 → 原始列名（按最近使用淘汰）"""
+
+    def __init__(self, max_templates=MAX_TEMPLATES):
+        self.max_templates = max_templates
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+        self._last = None  # 最近使用的模板指纹
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint):
+        """返回模板的原始列名（副本），未缓存时返回 None"""
+        with self._lock:
+            columns = self._templates.get(fingerprint)
+            if columns is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._templates.move_to_end(fingerprint)
+            self._last = fingerprint
+            return list(columns)
+
+    def put(self, fingerprint, original_columns):
+        with self._lock:
+            previous = self._last
+            previous_columns = self._templates.get(previous) if previous else None
+            self._templates[fingerprint] = tuple(original_columns)
+            self._templates.move_to_end(fingerprint)
+            self._last = fingerprint
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        self._log_change(fingerprint, original_columns, previous, previous_columns)
+
+    @staticmethod
+    def _log_change(fingerprint, original_columns, previous, previous_columns):
+        if previous_columns is None:
+            logger.info(f"新表头模板 {fingerprint[:12]}：{len(original_columns)} 列")
+            return
+        previous_set, current_set = set(previous_columns), set(original_columns)
+        added = [c for c in original_columns if c not in previous_set]
+        missing = [c for c in previous_columns if c not in current_set]
+        if not added and not missing:
+            logger.info(f"表头模板变更：{previous[:12]} → {fingerprint[:12]}（列名不变，表头布局或列顺序不同）")
+            return
+        logger.warning(
+            f"表头模板变更：{previous[:12]} → {fingerprint[:12]}，"
+            f"新增列：{', '.join(added) or '无'}；缺少列：{', '.join(missing) or '无'}"
+        )
+
+    def stats(self):
+        with self._lock:
+            return {"templates": len(self._templates), "hits": self.hits, "misses": self.misses}
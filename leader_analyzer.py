@@ -1,62 +1,101 @@
-from tkinter import messagebox
 from base_analyzer import BaseAnalyzer
 
 class LeaderFrequencyAnalyzer(BaseAnalyzer):
+    chunk_mode = "aggregate"  # 负责人次数需全表汇总
+    required_columns = ("项目负责人",)
+
     def __init__(self, original_columns):
         super().__init__(original_columns)
         self.leader_stats = None  # 负责人出现次数统计
+        self.qualified_leaders = set()  # 达到次数阈值的负责人
+        self._chunk_counts = {}  # 分块模式下的累计次数
 
     def analyze(self, df, min_count=3, parent=None,** kwargs):
         try:
             self.logs.clear()
             self._log("开始执行项目负责人频次分析...")
 
-            # 定位项目负责人列
-            leader_col = self._find_col(df, "项目负责人")
+            leader_col, df_clean = self._clean_leaders(df)
             self._log(f"匹配项目负责人列：{leader_col}")
-
-            # 清理负责人名称
-            df_clean = df.copy()
-            df_clean[leader_col] = df_clean[leader_col].astype(str).str.strip()
-            df_clean = df_clean[
-                (df_clean[leader_col] != "") &
-                (df_clean[leader_col].str.lower() != "nan")
-            ]
             clean_rows = len(df_clean)
             self._log(f"清理后有效数据：{clean_rows} 行（排除空值/无效负责人）")
 
             # 统计负责人出现次数
-            self.leader_stats = df_clean[leader_col].value_counts().to_dict()
-            qualified_leaders = [
-                leader for leader, count in self.leader_stats.items()
-                if count >= min_count
-            ]
-            self._log(
-                f"负责人总数：{len(self.leader_stats)} 人\n"
-                f"出现≥{min_count}次的负责人：{len(qualified_leaders)} 人"
-            )
-            if qualified_leaders:
-                self._log(
-                    f"高频负责人列表（次数）：\n" +
-                    "\n".join([f"- {l}: {self.leader_stats[l]}次" for l in qualified_leaders])
-                )
-            else:
-                self._log(f"无出现≥{min_count}次的负责人")
+            self._qualify(df_clean[leader_col].value_counts().to_dict(), min_count)
 
             # 提取高频负责人的所有项目数据
-            self.analyzed_data = df_clean[df_clean[leader_col].isin(qualified_leaders)][self.original_columns]
+            self.analyzed_data = df_clean[df_clean[leader_col].isin(self.qualified_leaders)][self.original_columns]
             return True
 
         except ValueError as ve:
             err_msg = f"分析失败：{str(ve)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
         except Exception as e:
             err_msg = f"分析失败：{str(e)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
 
+    def accumulate(self, df, **kwargs):
+        """分块模式第一遍：累加本块各负责人的出现次数"""
+        leader_col, df_clean = self._clean_leaders(df)
+        for leader, count in df_clean[leader_col].value_counts().items():
+            self._chunk_counts[leader] = self._chunk_counts.get(leader, 0) + int(count)
+
+    def finalize(self, min_count=3, **kwargs):
+        """分块模式：按全表累计次数确定高频负责人"""
+        self.logs.clear()
+        self._log("开始执行项目负责人频次分析（分块汇总）...")
+        counts = dict(sorted(self._chunk_counts.items(), key=lambda item: item[1], reverse=True))
+        self._chunk_counts = {}
+        self._qualify(counts, min_count)
+
+    def select(self, df):
+        """分块模式第二遍：提取本块中高频负责人的项目数据"""
+        leader_col, df_clean = self._clean_leaders(df)
+        return df_clean[df_clean[leader_col].isin(self.qualified_leaders)][self.original_columns]
+
+    def _clean_leaders(self, df):
+        """定位并清理负责人列，排除空值/无效负责人"""
+        # 定位项目负责人列
+        leader_col = self._find_col(df, "项目负责人")
+
+        # 清理负责人名称
+        df_clean = df.copy()
+        df_clean[leader_col] = df_clean[leader_col].astype(str).str.strip()
+        df_clean = df_clean[
+            (df_clean[leader_col] != "") &
+            (df_clean[leader_col].str.lower() != "nan")
+        ]
+        return leader_col, df_clean
+
+    def _qualify(self, leader_stats, min_count):
+        """记录次数统计并筛选出现≥min_count次的负责人"""
+        self.leader_stats = leader_stats
+        qualified_leaders = [
+            leader for leader, count in self.leader_stats.items()
+            if count >= min_count
+        ]
+        self.qualified_leaders = set(qualified_leaders)
+        self._log(
+            f"负责人总数：{len(self.leader_stats)} 人\n"
+            f"出现≥{min_count}次的负责人：{len(qualified_leaders)} 人"
+        )
+        if qualified_leaders:
+            self._log(
+                f"高频负责人列表（次数）：\n" +
+                "\n".join([f"- {l}: {self.leader_stats[l]}次" for l in qualified_leaders])
+            )
+        else:
+            self._log(f"无出现≥{min_count}次的负责人")
+
     def get_leader_stats(self):
-        return self.leader_stats
\ No newline at end of file
+        return self.leader_stats
+
+    def get_leader_projects(self, df, project_col_name="项目名称"):
+        """返回 {负责人: [项目名称, ...]}（清理规则与次数统计一致，供跨期持久化）"""
+        leader_col, df_clean = self._clean_leaders(df)
+        project_col = self._find_col(df_clean, project_col_name)
+        return df_clean.groupby(leader_col)[project_col].agg(list).to_dict()
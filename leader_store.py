@@ -0,0 +1,115 @@
+"""
+负责人统计跨期存储：按报告期持久化 LeaderFrequencyAnalyzer 的负责人项目数及项目清单
+（本地 SQLite，按负责人建索引），跨期频次查询直接基于预聚合数据，无需重新解析历史台账。
+
+报告期为可按字典序排序的字符串，建议使用 2025Q3 或 2025-09 这类格式。
+"""
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+DB_PATH = os.environ.get("ANALYSIS_DB_PATH", os.path.join("output", "analysis.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leader_periods (
+    period TEXT PRIMARY KEY,
+    saved_at TEXT NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS leader_period_counts (
+    period TEXT NOT NULL,
+    leader TEXT NOT NULL,
+    project_count INTEGER NOT NULL,
+    PRIMARY KEY (period, leader)
+);
+CREATE INDEX IF NOT EXISTS idx_leader_period_counts_leader ON leader_period_counts (leader, period);
+CREATE TABLE IF NOT EXISTS leader_projects (
+    period TEXT NOT NULL,
+    leader TEXT NOT NULL,
+    project_name TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_leader_projects_leader ON leader_projects (leader, period);
+"""
+
+
+def connect(db_path=DB_PATH):
+    """打开 SQLite 连接（WAL 模式，允许多个工作进程并发读写）"""
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class LeaderStatsStore:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        with closing(connect(self.db_path)) as conn:
+            conn.executescript(SCHEMA)
+
+    def save_period(self, period, leader_stats, leader_projects=None, source=None):
+        """保存（覆盖）一个报告期的负责人项目数；leader_projects 为 {负责人: [项目名称]}"""
+        period = str(period).strip()
+        if not period:
+            raise ValueError("报告期不能为空")
+        with closing(connect(self.db_path)) as conn, conn:
+            conn.execute("DELETE FROM leader_period_counts WHERE period = ?", (period,))
+            conn.execute("DELETE FROM leader_projects WHERE period = ?", (period,))
+            conn.execute(
+                "INSERT OR REPLACE INTO leader_periods (period, saved_at, source) VALUES (?, ?, ?)",
+                (period, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), source),
+            )
+            conn.executemany(
+                "INSERT INTO leader_period_counts (period, leader, project_count) VALUES (?, ?, ?)",
+                ((period, str(leader), int(count)) for leader, count in leader_stats.items()),
+            )
+            if leader_projects:
+                conn.executemany(
+                    "INSERT INTO leader_projects (period, leader, project_name) VALUES (?, ?, ?)",
+                    (
+                        (period, str(leader), None if name is None else str(name))
+                        for leader, names in leader_projects.items()
+                        for name in names
+                    ),
+                )
+        return len(leader_stats)
+
+    def list_periods(self):
+        """按时间倒序列出已保存的报告期"""
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute("SELECT period, saved_at, source FROM leader_periods ORDER BY period DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def frequent_leaders(self, min_count=3, last_periods=None):
+        """查询最近 last_periods 个报告期内累计项目数≥min_count 的负责人（None 表示全部报告期）"""
+        sql = """
+            SELECT c.leader, SUM(c.project_count) AS project_count, COUNT(*) AS period_count
+            FROM leader_period_counts c
+            WHERE c.period IN (SELECT period FROM leader_periods ORDER BY period DESC LIMIT ?)
+            GROUP BY c.leader
+            HAVING SUM(c.project_count) >= ?
+            ORDER BY project_count DESC, c.leader
+        """
+        limit = -1 if last_periods is None else int(last_periods)
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute(sql, (limit, int(min_count))).fetchall()
+        return [dict(row) for row in rows]
+
+    def leader_history(self, leader, with_projects=True):
+        """查询某负责人各报告期的项目数（及项目清单）"""
+        with closing(connect(self.db_path)) as conn:
+            counts = conn.execute(
+                "SELECT period, project_count FROM leader_period_counts WHERE leader = ? ORDER BY period DESC",
+                (leader,),
+            ).fetchall()
+            history = [{"period": row["period"], "project_count": row["project_count"], "projects": []}
+                       for row in counts]
+            if with_projects and history:
+                by_period = {item["period"]: item for item in history}
+                for row in conn.execute(
+                    "SELECT period, project_name FROM leader_projects WHERE leader = ?", (leader,)
+                ):
+                    if row["period"] in by_period:
+                        by_period[row["period"]]["projects"].append(row["project_name"])
+        return history
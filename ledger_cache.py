@@ -0,0 +1,186 @@
+"""
+已解析台账的持久化列式缓存：以文件内容哈希为键，将类型化 DataFrame 与 original_columns
+写为 Arrow IPC 文件；命中时通过内存映射加载。缓存目录可被多个工作进程共享，
+写入采用临时文件 + 原子替换，目录总大小超过上限时按最近使用时间淘汰。
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pyarrow 为可选依赖，缺失时缓存自动停用
+    pa = None
+    ipc = None
+
+from excel_reader import STRING_DTYPE
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR", os.path.join("output", "ledger_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+CACHE_FORMAT_VERSION = "1"  # 解析逻辑变化时递增，使旧缓存失效
+CACHE_SUFFIX = ".arrow"
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_key(source, chunk_size=HASH_CHUNK_SIZE):
+    """计算已写好的文件（路径或可 seek 的文件对象）的缓存键
+
+    按块顺序读取整个文件计算哈希：不把文件整体读入内存，但相对解析多一次完整读取。
+    文件对象读完后回到开头。
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    source.seek(0)
+    for block in iter(lambda: source.read(chunk_size), b""):
+        digest.update(block)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+class LedgerCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = pa is not None and max_bytes > 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"v{CACHE_FORMAT_VERSION}_{key}{CACHE_SUFFIX}")
+
+    def _read_table(self, key):
+        """内存映射读取缓存表，返回 (表, 元数据)，未命中返回 None"""
+        if not self.enabled or not key:
+            return None
+        path = self._path(key)
+        try:
+            with pa.memory_map(path, "r") as source:
+                table = ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            return None
+        except (OSError, pa.ArrowException) as e:
+            logger.warning(f"台账缓存读取失败，忽略缓存：{path}（{e}）")
+            return None
+        with contextlib.suppress(FileNotFoundError):  # 读取后可能已被其他进程淘汰，不影响本次命中
+            os.utime(path)  # 记录最近使用时间，供淘汰策略使用
+        return table, json.loads(table.schema.metadata[b"ledger_meta"].decode("utf-8"))
+
+    def header(self, key):
+        """只读取缓存的列名元数据（不加载数据），未命中返回 None"""
+        if not self.enabled or not key:
+            return None
+        try:
+            with pa.memory_map(self._path(key), "r") as source:
+                metadata = ipc.open_file(source).schema.metadata
+        except (OSError, pa.ArrowException):
+            return None
+        return json.loads(metadata[b"ledger_meta"].decode("utf-8"))["original_columns"]
+
+    def get(self, key, column_positions=None):
+        """读取缓存，命中返回 (original_columns, DataFrame)，未命中返回 None
+
+        column_positions 给定时只转换这些列（列裁剪读取），original_columns 仍为全部列名。
+        """
+        cached = self._read_table(key)
+        if cached is None:
+            return None
+        table, meta = cached
+        original_columns = meta["original_columns"]
+        if column_positions is not None:
+            table = table.select(list(column_positions))
+        df = table.to_pandas(types_mapper=self._types_mapper)
+        df.columns = (
+            original_columns if column_positions is None
+            else [original_columns[i] for i in column_positions]
+        )
+        logger.info(f"台账缓存命中：{key[:12]}，共 {len(df)} 行、读取 {df.shape[1]} 列")
+        return original_columns, df
+
+    def take_rows(self, key, row_positions):
+        """按行位置读取完整列的数据（用于列裁剪分析后回填命中行），行索引为行位置"""
+        cached = self._read_table(key)
+        if cached is None:
+            return None
+        table, meta = cached
+        positions = pa.array(row_positions, type=pa.int64())
+        df = table.take(positions).to_pandas(types_mapper=self._types_mapper)
+        df.columns = meta["original_columns"]
+        df.index = pd.Index(row_positions)
+        return df
+
+    def put(self, key, original_columns, df, **header_meta):
+        """写入缓存；存在无法转换为 Arrow 的混合类型列时跳过缓存"""
+        if not self.enabled or not key:
+            return False
+        frame = df.copy(deep=False)
+        frame.columns = [f"c{i}" for i in range(len(original_columns))]  # 允许原始列名重复
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.info(f"台账包含混合类型列，跳过缓存：{e}")
+            return False
+
+        meta = {
+            "original_columns": list(original_columns),
+            "rows": len(df),
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **header_meta,
+        }
+        table = table.replace_schema_metadata({b"ledger_meta": json.dumps(meta, ensure_ascii=False).encode("utf-8")})
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"台账缓存写入失败：{e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """缓存目录超过大小上限时，按最近使用时间从旧到新删除"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # 其他进程已删除
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                logger.info(f"淘汰台账缓存：{os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @staticmethod
+    def _types_mapper(arrow_type):
+        if STRING_DTYPE is not None and arrow_type in (pa.string(), pa.large_string()):
+            return STRING_DTYPE
+        return None
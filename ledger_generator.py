@@ -0,0 +1,150 @@
+"""
+合成台账生成器：按本项目的台账版式（1-2行标题、3-5行三级合并表头、第6行起数据）
+生成指定行数的 Excel 工作簿，供基准测试与压测使用。
+
+用法：python ledger_generator.py --rows 1000 10000 --output-dir bench_data
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+CONFIG_PATH = Path(__file__).parent / "config/categories.json"
+
+# 单层表头列（3-5行纵向合并）
+LEADING_COLUMNS = ["序号", "项目名称", "项目编号", "项目类别", "项目负责人",
+                   "合同金额", "项目结算金额", "亏损金额"]
+TRAILING_COLUMNS = ["开工日期", "备注"]
+# 项目主要成本情况（第3行横向合并，第4行按成本类型合并，第5行为 预算/结算）
+COST_GROUP = "项目主要成本情况"
+COST_TYPES = ["劳务费", "材料费", "设备机械租赁费", "技术服务、咨询费", "专业分包"]
+COST_STAGES = ["预算", "结算"]
+
+SURNAMES = "王李张刘陈杨赵黄周吴徐孙胡朱高林何郭马罗"
+GIVEN_NAMES = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂"
+
+
+def ledger_column_names():
+    """返回生成台账解析后的列名（与 excel_reader.parse_header_columns 结果一致）"""
+    cost_columns = [f"{COST_GROUP}_{t}_{s}" for t in COST_TYPES for s in COST_STAGES]
+    return LEADING_COLUMNS + cost_columns + TRAILING_COLUMNS
+
+
+def _header_rows():
+    """构造3-5行表头内容及合并区域"""
+    n_lead = len(LEADING_COLUMNS)
+    n_cost = len(COST_TYPES) * len(COST_STAGES)
+    n_cols = n_lead + n_cost + len(TRAILING_COLUMNS)
+    row3 = [None] * n_cols
+    row4 = [None] * n_cols
+    row5 = [None] * n_cols
+    merges = []
+
+    for i, name in enumerate(LEADING_COLUMNS + TRAILING_COLUMNS):
+        col = i if i < n_lead else i + n_cost
+        row3[col] = name
+        merges.append((3, col + 1, 5, col + 1))
+
+    row3[n_lead] = COST_GROUP
+    merges.append((3, n_lead + 1, 3, n_lead + n_cost))
+    for t_idx, cost_type in enumerate(COST_TYPES):
+        start = n_lead + t_idx * len(COST_STAGES)
+        row4[start] = cost_type
+        merges.append((4, start + 1, 4, start + len(COST_STAGES)))
+        for s_idx, stage in enumerate(COST_STAGES):
+            row5[start + s_idx] = stage
+    return n_cols, [row3, row4, row5], merges
+
+
+def _leader_pool(n_rows, rng):
+    """负责人名单：规模随行数增长，保证部分负责人有≥3个项目"""
+    base = [s + g for s in SURNAMES for g in GIVEN_NAMES]
+    base += [s + g1 + g2 for s in SURNAMES for g1 in GIVEN_NAMES for g2 in GIVEN_NAMES]
+    rng.shuffle(base)
+    size = max(5, n_rows // 2)
+    return [base[i % len(base)] + (str(i // len(base)) if i >= len(base) else "") for i in range(size)]
+
+
+def generate_rows(n_rows, seed=0):
+    """按行生成台账数据（生成器，金额单位：万元）"""
+    rng = random.Random(seed)
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    categories = sorted(set(config["design_categories"]) | set(config["construction_categories"]))
+    leaders = _leader_pool(n_rows, rng)
+    start_day = date(2018, 1, 1)
+
+    for i in range(n_rows):
+        contract = round(rng.lognormvariate(5.5, 1.2), 2)
+        settlement = round(contract * rng.uniform(0.6, 1.2), 2)
+        # 约三成项目亏损，少量为巨额亏损
+        roll = rng.random()
+        if roll < 0.02:
+            loss = round(rng.uniform(1000, 5000), 2)
+        elif roll < 0.3:
+            loss = round(contract * rng.uniform(0.01, 1.5), 2)
+        else:
+            loss = 0
+        costs = []
+        for _ in COST_TYPES:
+            budget = round(contract * rng.uniform(0.02, 0.4), 2)
+            actual = round(budget * rng.uniform(0.7, 1.6), 2) if rng.random() > 0.05 else None
+            costs.extend([budget, actual])
+        yield [
+            i + 1,
+            f"合成项目{i + 1:07d}",
+            f"XM{seed:02d}{i + 1:08d}",
+            rng.choice(categories),
+            rng.choice(leaders),
+            contract,
+            settlement,
+            loss,
+            *costs,
+            start_day + timedelta(days=rng.randint(0, 2500)),
+            rng.choice([None, None, "已结算", "待审计"]),
+        ]
+
+
+def generate_ledger(path, n_rows, seed=0):
+    """生成合成台账并保存到 path，返回保存路径"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("项目台账")
+    n_cols, header_rows, merges = _header_rows()
+
+    ws.append(["合成项目亏损情况统计表"])
+    ws.append([f"填报单位：基准测试  单位：万元  行数：{n_rows}"])
+    for header in header_rows:
+        ws.append(header)
+    for row in generate_rows(n_rows, seed=seed):
+        ws.append(row)
+
+    ws.merged_cells.add(f"A1:{get_column_letter(n_cols)}1")
+    for min_row, min_col, max_row, max_col in merges:
+        if (min_row, min_col) != (max_row, max_col):
+            ws.merged_cells.add(f"{get_column_letter(min_col)}{min_row}:{get_column_letter(max_col)}{max_row}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成项目台账 Excel")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000], help="数据行数，可指定多个")
+    parser.add_argument("--output-dir", default="bench_data", help="输出目录")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        path = os.path.join(args.output_dir, f"ledger_{n_rows}.xlsx")
+        generate_ledger(path, n_rows, seed=args.seed)
+        print(f"已生成 {path}（{n_rows} 行）")
+
+
+if __name__ == "__main__":
+    main()
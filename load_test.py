@@ -0,0 +1,278 @@
+"""
+压力测试：以多线程并发调用本机 FastAPI 服务的一站式接口，统计吞吐量、延迟分位数、错误率与服务进程内存。
+
+- json：POST /upload_and_analyze_json/（上传合成台账）
+- excel：POST /upload_and_download_excel/（上传合成台账并下载 Excel 报告）
+- download_excel：POST /download_excel/（提交分析结果 JSON，下载 Excel 报告）
+
+用法：
+    python load_test.py --start-server --rows 1000 --concurrency 1 2 4 8 --requests 40
+    python load_test.py --url http://127.0.0.1:8004 --server-pid <服务进程号> --endpoints json
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from ledger_generator import generate_ledger
+
+ENDPOINTS = {
+    "json": "/upload_and_analyze_json/",
+    "excel": "/upload_and_download_excel/",
+    "download_excel": "/download_excel/",
+}
+DEFAULT_CONCURRENCY = [1, 2, 4, 8]
+DATA_DIR = "bench_data"
+RESULTS_DIR = "bench_results"
+REQUEST_TIMEOUT = 600  # 单个请求超时（秒）
+RSS_SAMPLE_INTERVAL = 0.2  # 服务进程内存采样间隔（秒）
+SERVER_START_TIMEOUT = 60
+
+
+def ensure_ledger(n_rows, data_dir=DATA_DIR, seed=0):
+    """获取（必要时生成）指定行数的合成台账"""
+    path = os.path.join(data_dir, f"ledger_{n_rows}_s{seed}.xlsx")
+    if not os.path.exists(path):
+        print(f"生成合成台账 {path} ...")
+        generate_ledger(path, n_rows, seed=seed)
+    return path
+
+
+def multipart_body(path, field="file"):
+    """构造单文件 multipart/form-data 请求体，返回 (body, content_type)"""
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        content = f.read()
+    filename = os.path.basename(path)
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n"
+    ).encode("utf-8") + content + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def post(url, body, content_type):
+    """发送 POST 请求并读完响应，返回 (状态码, 耗时秒, 响应体)
+
+    连接失败时状态码为 None；响应体不完整（如服务端文件在发送中被改写）时状态码为 "incomplete"。
+    """
+    request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            content = response.read()
+            return response.status, time.perf_counter() - start, content
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, time.perf_counter() - start, b""
+    except http.client.HTTPException:
+        return "incomplete", time.perf_counter() - start, b""
+    except (urllib.error.URLError, OSError):
+        return None, time.perf_counter() - start, b""
+
+
+def read_rss(pid):
+    """读取进程常驻内存（字节），进程不存在或不可读时返回 None"""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class RssSampler:
+    """后台线程定期采样服务进程内存，记录峰值"""
+
+    def __init__(self, pid, interval=RSS_SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = read_rss(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.pid is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def run_level(url, body, content_type, concurrency, n_requests, server_pid=None):
+    """以指定并发数发送 n_requests 个请求，返回统计结果"""
+    rss_before = read_rss(server_pid) if server_pid else None
+    with RssSampler(server_pid) as sampler, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: post(url, body, content_type)[:2], range(n_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = [latency for status, latency in results if isinstance(status, int) and 200 <= status < 300]
+    status_counts = {}
+    for status, _ in results:
+        key = "connection_error" if status is None else str(status)
+        status_counts[key] = status_counts.get(key, 0) + 1
+    errors = n_requests - len(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "error_rate": errors / n_requests if n_requests else 0.0,
+        "status_counts": status_counts,
+        "latency": {
+            "mean": statistics.mean(latencies) if latencies else None,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        "server_rss": {
+            "before": rss_before,
+            "peak": sampler.peak,
+            "after": read_rss(server_pid) if server_pid else None,
+        },
+    }
+
+
+def start_server(port):
+    """在本机启动服务（uvicorn 单进程），就绪后返回进程对象"""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"服务启动失败（退出码 {server.returncode}）")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=2):
+                return server
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"服务在 {SERVER_START_TIMEOUT} 秒内未就绪")
+
+
+def _format_seconds(value):
+    return f"{value:>8.3f}" if value is not None else f"{'-':>8}"
+
+
+def _format_mb(value):
+    return f"{value / 1024 ** 2:>9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_level(endpoint, stat):
+    latency = stat["latency"]
+    print(
+        f"{endpoint:<16}{stat['concurrency']:>6}{stat['throughput']:>10.2f}"
+        f"{_format_seconds(latency['p50'])}{_format_seconds(latency['p95'])}{_format_seconds(latency['p99'])}"
+        f"{stat['error_rate'] * 100:>8.1f}%{_format_mb(stat['server_rss']['peak'])}"
+    )
+
+
+def run_load_test(base_url, ledger_path, endpoints, levels, n_requests, server_pid=None):
+    """对各接口、各并发数依次压测，返回报告字典"""
+    upload_body, upload_type = multipart_body(ledger_path)
+    bodies = {"json": (upload_body, upload_type), "excel": (upload_body, upload_type)}
+    if "download_excel" in endpoints:
+        # /download_excel/ 的请求体为分析结果，先调用一次分析接口获取
+        status, _, content = post(base_url + ENDPOINTS["json"], upload_body, upload_type)
+        if status != 200:
+            raise RuntimeError(f"获取分析结果失败（状态码 {status}），无法压测 /download_excel/")
+        bodies["download_excel"] = (json.dumps(json.loads(content)["source"]).encode("utf-8"), "application/json")
+
+    report = {}
+    print(f"{'接口':<14}{'并发':>6}{'吞吐(次/s)':>10}{'p50(s)':>8}{'p95(s)':>8}{'p99(s)':>8}{'错误率':>8}{'峰值RSS(MB)':>9}")
+    for endpoint in endpoints:
+        body, content_type = bodies[endpoint]
+        post(base_url + ENDPOINTS[endpoint], body, content_type)  # 预热
+        report[endpoint] = []
+        for concurrency in levels:
+            stat = run_level(base_url + ENDPOINTS[endpoint], body, content_type, concurrency, n_requests, server_pid)
+            report[endpoint].append(stat)
+            print_level(endpoint, stat)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一站式接口并发压力测试")
+    parser.add_argument("--url", default="http://127.0.0.1:8004", help="服务地址（与 --start-server 互斥）")
+    parser.add_argument("--start-server", action="store_true", help="在本机启动服务后压测，结束时关闭")
+    parser.add_argument("--port", type=int, default=8765, help="--start-server 时的服务端口")
+    parser.add_argument("--server-pid", type=int, help="已运行服务的进程号（用于采样内存）")
+    parser.add_argument("--rows", type=int, default=1000, help="合成台账行数")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="合成台账缓存目录")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS), help="压测接口")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY, help="并发数，可指定多个")
+    parser.add_argument("--requests", type=int, default=20, help="每个并发级别的请求数")
+    parser.add_argument("--output", help="报告输出路径（默认 bench_results/load_<时间>.json）")
+    args = parser.parse_args()
+
+    ledger_path = ensure_ledger(args.rows, args.data_dir)
+    server = None
+    base_url, server_pid = args.url.rstrip("/"), args.server_pid
+    if args.start_server:
+        server = start_server(args.port)
+        base_url, server_pid = f"http://127.0.0.1:{args.port}", server.pid
+    try:
+        results = run_load_test(base_url, ledger_path, args.endpoints, args.concurrency, args.requests, server_pid)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "url": base_url,
+            "rows": args.rows,
+            "file_bytes": os.path.getsize(ledger_path),
+            "requests_per_level": args.requests,
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load_{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已保存到：{output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,35 @@
-from tkinter import messagebox
+import re
 
+import numpy as np
 import pandas as pd
 
 from base_analyzer import BaseAnalyzer
 
+# 主要成本结算列：项目主要成本情况_<成本类型>_结算（模板新增成本类型时自动纳入）
+COST_COLUMN_PATTERN = r"(?:^|_)项目主要成本情况_(.+)_结算$"
+COST_RATIO_THRESHOLD = 0.5  # 单项成本占合同金额比例阈值
+EXCEEDED_COST_COLUMN = "超标成本类型"  # 结果附加列：超过合同金额比例的成本类型（以“、”分隔）
+
+
+def cost_columns(columns):
+    """按列名前缀识别主要成本结算列，返回 [(成本类型, 列名)]（保持列顺序）"""
+    result = []
+    for col in columns:
+        match = re.search(COST_COLUMN_PATTERN, str(col).strip().replace(" ", "").replace("　", ""))
+        if match:
+            result.append((match.group(1), col))
+    return result
+
 
 class LossDataAnalyzer(BaseAnalyzer):
+    required_columns = ("亏损金额", "项目结算金额", "合同金额")
+    required_column_patterns = (COST_COLUMN_PATTERN,)
+
     def __init__(self, original_columns):
         super().__init__(original_columns)
         self.valid_rows_count = 0  # 有效比较行数
         self.low_loss_data = pd.DataFrame()  # ✅ 初始化存储低额亏损数据
+        self.cost_exceeded = pd.DataFrame()  # 命中行各成本类型是否超过合同金额比例（行：命中行，列：成本类型）
 
 
     def analyze(self, df, parent=None, **kwargs):
@@ -21,81 +41,78 @@ class LossDataAnalyzer(BaseAnalyzer):
             loss_col = self._find_col(df, "亏损金额")
             settlement_col = self._find_col(df, "项目结算金额")
             contract_col = self._find_col(df, "合同金额")
-            lwf_col = self._find_col(df, "项目主要成本情况_劳务费_结算")
-            clf_col = self._find_col(df, "项目主要成本情况_材料费_结算")
-            jxf_col = self._find_col(df, "项目主要成本情况_设备机械租赁费_结算")
-            zxf_col = self._find_col(df, "项目主要成本情况_技术服务、咨询费_结算")
-            fbf_col = self._find_col(df, "项目主要成本情况_专业分包_结算")
+            costs = cost_columns(df.columns)
+            if not costs:
+                raise ValueError("未找到「项目主要成本情况_…_结算」成本列")
+            cost_types = [cost_type for cost_type, _ in costs]
+            self._log(f"识别成本列 {len(costs)} 个：{'、'.join(cost_types)}")
 
             # 转换为数值类型
-            df_copy = df.copy()
-            df_copy["亏损金额_数值"] = pd.to_numeric(df_copy[loss_col], errors="coerce")
-            df_copy["合同金额_数值"] = pd.to_numeric(df_copy[contract_col], errors="coerce")
-            df_copy["项目结算金额_数值"] = pd.to_numeric(df_copy[settlement_col], errors="coerce")
-            df_copy["劳务费_数值"] = pd.to_numeric(df_copy[lwf_col], errors="coerce")
-            df_copy["材料费_数值"] = pd.to_numeric(df_copy[clf_col], errors="coerce")
-            df_copy["设备费_数值"] = pd.to_numeric(df_copy[jxf_col], errors="coerce")
-            df_copy["技术费_数值"] = pd.to_numeric(df_copy[zxf_col], errors="coerce")
-            df_copy["分包费_数值"] = pd.to_numeric(df_copy[fbf_col], errors="coerce")
+            loss = self._to_amount(df[loss_col]).to_numpy()
+            settlement = self._to_amount(df[settlement_col]).to_numpy()
+            contract = self._to_amount(df[contract_col]).to_numpy()
+            cost_matrix = np.empty((len(df), len(costs)))
+            for j, (_, col) in enumerate(costs):
+                cost_matrix[:, j] = self._to_amount(df[col]).to_numpy()
 
             # 筛选有效行
-            valid_rows = df_copy[
-                (df_copy["亏损金额_数值"].notna() & df_copy["项目结算金额_数值"].notna()) |
-                (df_copy["亏损金额_数值"].notna() & df_copy["合同金额_数值"].notna()) |
-                (df_copy["劳务费_数值"].notna() & df_copy["合同金额_数值"].notna()) |
-                (df_copy["材料费_数值"].notna() & df_copy["合同金额_数值"].notna()) |
-                (df_copy["设备费_数值"].notna() & df_copy["合同金额_数值"].notna()) |
-                (df_copy["技术费_数值"].notna() & df_copy["合同金额_数值"].notna()) |
-                (df_copy["分包费_数值"].notna() & df_copy["合同金额_数值"].notna())
-                ]
-            invalid_rows = len(df_copy) - len(valid_rows)
-            self.valid_rows_count = len(valid_rows)
+            has_loss = ~np.isnan(loss)
+            has_contract = ~np.isnan(contract)
+            valid = (
+                (has_loss & ~np.isnan(settlement)) |
+                (has_loss & has_contract) |
+                (~np.isnan(cost_matrix).all(axis=1) & has_contract)
+            )
+            self.valid_rows_count = int(valid.sum())
             self._log(
-                f"过滤无效行：{invalid_rows} 行\n"
+                f"过滤无效行：{len(df) - self.valid_rows_count} 行\n"
                 f"有效比较行：{self.valid_rows_count} 行"
             )
 
-            # 核心筛选条件
-            filtered_df = valid_rows[
-                (valid_rows["亏损金额_数值"] >= valid_rows["项目结算金额_数值"]) |
-                (valid_rows["亏损金额_数值"] >= valid_rows["合同金额_数值"]) |
-                (valid_rows["劳务费_数值"] / valid_rows["合同金额_数值"] >= 0.5) |
-                (valid_rows["材料费_数值"] / valid_rows["合同金额_数值"] >= 0.5) |
-                (valid_rows["设备费_数值"] / valid_rows["合同金额_数值"] >= 0.5) |
-                (valid_rows["技术费_数值"] / valid_rows["合同金额_数值"] >= 0.5) |
-                (valid_rows["分包费_数值"] / valid_rows["合同金额_数值"] >= 0.5)
-                ]
+            # 核心筛选条件：成本矩阵整体除以合同金额，一次得到各行各成本类型是否超比例
+            with np.errstate(divide="ignore", invalid="ignore"):
+                exceeded = cost_matrix / contract[:, None] >= COST_RATIO_THRESHOLD
+            flagged = valid & ((loss >= settlement) | (loss >= contract) | exceeded.any(axis=1))
 
             # 整理结果
-            self.analyzed_data = filtered_df.drop(
-                columns=["亏损金额_数值", "合同金额_数值", "项目结算金额_数值",
-                         "劳务费_数值", "材料费_数值", "设备费_数值",
-                         "技术费_数值", "分包费_数值"]
-            )[self.original_columns]
+            self.analyzed_data = df[flagged][self.original_columns]
+            self.cost_exceeded = pd.DataFrame(exceeded[flagged], index=self.analyzed_data.index, columns=cost_types)
+            self.analyzed_data = self.analyzed_data.assign(
+                **{EXCEEDED_COST_COLUMN: self.get_exceeded_cost_types().str.join("、")}
+            )
             self._log(f"符合成本异常条件的数据：{len(self.analyzed_data)} 行")
             # ✅ 在分析结束时调用低额亏损筛选
-            self.filter_low_loss(df_copy)
+            self.filter_low_loss(df, loss)
             return True
 
         except ValueError as ve:
             err_msg = f"分析失败：{str(ve)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
         except Exception as e:
             err_msg = f"分析失败：{str(e)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
 
     def get_valid_rows_count(self):
         return self.valid_rows_count
     
-    def filter_low_loss(self, df_copy):
-        """筛选亏损金额低于10万元的项目"""
-        self.low_loss_data = df_copy[df_copy["亏损金额_数值"] < 100000].dropna(subset=["亏损金额_数值"])
+    def filter_low_loss(self, df, loss):
+        """筛选亏损金额低于10万元的项目（loss 为亏损金额数值数组）"""
+        self.low_loss_data = df[loss < 100000]
         self._log(f"亏损金额低于10万元的项目数：{len(self.low_loss_data)} 行")
 
     def get_low_loss_data(self):
         """返回亏损金额小于10万的结果"""
-        return self.low_loss_data[self.original_columns]
\ No newline at end of file
+        return self.low_loss_data[self.original_columns]
+
+    def get_exceeded_cost_types(self):
+        """返回各命中行超过合同金额比例的成本类型列表（索引与分析结果一致）"""
+        cost_types = np.array(self.cost_exceeded.columns, dtype=object)
+        return pd.Series(
+            [list(cost_types[row]) for row in self.cost_exceeded.to_numpy(dtype=bool)],
+            index=self.cost_exceeded.index,
+            dtype=object,
+        )
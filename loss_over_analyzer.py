@@ -1,9 +1,10 @@
 import pandas as pd
-from tkinter import messagebox
 from base_analyzer import BaseAnalyzer
 
 
 class LossOverAnalyzer(BaseAnalyzer):
+    required_columns = ("亏损金额",)
+
     def __init__(self, original_columns):
         super().__init__(original_columns)
         self.total_valid_rows = 0  # 有效亏损金额行数
@@ -19,7 +20,7 @@ class LossOverAnalyzer(BaseAnalyzer):
 
             # 转换为数值类型
             df_copy = df.copy()
-            df_copy["亏损金额_数值"] = pd.to_numeric(df_copy[loss_col], errors="coerce")
+            df_copy["亏损金额_数值"] = self._to_amount(df_copy[loss_col])
             self._log("已将亏损金额列转换为数值类型（非数值转为空值）")
 
             # 筛选有效数据
@@ -44,12 +45,12 @@ class LossOverAnalyzer(BaseAnalyzer):
         except ValueError as ve:
             err_msg = f"分析失败：{str(ve)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
         except Exception as e:
             err_msg = f"分析失败：{str(e)}"
             self._log(err_msg)
-            messagebox.showerror("分析错误", err_msg, parent=parent)
+            self._notify("showerror", "分析错误", err_msg, parent)
             return False
 
     def get_valid_rows_count(self):
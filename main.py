@@ -3,12 +3,10 @@ from tkinter import filedialog, ttk
 from tkinter import font
 import pandas as pd
 from openpyxl import load_workbook
-from construction_analyzer import ConstructionAnalyzer
-from design_analyzer import DesignAnalyzer
+from analyzer_registry import analyzers_config
+from excel_reader import ledger_format, load_ledger_file, parse_header_columns, read_data_frame
 from excel_saver import ExcelResultSaver
-from leader_analyzer import LeaderFrequencyAnalyzer
-from loss_analyzer import LossDataAnalyzer
-from loss_over_analyzer import LossOverAnalyzer
+from ledger_cache import LedgerCache, file_key
 
 
 class ModernButton(tk.Button):
@@ -57,36 +55,11 @@ class MainApp:
         self.original_columns = []  # 原始表头列名
         self.raw_data = None  # 原始数据DataFrame
         self.excel_saver = ExcelResultSaver()
+        self.ledger_cache = LedgerCache()  # 已解析台账缓存
         self.analyzers = []  # 分析器实例列表
 
-        # 分析器配置
-        self.analyzers_config = [
-            {
-                "class": LeaderFrequencyAnalyzer,
-                "sheet_name": "附表1  亏损3个项目项目负责人",
-                "analyze_kwargs": {"min_count": 3}
-            },
-            {
-                "class": DesignAnalyzer,
-                "sheet_name": "附表2  亏损大于合同",
-                "analyze_kwargs": {}
-            },
-            {
-                "class": ConstructionAnalyzer,
-                "sheet_name": "附表3  施工项目亏损金额占合同金额30%",
-                "analyze_kwargs": {}
-            },
-            {
-                "class": LossOverAnalyzer,
-                "sheet_name": "附表4  亏损大于1000万",
-                "analyze_kwargs": {"threshold": 1000}
-            },
-            {
-                "class": LossDataAnalyzer,
-                "sheet_name": "附表5  成本费用异常情况",
-                "analyze_kwargs": {}
-            }
-        ]
+        # 分析器配置（见 analyzer_registry，导出报告使用带附表编号的表名）
+        self.analyzers_config = analyzers_config(report_names=True)
 
         self.create_ui()
         self.add_animation()
@@ -231,60 +204,27 @@ class MainApp:
         for btn in [self.upload_btn, self.analyze_btn, self.save_btn]:
             btn.bind("<ButtonPress-1>", lambda e, b=btn: animate_button(b))
 
-    def get_merged_value(self, sheet, row, col):
-        """获取指定行列的单元格值（处理合并单元格）"""
-        for merged_range in sheet.merged_cells.ranges:
-            if merged_range.min_row <= row <= merged_range.max_row and merged_range.min_col <= col <= merged_range.max_col:
-                return sheet.cell(row=merged_range.min_row, column=merged_range.min_col).value
-        return sheet.cell(row=row, column=col).value
-
     def upload_excel(self):
-        """上传Excel并读取数据"""
+        """上传台账文件（xlsx / csv / parquet）并读取数据"""
         file_path = filedialog.askopenfilename(
-            title="选择Excel文件",
-            filetypes=[("Excel Files", "*.xlsx;*.xls")]
+            title="选择台账文件",
+            filetypes=[
+                ("台账文件", "*.xlsx *.csv *.parquet"),
+                ("Excel Files", "*.xlsx"),
+                ("CSV Files", "*.csv"),
+                ("Parquet Files", "*.parquet"),
+            ]
         )
         if not file_path:
             return
 
         try:
-            # 读取表头（3-5行）
-            wb = load_workbook(file_path, data_only=True)
-            sheet = wb.active
-            max_col = sheet.max_column
-            self.original_columns = []
-            for col_idx in range(1, max_col + 1):
-                # 解析三级表头
-                main_header = self.get_merged_value(sheet, row=3, col=col_idx)
-                sub1_header = self.get_merged_value(sheet, row=4, col=col_idx)
-                sub2_header = self.get_merged_value(sheet, row=5, col=col_idx)
-
-                # 去重处理
-                parts = []
-                seen = set()
-                for p in [main_header, sub1_header, sub2_header]:
-                    if p is not None:
-                        p_str = str(p)
-                        if p_str not in seen:
-                            seen.add(p_str)
-                            parts.append(p_str)
-
-                col_name = "_".join(parts) if parts else f"未知列_{col_idx}"
-                self.original_columns.append(col_name)
-
-            self.log(f"三级表头解析完成，共 {len(self.original_columns)} 列", "info")
-            self.log(f"示例列名：{self.original_columns[:5]}...", "info")
-
-            # 读取数据行（从第6行开始）
-            data = []
-            for row in sheet.iter_rows(min_row=6, values_only=True):
-                row_data = row[:len(self.original_columns)]
-                if row_data and row_data[0] is None:
-                    break
-                data.append(row_data)
-            total_rows = len(data)
-            self.log(f"共读取 {total_rows} 行原始数据", "info")
-            self.raw_data = pd.DataFrame(data, columns=self.original_columns)
+            if ledger_format(file_path) != "xlsx":
+                # CSV / Parquet：首行即拼接后的三级表头列名，直接向量化读取
+                self.original_columns, self.raw_data = load_ledger_file(file_path)
+                self.log(f"共读取 {len(self.original_columns)} 列、{len(self.raw_data)} 行数据", "info")
+            else:
+                self.load_xlsx(file_path)
 
             # 初始化分析器
             self.analyzers = [
@@ -294,7 +234,29 @@ class MainApp:
             self.log("分析器初始化完成，可执行分析", "success")
 
         except Exception as e:
-            self.log(f"读取Excel失败：{str(e)}", "error")
+            self.log(f"读取台账失败：{str(e)}", "error")
+
+    def load_xlsx(self, file_path):
+        """读取 xlsx 台账（优先使用解析缓存）"""
+        cache_key = file_key(file_path)
+        cached = self.ledger_cache.get(cache_key)
+        if cached is not None:
+            self.original_columns, self.raw_data = cached
+            self.log(f"命中解析缓存，共 {len(self.original_columns)} 列、{len(self.raw_data)} 行数据", "info")
+            return
+
+        # 读取表头（3-5行）
+        wb = load_workbook(file_path, data_only=True)
+        sheet = wb.active
+        self.original_columns = parse_header_columns(sheet)
+
+        self.log(f"三级表头解析完成，共 {len(self.original_columns)} 列", "info")
+        self.log(f"示例列名：{self.original_columns[:5]}...", "info")
+
+        # 读取数据行（从第6行开始）
+        self.raw_data = read_data_frame(sheet, self.original_columns)
+        self.log(f"共读取 {len(self.raw_data)} 行原始数据", "info")
+        self.ledger_cache.put(cache_key, self.original_columns, self.raw_data, source=file_path)
 
     def run_analysis(self):
         """执行所有分析器"""
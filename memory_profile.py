@@ -0,0 +1,165 @@
+"""
+分阶段内存剖析：对给定台账依次执行 上传解析 → 分析 → 记录转换与序列化 → Excel 导出，
+用 tracemalloc 记录每个阶段的峰值分配与阶段结束后仍保留的分配（各阶段产物同时保留，
+与接口中 raw_data、各分析结果、记录字典同时存在的情形一致），并按台账行数检查内存预算。
+
+预算 = 固定开销 + 每行预算 × 行数；两项均按文件格式与阶段区分。固定开销覆盖与行数无关的分配
+（样式表、Excel 写出器、分类结构等），每行预算按 500～20000 行合成台账实测的增长斜率留约 1.5 倍余量。
+各阶段峰值随行数近似线性增长，但小文件时固定开销占比高，单一的“文件大小倍数”无法同时适配大小台账。
+
+用法：
+    python memory_profile.py 台账.xlsx
+    python memory_profile.py 台账.xlsx --check [--budget upload=8:12 serialize=16:6] [--output 报告.json]
+
+--check 时任一阶段峰值超出预算即以退出码 1 结束，可用于回归检查。
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from fastapi.encoders import jsonable_encoder
+
+from api import AnalysisAPI, convert_all_non_json_compliant_to_string
+from excel_reader import ledger_format
+
+STAGES = ("upload", "analyze", "serialize", "export")
+# 各阶段峰值分配预算：(固定开销 MB, 每行 KB)
+# 实测（2 万行）：xlsx 上传约 8 KB/行；csv / parquet 序列化约 11.5 KB/行（列均为文本，记录字典更大）；导出约 7 KB/行。
+# xlsx 序列化在 5000 行附近有一次约 10 MB 的跳升（5000 行 38 MB、1 万行 48 MB），固定开销按此放宽
+MEMORY_BUDGETS = {
+    "xlsx": {"upload": (8.0, 12.0), "analyze": (4.0, 1.2), "serialize": (24.0, 6.0), "export": (16.0, 10.0)},
+    "csv": {"upload": (4.0, 0.8), "analyze": (4.0, 1.2), "serialize": (16.0, 17.0), "export": (16.0, 10.0)},
+    "parquet": {"upload": (4.0, 0.8), "analyze": (4.0, 1.2), "serialize": (16.0, 17.0), "export": (16.0, 10.0)},
+}
+
+
+@contextmanager
+def _stage(stages, name):
+    current_before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    yield
+    current, peak = tracemalloc.get_traced_memory()
+    stages.append({
+        "stage": name,
+        "seconds": round(time.perf_counter() - start, 6),
+        "peak_bytes": peak - current_before,  # 阶段内相对阶段开始时的峰值增量
+        "retained_bytes": current - current_before,  # 阶段结束后仍保留的分配
+        "traced_current_bytes": current,
+    })
+
+
+def profile_pipeline(path):
+    """对台账执行完整流程，返回 (台账行数, 各阶段内存记录)"""
+    api = AnalysisAPI()
+    stages = []
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        with _stage(stages, "upload"):
+            api.load_file(path)
+        rows = len(api.raw_data)
+        with _stage(stages, "analyze"):
+            frames, low_loss_df = api.run_analysis_frames()
+        with _stage(stages, "serialize"):
+            results = api.frames_to_results(frames, low_loss_df)
+            classified = api.classify_projects(results["all_analyzed_data"])
+            classified["low_loss_projects"] = results["low_loss_projects"]
+            payload = json.dumps(
+                jsonable_encoder(convert_all_non_json_compliant_to_string(classified)), ensure_ascii=False
+            )
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                with _stage(stages, "export"):
+                    api.save_results_to_excel_v2(results["all_analyzed_data"])
+            finally:
+                os.chdir(cwd)
+        del payload
+    finally:
+        if started:
+            tracemalloc.stop()
+    return rows, stages
+
+
+def budget_bytes(budget, rows):
+    """(固定开销 MB, 每行 KB) 预算对应的字节数"""
+    base_mb, per_row_kb = budget
+    return int(base_mb * 1024 ** 2 + per_row_kb * 1024 * rows)
+
+
+def check_budgets(stages, rows, budgets):
+    """标注各阶段预算，返回超出预算的阶段列表 [(阶段, 峰值字节数, 预算字节数)]"""
+    violations = []
+    for stage in stages:
+        stage["peak_bytes_per_row"] = round(stage["peak_bytes"] / rows, 1) if rows else 0.0
+        stage["budget"] = list(budgets[stage["stage"]])
+        stage["budget_bytes"] = budget_bytes(budgets[stage["stage"]], rows)
+        if stage["peak_bytes"] > stage["budget_bytes"]:
+            violations.append((stage["stage"], stage["peak_bytes"], stage["budget_bytes"]))
+    return violations
+
+
+def _parse_budgets(items, fmt):
+    budgets = dict(MEMORY_BUDGETS[fmt])
+    for item in items or []:
+        stage, _, value = item.partition("=")
+        base_mb, _, per_row_kb = value.partition(":")
+        if stage not in STAGES or not base_mb or not per_row_kb:
+            raise argparse.ArgumentTypeError(
+                f"预算格式应为 阶段=固定开销MB:每行KB（阶段可选 {', '.join(STAGES)}）：{item}"
+            )
+        budgets[stage] = (float(base_mb), float(per_row_kb))
+    return budgets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分阶段内存剖析与预算检查")
+    parser.add_argument("ledger", help="台账文件（xlsx / csv / parquet）")
+    parser.add_argument("--check", action="store_true", help="检查各阶段峰值是否超出预算，超出时退出码为 1")
+    parser.add_argument("--budget", nargs="+", metavar="阶段=MB:KB", help="覆盖预算（固定开销 MB:每行 KB）")
+    parser.add_argument("--output", help="报告 JSON 输出路径")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    try:
+        budgets = _parse_budgets(args.budget, ledger_format(args.ledger))
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+    file_bytes = os.path.getsize(args.ledger)
+    rows, stages = profile_pipeline(args.ledger)
+    violations = check_budgets(stages, rows, budgets)
+
+    print(f"输入文件：{args.ledger}（{file_bytes / 1024 ** 2:.1f} MB，{rows} 行）")
+    print(f"{'阶段':<12}{'耗时(s)':>10}{'峰值(MB)':>12}{'保留(MB)':>12}{'峰值/行(KB)':>12}{'预算(MB)':>10}")
+    for stage in stages:
+        print(
+            f"{stage['stage']:<12}{stage['seconds']:>10.3f}{stage['peak_bytes'] / 1024 ** 2:>12.1f}"
+            f"{stage['retained_bytes'] / 1024 ** 2:>12.1f}{stage['peak_bytes_per_row'] / 1024:>12.2f}"
+            f"{stage['budget_bytes'] / 1024 ** 2:>10.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"ledger": args.ledger, "file_bytes": file_bytes, "rows": rows, "budgets": budgets,
+                       "stages": stages},
+                      f, ensure_ascii=False, indent=2)
+        print(f"报告已保存到：{args.output}")
+
+    if args.check and violations:
+        for stage, peak, budget in violations:
+            print(f"超出预算：{stage} 峰值 {peak / 1024 ** 2:.1f} MB（预算 {budget / 1024 ** 2:.1f} MB）")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+按需请求剖析：对单个请求的 上传 → 分析 → 序列化 流程采集 CPU 剖析（cProfile）
+与内存分配快照（tracemalloc），报告保存到 output/profiles 下供事后下载。
+"""
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get("ANALYSIS_PROFILE_DIR", os.path.join("output", "profiles"))
+ADMIN_TOKEN_ENV = "ANALYSIS_ADMIN_TOKEN"
+
+
+def is_admin_token(token):
+    """校验管理员令牌（未配置 ANALYSIS_ADMIN_TOKEN 时一律拒绝）"""
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(str(token), expected)
+
+
+class RequestProfiler:
+    """单次请求剖析器；enabled=False 时所有操作均为空操作"""
+
+    def __init__(self, label="request", enabled=True, top_n=30):
+        self.label = label
+        self.enabled = enabled
+        self.top_n = top_n
+        self.report_id = None
+        self.stages = []  # 各阶段耗时与内存
+        self._profile = None
+        self._snapshot = None
+        self._peak = 0
+        self._started_tracing = False
+        self._start = None
+        self._elapsed = 0.0
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._profile = cProfile.Profile()
+        self._start = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.enabled:
+            return False
+        self._profile.disable()
+        self._elapsed = time.perf_counter() - self._start
+        self._snapshot = tracemalloc.take_snapshot()
+        self._peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.save()
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个流程阶段的耗时与内存峰值"""
+        if not self.enabled:
+            yield
+            return
+        current_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        current, peak = tracemalloc.get_traced_memory()
+        self.stages.append({
+            "stage": name,
+            "seconds": round(time.perf_counter() - start, 6),
+            "allocated_bytes": current - current_before,
+            "traced_peak_bytes": peak,
+        })
+
+    def save(self, profile_dir=PROFILE_DIR):
+        """保存剖析结果：<id>.prof（pstats 格式）与 <id>.json（摘要报告）"""
+        os.makedirs(profile_dir, exist_ok=True)
+        self.report_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{self.label}_{uuid.uuid4().hex[:8]}"
+        self._profile.dump_stats(os.path.join(profile_dir, f"{self.report_id}.prof"))
+        with open(os.path.join(profile_dir, f"{self.report_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return self.report_id
+
+    def summary(self):
+        """生成摘要：阶段耗时、累计耗时最高的函数、分配最多的代码行"""
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top_n)
+
+        top_allocations = []
+        for stat in self._snapshot.statistics("lineno")[:self.top_n]:
+            frame = stat.traceback[0]
+            top_allocations.append({
+                "location": f"{frame.filename}:{frame.lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count,
+            })
+        return {
+            "report_id": self.report_id,
+            "label": self.label,
+            "total_seconds": round(self._elapsed, 6),
+            "traced_peak_bytes": self._peak,
+            "stages": self.stages,
+            "top_allocations": top_allocations,
+            "cpu_profile": stream.getvalue(),
+        }
+
+
+def load_report(report_id, fmt="json", profile_dir=PROFILE_DIR):
+    """按 report_id 返回剖析文件路径（不存在时返回 None）"""
+    if os.path.basename(report_id) != report_id or fmt not in ("json", "prof"):
+        return None
+    path = os.path.join(profile_dir, f"{report_id}.{fmt}")
+    return path if os.path.exists(path) else None
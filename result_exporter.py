@@ -0,0 +1,91 @@
+"""
+分析结果导出：直接由各结果 DataFrame 写出，供下游 BI 读取。
+
+- parquet：每个结果表一个 Parquet 文件，打包为 zip；
+- csv：每个结果表一个 CSV（UTF-8 BOM，Excel 可直接打开），打包为 zip；
+- ndjson：单个文件，每行一条记录 {"sheet_name": 结果表名, "record": {...}}。
+"""
+import json
+import re
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+
+EXPORT_FORMATS = {
+    "parquet": (".zip", "application/zip"),
+    "csv": (".zip", "application/zip"),
+    "ndjson": (".ndjson", "application/x-ndjson"),
+}
+
+
+def _safe_name(name):
+    return re.sub(r'[\\/:*?"<>|]', "_", str(name)).strip() or "sheet"
+
+
+def _unique_columns(columns):
+    """Parquet 不允许重名列：重名列依次追加 _2、_3 后缀"""
+    seen = {}
+    result = []
+    for col in map(str, columns):
+        seen[col] = seen.get(col, 0) + 1
+        result.append(col if seen[col] == 1 else f"{col}_{seen[col]}")
+    return result
+
+
+def _parquet_bytes(df):
+    frame = df.copy(deep=False)
+    frame.columns = _unique_columns(frame.columns)
+    buffer = BytesIO()
+    try:
+        frame.to_parquet(buffer, index=False)
+    except (TypeError, ValueError):
+        # 混合类型的文本列（如数字与文字混排）按字符串写出
+        for col in frame.columns[frame.dtypes == object]:
+            frame[col] = frame[col].map(lambda v: v if v is None or isinstance(v, str) else str(v))
+        buffer = BytesIO()
+        frame.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _write_zip(frames, path, suffix, to_bytes, compression):
+    with zipfile.ZipFile(path, "w", compression=compression) as archive:
+        used = set()
+        for name, df in frames.items():
+            filename = _safe_name(name)
+            while filename in used:
+                filename += "_"
+            used.add(filename)
+            archive.writestr(f"{filename}{suffix}", to_bytes(df))
+
+
+def _write_ndjson(frames, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for name, df in frames.items():
+            if df.empty:
+                continue
+            prefix = '{"sheet_name": ' + json.dumps(str(name), ensure_ascii=False) + ', "record": '
+            frame = df.copy(deep=False)
+            frame.columns = _unique_columns(frame.columns)
+            lines = frame.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+            # to_json 已转义字段中的换行符，只按 "\n" 分行（splitlines 还会在 \u2028 等字符处断开记录）
+            for line in lines.split("\n"):
+                if line:
+                    f.write(prefix + line + "}\n")
+
+
+def export_results(frames, fmt, path):
+    """将 {结果表名: DataFrame} 按格式写入 path"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式：{fmt}（可选 {', '.join(EXPORT_FORMATS)}）")
+    if fmt == "parquet":
+        _write_zip(frames, path, ".parquet", _parquet_bytes, zipfile.ZIP_STORED)  # Parquet 已压缩
+    elif fmt == "csv":
+        _write_zip(
+            frames, path, ".csv",
+            lambda df: df.to_csv(index=False).encode("utf-8-sig"),
+            zipfile.ZIP_DEFLATED,
+        )
+    else:
+        _write_ndjson(frames, path)
+    return path
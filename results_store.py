@@ -0,0 +1,216 @@
+"""
+分析结果本地存储：每次分析的被标记项目写入本地 SQLite，按项目名称、负责人、项目类别、
+分析器及亏损金额建索引，查询接口直接走索引返回，无需重新执行分析流程。
+只保留最近若干次分析（ANALYSIS_RESULTS_KEEP_RUNS），更早的分析在写入新结果时删除。
+"""
+import json
+import os
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from amount_parser import parse_amounts
+from excel_reader import find_column
+from leader_store import DB_PATH, connect
+
+KEEP_RUNS = int(os.environ.get("ANALYSIS_RESULTS_KEEP_RUNS", "200"))  # 保留的最近分析次数，0 为不清理
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    source TEXT,
+    period TEXT
+);
+CREATE TABLE IF NOT EXISTS flagged_projects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES analysis_runs (run_id),
+    project_name TEXT,
+    leader TEXT,
+    category TEXT,
+    category_class TEXT,
+    analyzer TEXT NOT NULL,
+    sheet_name TEXT NOT NULL,
+    loss_amount REAL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_flagged_project ON flagged_projects (project_name, run_id);
+CREATE INDEX IF NOT EXISTS idx_flagged_leader ON flagged_projects (leader, run_id);
+CREATE INDEX IF NOT EXISTS idx_flagged_category_loss ON flagged_projects (run_id, category, loss_amount DESC);
+CREATE INDEX IF NOT EXISTS idx_flagged_class_loss ON flagged_projects (run_id, category_class, loss_amount DESC);
+CREATE INDEX IF NOT EXISTS idx_flagged_analyzer_loss ON flagged_projects (run_id, analyzer, loss_amount DESC);
+CREATE INDEX IF NOT EXISTS idx_flagged_sheet_loss ON flagged_projects (run_id, sheet_name, loss_amount DESC);
+CREATE INDEX IF NOT EXISTS idx_flagged_loss ON flagged_projects (run_id, loss_amount DESC);
+"""
+
+CONFIG_PATH = Path(__file__).parent / "config/categories.json"
+
+
+def _amounts(records, key):
+    """按金额解析规则（千分位、万 / 元单位、括号负数等）解析记录中的金额，无法解析或为空时为 None"""
+    values, _ = parse_amounts(pd.Series([record.get(key) for record in records], dtype=object))
+    return [None if value != value else float(value) for value in values]  # 排除 NaN
+
+
+def _to_text(value):
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+class ResultsStore:
+    def __init__(self, db_path=DB_PATH, keep_runs=KEEP_RUNS):
+        self.db_path = db_path
+        self.keep_runs = keep_runs
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            self.category_mapping = json.load(f)["category_mapping"]
+        with closing(connect(self.db_path)) as conn:
+            conn.executescript(SCHEMA)
+
+    def save_run(self, all_analyzed_data, source=None, period=None):
+        """保存一次分析的全部被标记项目并清理超出保留次数的旧分析，返回 run_id"""
+        with closing(connect(self.db_path)) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO analysis_runs (created_at, source, period) VALUES (?, ?, ?)",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), source, period),
+            )
+            run_id = cursor.lastrowid
+            for item in all_analyzed_data:
+                records = item["data"]
+                if not records:
+                    continue
+                keys = list(records[0].keys())
+                name_key = find_column(keys, "项目名称")
+                leader_key = find_column(keys, "项目负责人")
+                category_key = find_column(keys, "项目类别")
+                loss_key = find_column(keys, "亏损金额")
+                losses = _amounts(records, loss_key) if loss_key else [None] * len(records)
+                conn.executemany(
+                    """
+                    INSERT INTO flagged_projects
+                        (run_id, project_name, leader, category, category_class, analyzer, sheet_name, loss_amount, record)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        (
+                            run_id,
+                            _to_text(record.get(name_key)) if name_key else None,
+                            _to_text(record.get(leader_key)) if leader_key else None,
+                            _to_text(record.get(category_key)) if category_key else None,
+                            self.category_mapping.get(str(record.get(category_key)).strip()) if category_key else None,
+                            item["analyzer_name"],
+                            item["sheet_name"],
+                            loss,
+                            json.dumps(record, ensure_ascii=False, default=str),
+                        )
+                        for record, loss in zip(records, losses)
+                    ),
+                )
+            self._prune(conn)
+        return run_id
+
+    def _prune(self, conn):
+        """只保留最近 keep_runs 次分析，删除更早的分析及其被标记项目"""
+        if self.keep_runs <= 0:
+            return
+        row = conn.execute(
+            "SELECT run_id FROM analysis_runs ORDER BY run_id DESC LIMIT 1 OFFSET ?", (self.keep_runs - 1,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM flagged_projects WHERE run_id < ?", (row["run_id"],))
+        conn.execute("DELETE FROM analysis_runs WHERE run_id < ?", (row["run_id"],))
+
+    def list_runs(self, limit=50):
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute(
+                """
+                SELECT r.run_id, r.created_at, r.source, r.period, COUNT(f.id) AS flagged_count
+                FROM analysis_runs r LEFT JOIN flagged_projects f ON f.run_id = r.run_id
+                GROUP BY r.run_id ORDER BY r.run_id DESC LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_run_id(self, conn):
+        row = conn.execute("SELECT MAX(run_id) AS run_id FROM analysis_runs").fetchone()
+        return row["run_id"]
+
+    def project_flags(self, project_name, limit=200):
+        """某项目在各次分析中被哪些分析器标记（新→旧）"""
+        with closing(connect(self.db_path)) as conn:
+            rows = conn.execute(
+                """
+                SELECT f.run_id, r.created_at, r.period, f.analyzer, f.sheet_name, f.loss_amount, f.record
+                FROM flagged_projects f JOIN analysis_runs r ON r.run_id = f.run_id
+                WHERE f.project_name = ?
+                ORDER BY f.run_id DESC LIMIT ?
+                """,
+                (project_name, limit),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def leader_flags(self, leader, run_id=None, limit=200):
+        """某负责人名下被标记的项目（默认最近一次分析）"""
+        with closing(connect(self.db_path)) as conn:
+            run_id = run_id or self.latest_run_id(conn)
+            rows = conn.execute(
+                """
+                SELECT run_id, project_name, analyzer, sheet_name, loss_amount, record
+                FROM flagged_projects WHERE leader = ? AND run_id = ?
+                ORDER BY loss_amount DESC LIMIT ?
+                """,
+                (leader, run_id, limit),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def top_losses(self, category=None, category_class=None, analyzer=None, run_id=None, limit=50):
+        """按亏损金额倒序返回被标记项目（按项目去重，默认最近一次分析）"""
+        conditions = ["run_id = ?", "loss_amount IS NOT NULL"]
+        with closing(connect(self.db_path)) as conn:
+            params = [run_id or self.latest_run_id(conn)]
+            if category:
+                conditions.append("category = ?")
+                params.append(category)
+            if category_class:
+                conditions.append("category_class = ?")
+                params.append(category_class)
+            if analyzer:
+                # 先确定按分析器类名还是结果表名过滤，单列条件才能走对应索引
+                conditions.append(f"{self._analyzer_column(conn, params[0], analyzer)} = ?")
+                params.append(analyzer)
+            # 每个项目取亏损金额最大的一条标记（同额取最早写入的一条），记录与金额来自同一行
+            rows = conn.execute(
+                f"""
+                SELECT run_id, project_name, leader, category, category_class, loss_amount, sheet_names, record
+                FROM (
+                    SELECT run_id, project_name, leader, category, category_class, loss_amount, record,
+                           ROW_NUMBER() OVER (PARTITION BY project_name ORDER BY loss_amount DESC, id) AS rank,
+                           GROUP_CONCAT(sheet_name, '、') OVER (PARTITION BY project_name) AS sheet_names
+                    FROM flagged_projects
+                    WHERE {" AND ".join(conditions)}
+                )
+                WHERE rank = 1
+                ORDER BY loss_amount DESC LIMIT ?
+                """,
+                (*params, limit),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    @staticmethod
+    def _analyzer_column(conn, run_id, analyzer):
+        """analyzer 参数为分析器类名时按 analyzer 列过滤，否则视为结果表名"""
+        row = conn.execute(
+            "SELECT 1 FROM flagged_projects WHERE run_id = ? AND analyzer = ? LIMIT 1", (run_id, analyzer)
+        ).fetchone()
+        return "analyzer" if row is not None else "sheet_name"
+
+    @staticmethod
+    def _row(row):
+        item = dict(row)
+        if "record" in item:
+            item["record"] = json.loads(item["record"])
+        return item
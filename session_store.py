@@ -0,0 +1,180 @@
+"""
+分析会话：一次上传分析的结果保留在服务端，按结果分组（各分析器结果表、分类统计、低额亏损）
+以游标分页返回，前端可先加载首页、再按需加载后续页。
+
+会话保存在当前进程内存中（多进程部署需配合会话粘滞），超过有效期或数量上限时按最近使用淘汰。
+"""
+import base64
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from amount_parser import parse_amounts
+
+SESSION_TTL_SECONDS = int(os.environ.get("ANALYSIS_SESSION_TTL", "3600"))
+MAX_SESSIONS = int(os.environ.get("ANALYSIS_MAX_SESSIONS", "20"))
+SORT_OPTIONS = ("none", "loss_desc", "loss_asc")
+CLASSIFICATION_BUCKETS = ("all", "one_exception", "two_exceptions", "more_than_two_exceptions")
+LOW_LOSS_BUCKET = "low_loss_projects"
+
+
+def encode_cursor(offset, sort):
+    raw = json.dumps({"o": offset, "s": sort}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (offset, sort)；格式错误或偏移量为负时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset, sort = int(data["o"]), str(data["s"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"无效的分页游标：{cursor}") from e
+    if offset < 0:
+        raise ValueError(f"无效的分页游标：{cursor}")
+    return offset, sort
+
+
+class AnalysisSession:
+    """单次分析的结果快照：分析器结果为 DataFrame，分类统计为记录列表"""
+
+    def __init__(self, frames, classification, loss_col=None, name_col=None, source=None):
+        self.session_id = uuid.uuid4().hex
+        self.source = source
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.frames = frames  # {结果分组名: DataFrame}
+        self.classification = classification  # {分类名: [项目统计]}
+        self.loss_col = loss_col
+        self.name_col = name_col
+        self._orders = {}  # (分组, 排序) -> 行序
+        self._loss_by_project = None
+        self.exports = {}  # {导出格式: 已写出的导出文件路径}，会话释放时删除
+
+    def close(self):
+        """删除会话已写出的导出文件"""
+        for path in self.exports.values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.exports.clear()
+
+    def buckets(self):
+        """各结果分组的总条数"""
+        counts = {name: len(df) for name, df in self.frames.items()}
+        counts.update({name: len(items) for name, items in self.classification.items()})
+        return counts
+
+    def rule_frames(self):
+        """各分析规则的命中行（不含低额亏损分组）"""
+        return {name: df for name, df in self.frames.items() if name != LOW_LOSS_BUCKET}
+
+    def page(self, bucket, cursor=None, page_size=100, sort="none"):
+        """返回一页结果：(总数, 本页 DataFrame 或记录列表, 下一页游标)"""
+        if sort not in SORT_OPTIONS:
+            raise ValueError(f"不支持的排序方式：{sort}（可选 {', '.join(SORT_OPTIONS)}）")
+        offset = 0
+        if cursor:
+            offset, cursor_sort = decode_cursor(cursor)
+            if cursor_sort != sort:
+                raise ValueError(f"分页游标的排序方式（{cursor_sort}）与请求的 sort（{sort}）不一致")
+        order = self._order(bucket, sort)
+        total = len(order)
+        if offset and offset >= total:
+            raise ValueError(f"分页游标超出结果范围（共 {total} 条）")
+        positions = order[offset:offset + page_size]
+        if bucket in self.frames:
+            items = self.frames[bucket].iloc[positions]
+        else:
+            source = self.classification[bucket]
+            items = [source[i] for i in positions]
+        next_offset = offset + len(positions)
+        next_cursor = encode_cursor(next_offset, sort) if next_offset < total else None
+        return total, items, next_cursor
+
+    def _order(self, bucket, sort):
+        key = (bucket, sort)
+        if key in self._orders:
+            return self._orders[key]
+        if bucket in self.frames:
+            df = self.frames[bucket]
+            n = len(df)
+            if sort == "none" or self.loss_col is None or self.loss_col not in df.columns:
+                order = np.arange(n)
+            else:
+                order = self._sorted_positions(parse_amounts(df[self.loss_col])[0].to_numpy(), sort)
+        elif bucket in self.classification:
+            items = self.classification[bucket]
+            if sort == "none":
+                order = np.arange(len(items))
+            else:
+                loss_map = self._project_losses()
+                losses = np.array([loss_map.get(item["project_name"], np.nan) for item in items], dtype=float)
+                order = self._sorted_positions(losses, sort)
+        else:
+            raise KeyError(bucket)
+        self._orders[key] = order
+        return order
+
+    @staticmethod
+    def _sorted_positions(values, sort):
+        """稳定排序，缺失值排在最后"""
+        keys = -values if sort == "loss_desc" else values
+        keys = np.where(np.isnan(keys), np.inf, keys)
+        return np.argsort(keys, kind="stable")
+
+    def _project_losses(self):
+        """项目名称 → 亏损金额（取自各分析器结果）"""
+        if self._loss_by_project is None:
+            self._loss_by_project = {}
+            for df in self.frames.values():
+                if self.loss_col in df.columns and self.name_col in df.columns:
+                    losses, _ = parse_amounts(df[self.loss_col])
+                    self._loss_by_project.update(zip(df[self.name_col].tolist(), losses.tolist()))
+        return self._loss_by_project
+
+
+class SessionStore:
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_sessions=MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, session):
+        with self._lock:
+            self._expire()
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)[1].close()
+        return session.session_id
+
+    def get(self, session_id):
+        """获取会话（刷新最近使用时间），不存在或已过期返回 None"""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.time()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def _expire(self):
+        now = time.time()
+        for session_id in [sid for sid, s in self._sessions.items() if now - s.last_access > self.ttl_seconds]:
+            self._sessions.pop(session_id).close()
@@ -0,0 +1,160 @@
+"""
+进程池分析：把分析所需的数值列与分类列（编码）一次性放入共享内存，工作进程直接映射为只读数组并重建
+DataFrame（不复制、不序列化整表），各分析器在工作进程中执行，只返回命中行的位置；主进程按位置取回结果行。
+
+- 数值 / 布尔 / 日期列：整列放入共享内存；
+- 分类列：编码放入共享内存，类别值随列描述传递；
+- 文本等其他列无法零拷贝共享，在工作进程启动时按值传递一次（不随每个分析器重复传递）。
+
+分析器的统计状态（如负责人次数）随分析器对象返回主进程；命中行 DataFrame 不经进程间传递，
+只回传分析器新增或改写（如清理负责人名称）的列。
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from loss_analyzer import LossDataAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# 分析器进程数：0 / 1 为在当前进程内逐个执行
+MAX_WORKERS = int(os.environ.get("ANALYSIS_ANALYZER_WORKERS", "0"))
+SHARED_KINDS = "biufmM"  # 可按原始字节共享的 numpy 类型：布尔、整数、浮点、时间差、日期
+
+_state = {}
+
+
+class SharedFrame:
+    """将 DataFrame 的列放入共享内存，生成工作进程重建 DataFrame 所用的列描述"""
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.blocks = []
+        self.spec = []  # [(列名, 类型, 参数)]，类型为 array / categorical / value
+        try:
+            for i, name in enumerate(df.columns):
+                series = df.iloc[:, i]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    values = series.array
+                    self.spec.append((name, "categorical", (
+                        self._share(values.codes), values.categories, values.ordered,
+                    )))
+                elif isinstance(series.dtype, np.dtype) and series.dtype.kind in SHARED_KINDS:
+                    # 按 numpy 类型判断：Series.array 对数值列返回 NumpyExtensionArray，其 dtype 不是 np.dtype
+                    self.spec.append((name, "array", self._share(series.to_numpy())))
+                else:
+                    self.spec.append((name, "value", series.array))
+        except Exception:
+            self.close()
+            raise
+
+    def _share(self, values):
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self.blocks.append(shm)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+        return shm.name, values.dtype.str
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_frame(spec, n_rows):
+    """按列描述重建 DataFrame（共享内存列为只读视图），返回 (共享内存句柄列表, DataFrame)"""
+    blocks = []
+
+    def attach(name, dtype):
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        array = np.ndarray((n_rows,), dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False  # 各进程共享同一份数据，分析器不得原地修改
+        return array
+
+    data = {}
+    for i, (_, kind, params) in enumerate(spec):
+        if kind == "array":
+            data[i] = attach(*params)
+        elif kind == "categorical":
+            codes, categories, ordered = params
+            data[i] = pd.Categorical.from_codes(attach(*codes), categories=categories, ordered=ordered)
+        else:
+            data[i] = params
+    df = pd.DataFrame(data, index=pd.RangeIndex(n_rows), copy=False)
+    df.columns = [name for name, _, _ in spec]  # 列名可能重复，按位置构造后再命名
+    return blocks, df
+
+
+def _init_worker(spec, n_rows):
+    _state["blocks"], _state["df"] = attach_frame(spec, n_rows)
+
+
+def _changed_columns(analyzed, df):
+    """结果中新增的列，以及取值或类型与输入不同的列（只含命中行）"""
+    source = df.loc[analyzed.index]
+    changed = [
+        c for c in dict.fromkeys(analyzed.columns)
+        if c not in source.columns or not analyzed[c].equals(source[c])
+    ]
+    return analyzed[changed] if changed else None
+
+
+def run_analyzer(cfg):
+    """在工作进程中执行单个分析器，返回 (分析器, 是否成功, 命中行位置, 新增 / 改写列, 低额亏损行位置)
+
+    返回的分析器不含结果 DataFrame。
+    """
+    df = _state["df"]
+    analyzer = cfg["class"](original_columns=list(df.columns))
+    if not analyzer.analyze(df=df, **cfg["analyze_kwargs"]):
+        return analyzer, False, None, None, None
+    analyzed = analyzer.get_analyzed_data()
+    low_loss = None
+    if isinstance(analyzer, LossDataAnalyzer):
+        low_loss = analyzer.get_low_loss_data().index.to_numpy()
+        analyzer.low_loss_data = None
+    analyzer.analyzed_data = None
+    return analyzer, True, analyzed.index.to_numpy(), _changed_columns(analyzed, df), low_loss
+
+
+class SharedMemoryAnalysisRunner:
+    def __init__(self, analyzers_config, max_workers=MAX_WORKERS):
+        self.analyzers_config = analyzers_config
+        self.max_workers = max_workers
+
+    def run(self, df, column_positions, original_columns):
+        """以进程池执行全部分析器，按配置顺序逐个产出 (分析器, 是否成功)
+
+        进程池与共享内存在生成器结束或关闭时释放；调用方取完所需结果后须调用生成器的 close()
+        （如 contextlib.closing），不能依赖垃圾回收。
+
+        df 的列按 column_positions 裁剪后放入共享内存；分析器的结果按命中行位置从 df 取回，
+        再替换为工作进程回传的新增 / 改写列，与在当前进程内执行的结果一致。
+        """
+        workers = min(self.max_workers, len(self.analyzers_config))
+        with SharedFrame(df.iloc[:, column_positions]) as shared:
+            logger.info(f"进程池分析：{len(self.analyzers_config)} 个分析器，{workers} 个进程，"
+                        f"共享内存 {sum(shm.size for shm in shared.blocks) / 1024 ** 2:.1f} MB")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.spec, shared.n_rows)) as pool:
+                for analyzer, success, positions, changed, low_loss in pool.map(run_analyzer, self.analyzers_config):
+                    analyzer.original_columns = original_columns
+                    if success:
+                        result = df.iloc[positions][original_columns]
+                        for col in [] if changed is None else changed.columns:
+                            result[col] = changed[col].array  # 按位置写回，保持扩展类型
+                        analyzer.analyzed_data = result
+                        if low_loss is not None:
+                            analyzer.low_loss_data = df.iloc[low_loss]
+                    yield analyzer, success
@@ -0,0 +1,94 @@
+"""
+分析结果汇总统计：在服务端向量化计算看板所需的聚合数据，替代前端下载全部命中行后自行汇总。
+
+- 各规则命中行数与亏损金额合计；
+- 被标记项目（各规则命中行去重）按项目类别、项目负责人的项目数与亏损金额合计；
+- 被标记项目亏损金额的分布直方图与分位数。
+"""
+import numpy as np
+import pandas as pd
+
+from amount_parser import parse_amounts
+from excel_reader import find_column
+
+PERCENTILES = (50, 75, 90, 95, 99)
+DEFAULT_BINS = 20
+DEFAULT_TOP_LEADERS = 50
+# 汇总使用的列：统计键 → 台账列名（按 _find_col 规则匹配）
+SUMMARY_COLUMNS = {"loss": "亏损金额", "category": "项目类别", "leader": "项目负责人"}
+
+
+def _losses(df):
+    col = find_column(df.columns, SUMMARY_COLUMNS["loss"])
+    if col is None:
+        return pd.Series(np.nan, index=df.index, dtype="float64")
+    return parse_amounts(df[col])[0]
+
+
+def _summary_frame(df):
+    """取出汇总所需的列（亏损金额解析为数值，缺失列为空），保持行索引"""
+    data = {"loss": _losses(df)}
+    for key in ("category", "leader"):
+        col = find_column(df.columns, SUMMARY_COLUMNS[key])
+        data[key] = pd.Series(None, index=df.index, dtype=object) if col is None else df[col].astype(object)
+    return pd.DataFrame(data, index=df.index)
+
+
+def _loss_sum(losses):
+    return float(losses.sum()) if len(losses) else 0.0
+
+
+def _group_stats(df, key, limit=None):
+    """按 key 列分组统计项目数与亏损金额合计，按亏损金额降序"""
+    grouped = df.groupby(key, dropna=False, sort=False)["loss"].agg(["size", "sum"])
+    grouped = grouped.sort_values(["sum", "size"], ascending=False)
+    if limit is not None:
+        grouped = grouped.head(limit)
+    return [
+        {"name": None if pd.isna(name) else str(name), "count": int(size), "loss_sum": float(total)}
+        for name, size, total in zip(grouped.index, grouped["size"], grouped["sum"])
+    ]
+
+
+def _distribution(losses, bins):
+    values = losses.dropna().to_numpy(dtype="float64")
+    if len(values) == 0:
+        return {"edges": [], "counts": []}, {f"p{p}": None for p in PERCENTILES}
+    counts, edges = np.histogram(values, bins=bins)
+    quantiles = np.percentile(values, PERCENTILES)
+    return (
+        {"edges": edges.tolist(), "counts": counts.tolist()},
+        {f"p{p}": float(q) for p, q in zip(PERCENTILES, quantiles)},
+    )
+
+
+def summarize_frames(rule_frames, ledger=None, bins=DEFAULT_BINS, top_leaders=DEFAULT_TOP_LEADERS, ranking_rules=()):
+    """根据 {结果表名: 命中行 DataFrame}（行索引为台账行号）计算汇总统计；ledger 为全表时附台账合计
+
+    ranking_rules 为排名清单类结果表（如前 K 名），只计入 by_rule，不计入被标记项目。
+    """
+    by_rule = {}
+    parts = []
+    for name, df in rule_frames.items():
+        part = _summary_frame(df)
+        by_rule[name] = {"count": len(part), "loss_sum": _loss_sum(part["loss"])}
+        if name not in ranking_rules:
+            parts.append(part)
+
+    # 同一行可能被多条规则标记，按台账行号去重
+    flagged = pd.concat(parts) if parts else _summary_frame(pd.DataFrame())
+    flagged = flagged[~flagged.index.duplicated()]
+    histogram, percentiles = _distribution(flagged["loss"], bins)
+
+    summary = {
+        "by_rule": by_rule,
+        "flagged": {"count": len(flagged), "loss_sum": _loss_sum(flagged["loss"])},
+        "by_category": _group_stats(flagged, "category"),
+        "by_leader": _group_stats(flagged, "leader", limit=top_leaders),
+        "leader_count": int(flagged["leader"].nunique()),
+        "loss_histogram": histogram,
+        "loss_percentiles": percentiles,
+    }
+    if ledger is not None:
+        summary["ledger"] = {"rows": len(ledger), "loss_sum": _loss_sum(_losses(ledger))}
+    return summary
@@ -0,0 +1,39 @@
+"""测试公共设置：模块位于仓库根目录；台账缓存、数据库与剖析报告写入临时目录"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 须在导入 api 之前设置：各存储在模块导入时按环境变量确定位置
+_STATE_DIR = tempfile.mkdtemp(prefix="analysis-tests-")
+atexit.register(shutil.rmtree, _STATE_DIR, ignore_errors=True)
+os.environ.setdefault("ANALYSIS_CACHE_DIR", os.path.join(_STATE_DIR, "ledger_cache"))
+os.environ.setdefault("ANALYSIS_PROFILE_DIR", os.path.join(_STATE_DIR, "profiles"))
+os.environ.setdefault("ANALYSIS_DB_PATH", os.path.join(_STATE_DIR, "analysis.db"))
+
+from ledger_generator import generate_ledger  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def ledger_path(tmp_path_factory):
+    """300 行合成台账（xlsx）"""
+    path = tmp_path_factory.mktemp("ledgers") / "ledger_300.xlsx"
+    generate_ledger(str(path), 300, seed=0)
+    return str(path)
+
+
+@pytest.fixture
+def client():
+    """共用一个事件循环的测试客户端（与 uvicorn 单进程一致）"""
+    from fastapi.testclient import TestClient
+
+    import api
+
+    with TestClient(api.app) as test_client:
+        yield test_client
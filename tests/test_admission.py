@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import api
+from admission import AdmissionController, AdmissionError
+
+
+def _upload(client, path, url="/upload_and_analyze_json/"):
+    with open(path, "rb") as f:
+        return client.post(url, files={"file": ("ledger.xlsx", f)})
+
+
+def test_oversized_upload_rejected():
+    controller = AdmissionController(max_upload_bytes=100)
+    with pytest.raises(AdmissionError) as exc:
+        controller.acquire(101)
+    assert exc.value.status_code == 413
+    assert controller.active == 0
+
+
+@pytest.mark.parametrize("url", ["/upload_and_analyze_json/", "/sessions/"])
+def test_concurrent_upload_rejected_with_retry_after(client, ledger_path, monkeypatch, url):
+    """第一个请求占用唯一解析名额期间，第二个请求立即得到 429 与 Retry-After"""
+    monkeypatch.setattr(api.admission_controller, "max_concurrent", 1)
+    entered, release = threading.Event(), threading.Event()
+    upload_excel = api.AnalysisAPI.upload_excel
+
+    def blocking_upload(self, file, engine=None):
+        entered.set()
+        release.wait(30)
+        return upload_excel(self, file, engine=engine)
+
+    monkeypatch.setattr(api.AnalysisAPI, "upload_excel", blocking_upload)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(_upload, client, ledger_path, url)
+        try:
+            assert entered.wait(30), "第一个请求未开始解析"
+            second = _upload(client, ledger_path, url)
+        finally:
+            release.set()
+        assert first.result().status_code == 200
+
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == str(api.admission_controller.retry_after)
+    assert api.admission_controller.active == 0
+
+
+def test_declared_oversize_rejected_before_body_is_read(monkeypatch):
+    monkeypatch.setattr(api.admission_controller, "max_upload_bytes", 1024)
+    received, sent = [], []
+
+    async def receive():
+        received.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/upload_and_analyze_json/", "raw_path": b"/upload_and_analyze_json/", "root_path": "",
+        "query_string": b"", "server": ("testserver", 80), "client": ("testclient", 50000),
+        "headers": [(b"content-type", b"multipart/form-data; boundary=x"), (b"content-length", b"10000000")],
+    }
+    asyncio.run(api.app(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert received == []
+    assert api.admission_controller.active == 0
+
+
+def test_chunked_upload_checked_after_receipt(client, ledger_path, monkeypatch):
+    """未声明 Content-Length 的分块上传在接收完成后按实际大小拒绝"""
+    monkeypatch.setattr(api.admission_controller, "max_upload_bytes", 1024)
+    with open(ledger_path, "rb") as f:
+        content = f.read()
+    boundary = "ledgerboundary"
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"ledger.xlsx\"\r\n"
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    response = client.post(
+        "/upload_and_analyze_json/", content=iter([body[:4096], body[4096:]]),
+        headers={"content-type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert response.status_code == 413
+    assert "上传文件过大" in response.json()["detail"]
+
+
+def test_small_declared_upload_passes_precheck(client, ledger_path):
+    assert _upload(client, ledger_path).status_code == 200
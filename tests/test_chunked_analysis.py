@@ -0,0 +1,46 @@
+import pytest
+
+from amount_parser import parse_amounts
+from analyzer_registry import analyzers_config
+from chunked_analysis import ChunkedAnalysisRunner
+from excel_reader import find_column, load_ledger
+from ledger_generator import generate_ledger
+from loss_analyzer import LossDataAnalyzer
+
+
+@pytest.fixture(scope="module")
+def ledger(tmp_path_factory):
+    path = tmp_path_factory.mktemp("chunked") / "ledger_3000.xlsx"
+    generate_ledger(str(path), 3000, seed=5)
+    return str(path)
+
+
+def _loss_key(df):
+    """(亏损金额, 项目编号) 集合，与索引无关"""
+    columns = list(df.columns)
+    loss = parse_amounts(df[find_column(columns, "亏损金额")])[0]
+    return sorted(zip(loss, df[find_column(columns, "项目编号")]))
+
+
+def test_low_loss_keeps_largest_rows_per_chunk(ledger):
+    columns, df = load_ledger(ledger)
+    full = LossDataAnalyzer(columns)
+    assert full.analyze(df), full.get_logs()
+    expected = full.get_low_loss_data()
+    assert len(expected) > 200
+
+    config = [cfg for cfg in analyzers_config() if cfg["class"] is LossDataAnalyzer]
+    runner = ChunkedAnalysisRunner(config, chunk_size=500, low_loss_limit=200)
+    _, results, low_loss = runner.run(ledger)
+
+    assert runner.low_loss_total == len(expected)
+    assert len(low_loss) == 200
+    assert _loss_key(low_loss) == _loss_key(expected)[-200:]
+    assert len(results[0]) == len(full.get_analyzed_data())
+
+
+def test_low_loss_under_limit_is_complete(ledger):
+    config = [cfg for cfg in analyzers_config() if cfg["class"] is LossDataAnalyzer]
+    runner = ChunkedAnalysisRunner(config, chunk_size=1000, low_loss_limit=10000)
+    _, _, low_loss = runner.run(ledger)
+    assert len(low_loss) == runner.low_loss_total
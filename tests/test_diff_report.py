@@ -0,0 +1,28 @@
+import pandas as pd
+
+from diff_report import diff_rule
+
+
+def _flagged(names, losses, start=1):
+    return pd.DataFrame({
+        "序号": range(start, start + len(names)),
+        "项目名称": names,
+        "亏损金额": losses,
+    })
+
+
+def test_shifted_serial_numbers_are_not_changes():
+    previous = _flagged(["项目A", "项目B", "项目C"], [10.0, 20.0, 30.0])
+    # 本期在顶部插入一个项目，其后各行序号整体加一
+    current = _flagged(["项目N", "项目A", "项目B", "项目C"], [5.0, 10.0, 20.0, 30.0])
+    report = diff_rule(previous, current)
+    assert report["counts"]["new"] == 1
+    assert report["counts"]["changed"] == 0
+    assert report["counts"]["unchanged"] == 3
+
+
+def test_content_change_lists_only_content_fields():
+    previous = _flagged(["项目A", "项目B"], [10.0, 20.0])
+    current = _flagged(["项目A", "项目B"], [10.0, 25.0], start=7)
+    report = diff_rule(previous, current)
+    assert [(item["key"], item["changed_fields"]) for item in report["changed"]] == [("项目B", ["亏损金额"])]
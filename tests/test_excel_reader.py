@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pandas as pd
+
+from api import AnalysisAPI, convert_all_non_json_compliant_to_string
+from excel_reader import STRING_DTYPE, build_typed_frame
+
+
+def _json_records(df):
+    return convert_all_non_json_compliant_to_string(AnalysisAPI().frame_to_records(df))
+
+
+def test_empty_cells_serialize_alike_for_every_column_type():
+    """文本、分类、数值、全空与混合类型列的空单元格在 JSON 中均为 "" """
+    columns = ["项目编号", "项目负责人", "合同金额", "备注", "是否结算", "开工日期"]
+    values = [["XM1", None], ["王伟", None], [1.5, None], [None, None], [True, None],
+              [datetime(2021, 5, 12), None]]
+    df = build_typed_frame(values, columns)
+    assert df["项目编号"].dtype == STRING_DTYPE
+    assert isinstance(df["项目负责人"].dtype, pd.CategoricalDtype)
+    assert df["备注"].dtype == object and df["是否结算"].dtype == object
+
+    records = _json_records(df)
+    assert records[0] == {"项目编号": "XM1", "项目负责人": "王伟", "合同金额": "1.5", "备注": "",
+                          "是否结算": "True", "开工日期": "2021-05-12 00:00:00"}
+    assert records[1] == dict.fromkeys(columns, "")
+
+
+def test_missing_datetime_serializes_as_empty_string():
+    df = pd.DataFrame({"开工日期": pd.to_datetime(["2021-05-12", None])})
+    assert _json_records(df) == [{"开工日期": "2021-05-12 00:00:00"}, {"开工日期": ""}]
+
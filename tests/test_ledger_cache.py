@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+
+import ledger_cache
+from ledger_cache import LedgerCache
+
+
+def test_hit_survives_eviction_before_utime(tmp_path, monkeypatch):
+    cache = LedgerCache(cache_dir=str(tmp_path))
+    columns = ["项目编号", "亏损金额"]
+    df = pd.DataFrame({"项目编号": ["P1", "P2"], "亏损金额": [1.0, 2.0]})
+    assert cache.put("k", columns, df)
+
+    real_utime = os.utime
+
+    def evicted_utime(path, *args, **kwargs):
+        os.remove(path)  # 读取完成后、记录使用时间前被其他进程淘汰
+        return real_utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(ledger_cache.os, "utime", evicted_utime)
+    cached_columns, cached = cache.get("k")
+    assert cached_columns == columns
+    assert cached["亏损金额"].tolist() == [1.0, 2.0]
+    assert cache.get("k") is None
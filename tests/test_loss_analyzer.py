@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from amount_parser import parse_amounts
+from excel_reader import load_ledger
+from ledger_generator import generate_ledger
+from loss_analyzer import EXCEEDED_COST_COLUMN, LossDataAnalyzer
+
+# 改为按列名规则识别成本列之前固定读取的五个成本列
+FIXED_COST_TYPES = ["劳务费", "材料费", "设备机械租赁费", "技术服务、咨询费", "专业分包"]
+
+
+def _amount(df, name):
+    col = next(c for c in df.columns if c.endswith(name))
+    return parse_amounts(df[col])[0]
+
+
+def _fixed_column_result(df):
+    """固定五个成本列时的筛选逻辑：返回 (命中行索引, 低额亏损行索引, {命中行索引: 超比例成本类型})"""
+    loss, settlement, contract = (_amount(df, n) for n in ("亏损金额", "项目结算金额", "合同金额"))
+    costs = {t: _amount(df, f"项目主要成本情况_{t}_结算") for t in FIXED_COST_TYPES}
+    valid = (loss.notna() & settlement.notna()) | (loss.notna() & contract.notna())
+    for cost in costs.values():
+        valid |= cost.notna() & contract.notna()
+    exceeded = pd.DataFrame({t: cost / contract >= 0.5 for t, cost in costs.items()})
+    flagged = valid & ((loss >= settlement) | (loss >= contract) | exceeded.any(axis=1))
+    types = {i: "、".join(t for t in FIXED_COST_TYPES if exceeded.at[i, t]) for i in df.index[flagged]}
+    low_loss = df.index[(loss < 100000) & loss.notna()]
+    return list(df.index[flagged]), list(low_loss), types
+
+
+@pytest.fixture(scope="module")
+def ledger(tmp_path_factory):
+    path = tmp_path_factory.mktemp("loss") / "ledger_2000.xlsx"
+    generate_ledger(str(path), 2000, seed=3)
+    return load_ledger(str(path))
+
+
+def test_matches_fixed_cost_column_rules(ledger):
+    columns, df = ledger
+    analyzer = LossDataAnalyzer(columns)
+    assert analyzer.analyze(df), analyzer.get_logs()
+    result = analyzer.get_analyzed_data()
+
+    flagged, low_loss, types = _fixed_column_result(df)
+    assert 0 < len(flagged) < len(df)
+    assert list(result.index) == flagged
+    assert list(analyzer.get_low_loss_data().index) == low_loss
+    assert list(result.columns) == columns + [EXCEEDED_COST_COLUMN]
+    assert result[EXCEEDED_COST_COLUMN].to_dict() == types
+    assert (result[EXCEEDED_COST_COLUMN] != "").any()
+
+
+def test_added_cost_column_is_evaluated(ledger):
+    columns, df = ledger
+    new_col = "项目主要成本情况_保险费_结算"
+    df = df.assign(**{new_col: np.nan})
+    contract = _amount(df, "合同金额")
+    target = df.index[contract.notna() & (contract > 0)][0]
+    df.loc[target, new_col] = contract[target]
+    analyzer = LossDataAnalyzer(columns + [new_col])
+    assert analyzer.analyze(df), analyzer.get_logs()
+    result = analyzer.get_analyzed_data()
+    assert "保险费" in result.at[target, EXCEEDED_COST_COLUMN].split("、")
@@ -0,0 +1,46 @@
+import pytest
+
+from excel_reader import load_ledger
+from ledger_generator import generate_ledger
+from memory_profile import MEMORY_BUDGETS, STAGES, _parse_budgets, budget_bytes, check_budgets, profile_pipeline
+
+
+@pytest.fixture(scope="module")
+def ledgers(tmp_path_factory):
+    """不同行数的合成台账；2000 行另存为 csv / parquet"""
+    directory = tmp_path_factory.mktemp("memory")
+    paths = {}
+    for rows in (500, 2000, 5000):
+        path = directory / f"ledger_{rows}.xlsx"
+        generate_ledger(str(path), rows, seed=0)
+        paths["xlsx", rows] = str(path)
+    _, df = load_ledger(paths["xlsx", 2000])
+    paths["csv", 2000] = str(directory / "ledger_2000.csv")
+    df.to_csv(paths["csv", 2000], index=False)
+    paths["parquet", 2000] = str(directory / "ledger_2000.parquet")
+    df.to_parquet(paths["parquet", 2000], index=False)
+    return paths
+
+
+@pytest.mark.parametrize("fmt, rows", [("xlsx", 500), ("xlsx", 2000), ("xlsx", 5000), ("csv", 2000), ("parquet", 2000)])
+def test_pipeline_stays_within_budget(ledgers, fmt, rows):
+    measured_rows, stages = profile_pipeline(ledgers[fmt, rows])
+    assert measured_rows == rows
+    assert [stage["stage"] for stage in stages] == list(STAGES)
+    assert check_budgets(stages, measured_rows, MEMORY_BUDGETS[fmt]) == []
+
+
+def test_budget_grows_with_rows():
+    stages = [{"stage": "serialize", "peak_bytes": 20 * 1024 ** 2}]
+    budgets = {"serialize": (16.0, 6.0)}
+    assert budget_bytes(budgets["serialize"], 0) == 16 * 1024 ** 2
+    assert check_budgets(stages, 1000, budgets) == []
+    assert check_budgets(stages, 100, budgets) == [("serialize", 20 * 1024 ** 2, budget_bytes((16.0, 6.0), 100))]
+
+
+def test_budget_override_parsing():
+    budgets = _parse_budgets(["upload=2:0.5"], "csv")
+    assert budgets["upload"] == (2.0, 0.5)
+    assert budgets["export"] == MEMORY_BUDGETS["csv"]["export"]
+    with pytest.raises(Exception):
+        _parse_budgets(["upload=40"], "csv")
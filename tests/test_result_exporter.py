@@ -0,0 +1,34 @@
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+from result_exporter import export_results
+
+
+@pytest.fixture
+def frames():
+    separators = "第一行\u2028第二行\u2029第三行\x85第四行\x1c\x1d\x1e\v\f末尾"
+    return {
+        "亏损大于1000万": pd.DataFrame({"项目名称": ["项目A", "项目B"], "备注": [separators, "普通\n换行"]}),
+        "空表": pd.DataFrame({"项目名称": []}),
+    }
+
+
+def test_ndjson_keeps_unicode_line_separators_inside_records(frames, tmp_path):
+    path = tmp_path / "results.ndjson"
+    export_results(frames, "ndjson", str(path))
+    with open(path, "rb") as f:
+        lines = f.read().decode("utf-8").split("\n")
+    assert lines[-1] == ""
+    records = [json.loads(line) for line in lines[:-1]]
+    assert [r["record"]["备注"] for r in records] == list(frames["亏损大于1000万"]["备注"])
+    assert {r["sheet_name"] for r in records} == {"亏损大于1000万"}
+
+
+def test_csv_bundle_contains_one_file_per_sheet(frames, tmp_path):
+    path = tmp_path / "results.zip"
+    export_results(frames, "csv", str(path))
+    with zipfile.ZipFile(path) as archive:
+        assert sorted(archive.namelist()) == ["亏损大于1000万.csv", "空表.csv"]
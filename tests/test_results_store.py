@@ -0,0 +1,62 @@
+import pytest
+
+from results_store import ResultsStore
+
+
+def _record(name, loss, note, category="房建工程"):
+    return {"项目名称": name, "项目负责人": "王伟", "项目类别": category, "亏损金额": loss, "备注": note}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(db_path=str(tmp_path / "analysis.db"))
+    store.save_run([
+        {"analyzer_name": "LossOverAnalyzer", "sheet_name": "亏损大于1000万",
+         "data": [_record("项目A", 2000, "A-超1000万"), _record("项目B", 1500, "B-超1000万")]},
+        {"analyzer_name": "DesignAnalyzer", "sheet_name": "亏损大于合同",
+         "data": [_record("项目A", 3000, "A-超合同"), _record("项目C", 100, "C-超合同")]},
+    ])
+    return store
+
+
+def test_top_losses_record_belongs_to_max_loss_row(store):
+    result = store.top_losses()
+    assert [(r["project_name"], r["loss_amount"]) for r in result] == [("项目A", 3000), ("项目B", 1500), ("项目C", 100)]
+    top = result[0]
+    assert top["record"]["亏损金额"] == top["loss_amount"]
+    assert top["record"]["备注"] == "A-超合同"
+    assert sorted(top["sheet_names"].split("、")) == ["亏损大于1000万", "亏损大于合同"]
+
+
+@pytest.mark.parametrize("analyzer", ["LossOverAnalyzer", "亏损大于1000万"])
+def test_top_losses_filters_by_analyzer_or_sheet_name(store, analyzer):
+    result = store.top_losses(analyzer=analyzer)
+    assert [(r["project_name"], r["loss_amount"], r["record"]["备注"]) for r in result] == [
+        ("项目A", 2000, "A-超1000万"), ("项目B", 1500, "B-超1000万"),
+    ]
+
+
+def test_top_losses_unknown_analyzer_returns_nothing(store):
+    assert store.top_losses(analyzer="不存在的规则") == []
+
+
+def test_text_amounts_parsed_like_analyzers(tmp_path):
+    store = ResultsStore(db_path=str(tmp_path / "analysis.db"))
+    store.save_run([{"analyzer_name": "LossOverAnalyzer", "sheet_name": "亏损大于1000万", "data": [
+        _record("项目A", "12.5万", "带单位"), _record("项目B", "(3.2)", "括号负数"),
+        _record("项目C", "1,234.5", "千分位"), _record("项目D", "", "空值"),
+    ]}])
+    result = store.top_losses()
+    assert [(r["project_name"], r["loss_amount"]) for r in result] == [("项目C", 1234.5), ("项目A", 12.5), ("项目B", -3.2)]
+
+
+def test_only_recent_runs_are_kept(tmp_path):
+    store = ResultsStore(db_path=str(tmp_path / "analysis.db"), keep_runs=2)
+    runs = [
+        store.save_run([{"analyzer_name": "LossOverAnalyzer", "sheet_name": "亏损大于1000万",
+                         "data": [_record(f"项目{i}", 100 + i, "")]}])
+        for i in range(4)
+    ]
+    assert [run["run_id"] for run in store.list_runs()] == runs[:-3:-1]
+    assert store.project_flags("项目0") == []
+    assert [flag["run_id"] for flag in store.project_flags("项目3")] == [runs[-1]]
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from session_store import AnalysisSession, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def session():
+    df = pd.DataFrame({"项目名称": [f"项目{i}" for i in range(5)], "亏损金额": [30.0, 10.0, 50.0, 20.0, 40.0]})
+    return AnalysisSession(
+        frames={"亏损大于1000万": df},
+        classification={"all": [{"project_name": f"项目{i}"} for i in range(5)]},
+        loss_col="亏损金额",
+        name_col="项目名称",
+    )
+
+
+def test_cursor_pages_through_sorted_results(session):
+    seen = []
+    cursor = None
+    while True:
+        total, items, cursor = session.page("亏损大于1000万", cursor=cursor, page_size=2, sort="loss_desc")
+        seen.extend(items["亏损金额"])
+        if cursor is None:
+            break
+    assert total == 5
+    assert seen == [50.0, 40.0, 30.0, 20.0, 10.0]
+
+
+def test_negative_offset_rejected(session):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(-1, "none"))
+    with pytest.raises(ValueError):
+        session.page("亏损大于1000万", cursor=encode_cursor(-2, "none"))
+
+
+def test_offset_beyond_results_rejected(session):
+    with pytest.raises(ValueError, match="超出结果范围"):
+        session.page("亏损大于1000万", cursor=encode_cursor(10 ** 9, "none"))
+
+
+def test_cursor_sort_must_match_requested_sort(session):
+    _, _, cursor = session.page("亏损大于1000万", page_size=2, sort="loss_desc")
+    with pytest.raises(ValueError, match="不一致"):
+        session.page("亏损大于1000万", cursor=cursor, sort="none")
+
+
+def test_invalid_cursor_returns_400(client, ledger_path):
+    with open(ledger_path, "rb") as f:
+        session_id = client.post("/sessions/", files={"file": ("ledger.xlsx", f)}).json()["session_id"]
+    url = f"/sessions/{session_id}/results/all"
+    first = client.get(url, params={"page_size": 10, "sort": "loss_desc"}).json()
+    assert client.get(url, params={"cursor": first["next_cursor"], "sort": "loss_desc"}).status_code == 200
+    assert client.get(url, params={"cursor": first["next_cursor"]}).status_code == 400
+    assert client.get(url, params={"cursor": encode_cursor(-5, "none")}).status_code == 400
+    assert client.get(url, params={"cursor": encode_cursor(10 ** 9, "none")}).status_code == 400
@@ -0,0 +1,62 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import api
+from shared_analysis import SharedFrame, attach_frame
+
+
+def test_numeric_columns_go_through_shared_memory():
+    df = pd.DataFrame({
+        "合同金额": [1.5, np.nan, 3.0],
+        "序号": np.array([1, 2, 3], dtype=np.int64),
+        "项目类别": pd.Categorical(["设计", None, "施工"]),
+        "开工日期": pd.to_datetime(["2021-01-01", "2022-02-02", None]),
+        "备注": ["甲", "乙", None],
+    })
+    with SharedFrame(df) as shared:
+        assert [kind for _, kind, _ in shared.spec] == ["array", "array", "categorical", "array", "value"]
+        blocks, attached = attach_frame(shared.spec, shared.n_rows)
+        try:
+            pd.testing.assert_frame_equal(attached, df, check_dtype=False)
+            assert not attached["合同金额"].to_numpy().flags.writeable
+        finally:
+            for shm in blocks:
+                shm.close()
+
+
+def test_pool_releases_shared_memory_after_analysis(ledger_path, monkeypatch):
+    created = []
+    share = SharedFrame._share
+
+    def recording_share(self, values):
+        name, dtype = share(self, values)
+        created.append(name)
+        return name, dtype
+
+    monkeypatch.setattr(SharedFrame, "_share", recording_share)
+    # 保留生成器引用：共享内存须由分析流程显式释放，而非等待生成器被回收
+    generators = []
+    outcomes = api.AnalysisAPI._process_pool_outcomes
+
+    def recording_outcomes(self):
+        generators.append(outcomes(self))
+        return generators[-1]
+
+    monkeypatch.setattr(api.AnalysisAPI, "_process_pool_outcomes", recording_outcomes)
+    serial = api.AnalysisAPI()
+    serial.load_file(ledger_path)
+    expected, _ = serial.run_analysis_frames()
+
+    monkeypatch.setattr(api, "ANALYZER_WORKERS", 2)
+    pooled = api.AnalysisAPI()
+    pooled.load_file(ledger_path)
+    frames, _ = pooled.run_analysis_frames()
+
+    assert [df.index.tolist() for _, _, df in frames] == [df.index.tolist() for _, _, df in expected]
+    assert generators and created
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
@@ -0,0 +1,72 @@
+import io
+import json
+
+import pytest
+
+import api
+
+
+def _events(client, path, **params):
+    with open(path, "rb") as f:
+        with client.stream("POST", "/upload_and_analyze_stream/", files={"file": ("ledger.xlsx", f)},
+                           params=params) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = response.read().decode("utf-8")
+    events = []
+    for message in body.strip().split("\n\n"):
+        event, data = message.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_stream_reports_progress_in_order(client, ledger_path):
+    events = _events(client, ledger_path, export="csv")
+    names = [name for name, _ in events]
+    assert names[:2] == ["received", "header_parsed"]
+    assert names[-2:] == ["export_written", "complete"]
+    analyzers = names[names.index("analyzer_started"):-2]
+    assert analyzers == ["analyzer_started", "analyzer_finished"] * len(api.analysis_api.analyzers_config)
+    assert set(names[2:names.index("analyzer_started")]) == {"rows_loaded"}
+    assert events[names.index("analyzer_started") - 1][1]["done"] is True
+
+    finished = [data for name, data in events if name == "analyzer_finished"]
+    assert all(len(data["data"]) == data["rows"] for data in finished)
+
+    complete = events[-1][1]
+    assert complete["buckets"]
+    export = client.get(events[-2][1]["url"])
+    assert export.status_code == 200
+    assert client.get(f"/sessions/{complete['session_id']}/results/all").status_code == 200
+    assert api.admission_controller.active == 0
+
+
+def test_stream_reports_error_event_for_corrupt_upload(client, tmp_path):
+    path = tmp_path / "broken.xlsx"
+    path.write_bytes(b"not a workbook")
+    events = _events(client, path)
+    assert [name for name, _ in events] == ["received", "error"]
+    assert events[-1][1]["status_code"] == 400
+    assert api.admission_controller.active == 0
+
+
+def test_stream_rejects_unknown_export_format(client, ledger_path):
+    with open(ledger_path, "rb") as f:
+        response = client.post("/upload_and_analyze_stream/", files={"file": ("ledger.xlsx", f)},
+                               params={"export": "xml"})
+    assert response.status_code == 400
+    assert api.admission_controller.active == 0
+
+
+def test_stream_releases_slot_when_worker_cannot_start(client, monkeypatch):
+    class BrokenThread:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def start(self):
+            raise RuntimeError("can't start new thread")
+
+    monkeypatch.setattr(api.threading, "Thread", BrokenThread)
+    with pytest.raises(RuntimeError):
+        client.post("/upload_and_analyze_stream/", files={"file": ("ledger.xlsx", io.BytesIO(b"x"))})
+    assert api.admission_controller.active == 0
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from top_k_analyzer import TopKAnalyzer, top_positions
+
+COLUMNS = ["项目名称", "项目类别", "亏损金额", "合同金额"]
+
+
+def _ledger(categories, losses):
+    return pd.DataFrame({
+        "项目名称": [f"项目{i}" for i in range(len(losses))],
+        "项目类别": categories,
+        "亏损金额": losses,
+        "合同金额": [1000.0] * len(losses),
+    })
+
+
+def _top(df, **kwargs):
+    analyzer = TopKAnalyzer(COLUMNS)
+    assert analyzer.analyze(df, **kwargs), analyzer.get_logs()
+    return analyzer.get_analyzed_data()
+
+
+@pytest.mark.parametrize("categories", [
+    ["设计", None, "设计", None, "施工"],
+    pd.Categorical(["设计", None, "设计", np.nan, "施工"]),
+    ["设计", " ", "设计", None, "施工"],
+])
+def test_grouped_top_k_keeps_rows_without_category(categories):
+    df = _ledger(categories, [5.0, 100.0, 3.0, 50.0, 1.0])
+    result = _top(df, k=2, group_by="项目类别")
+    assert sorted(result["亏损金额"].tolist(), reverse=True) == [100.0, 50.0, 5.0, 3.0, 1.0]
+    # 输出保留原始类别取值，不写入“未分类”
+    assert "未分类" not in set(result["项目类别"].astype(object).dropna())
+
+
+def test_grouped_top_k_limits_each_group():
+    df = _ledger(["设计", None, "设计", None, None, "设计"], [5.0, 100.0, 3.0, 50.0, 70.0, 9.0])
+    result = _top(df, k=2, group_by="项目类别")
+    assert result["亏损金额"].tolist() == [100.0, 70.0, 9.0, 5.0]
+
+
+def test_top_positions_matches_full_sort():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, 500).astype("float64")
+    values[rng.choice(500, 30, replace=False)] = np.nan
+    valid = np.flatnonzero(~np.isnan(values))
+    expected = valid[np.lexsort((valid, -values[valid]))][:25]
+    assert top_positions(values, 25).tolist() == expected.tolist()
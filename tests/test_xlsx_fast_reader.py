@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+import xlsx_fast_reader
+from excel_reader import load_ledger
+
+# 由 1000 行合成台账改写：公式单元格、布尔值、日期时间、含空格与换行的文本、数据区合并单元格、
+# 仅设置样式的表头远端单元格（扩展最大列），第 300 行首列清空（数据在此截止）
+EDGE_LEDGER = os.path.join(os.path.dirname(__file__), "data", "edge_ledger.xlsx")
+
+
+def _assert_same_as_openpyxl(source, **kwargs):
+    expected_columns, expected = load_ledger(source, engine="openpyxl")
+    columns, df = xlsx_fast_reader.load_ledger_fast(source, **kwargs)
+    assert columns == expected_columns
+    pd.testing.assert_frame_equal(df, expected)
+    return df
+
+
+def test_edge_workbook_matches_openpyxl():
+    df = _assert_same_as_openpyxl(EDGE_LEDGER)
+    assert len(df) == 294
+    assert df.columns[-1] == "未知列_25"
+
+
+def test_engine_option_matches_openpyxl(ledger_path):
+    expected_columns, expected = load_ledger(ledger_path, engine="openpyxl")
+    with open(ledger_path, "rb") as f:
+        columns, df = load_ledger(f, engine="fast")
+    assert columns == expected_columns
+    pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("source", [EDGE_LEDGER, "ledger"])
+def test_parallel_row_ranges_match_openpyxl(monkeypatch, ledger_path, source):
+    monkeypatch.setattr(xlsx_fast_reader, "MIN_PARALLEL_BYTES", 0)
+    _assert_same_as_openpyxl(ledger_path if source == "ledger" else source, max_workers=2, chunk_bytes=20000)
+
+
+def test_unknown_sheet_name_rejected():
+    with pytest.raises(KeyError):
+        xlsx_fast_reader.load_ledger_fast(EDGE_LEDGER, sheet_name="不存在")
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from base_analyzer import BaseAnalyzer
+from loss_analyzer import COST_COLUMN_PATTERN, cost_columns
+
+# 排序指标：loss 亏损金额；loss_ratio 亏损金额/合同金额；cost_ratio 主要成本（单项最大）/合同金额
+METRICS = ("loss", "loss_ratio", "cost_ratio")
+UNGROUPED = "未分类"  # 分组列为空的行归入的分组
+
+
+def top_positions(values, k):
+    """部分选择（不做全排序）取最大的 k 个值的位置（忽略 NaN），按值降序、同值按位置升序"""
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) > k:
+        candidates = values[valid]
+        kth = len(candidates) - k
+        threshold = np.partition(candidates, kth)[kth]
+        above = valid[candidates > threshold]
+        ties = valid[candidates == threshold][:k - len(above)]
+        valid = np.concatenate([above, ties])
+    return valid[np.lexsort((valid, -values[valid]))]
+
+
+class TopKAnalyzer(BaseAnalyzer):
+    # 各块先取前 K 名，合并后再取一次前 K 名（全局前 K 名必在各块前 K 名之中）
+    chunk_mode = "reduce"
+    required_columns = ("亏损金额", "合同金额", "项目类别")
+    required_column_patterns = (COST_COLUMN_PATTERN,)
+
+    def _metric_values(self, df, metric):
+        loss = self._to_amount(df[self._find_col(df, "亏损金额")])
+        if metric == "loss":
+            return loss
+        contract = self._to_amount(df[self._find_col(df, "合同金额")])
+        contract = contract.where(contract > 0)  # 合同金额缺失或非正时不参与比值排名
+        if metric == "loss_ratio":
+            return loss / contract
+        costs = cost_columns(df.columns)
+        if not costs:
+            raise ValueError("未找到「项目主要成本情况_…_结算」成本列")
+        cost_matrix = np.column_stack([self._to_amount(df[col]).to_numpy() for _, col in costs])
+        largest = np.fmax.reduce(cost_matrix, axis=1)  # 忽略缺失值；整行缺失时为 NaN
+        return pd.Series(largest, index=df.index) / contract
+
+    def analyze(self, df, k=50, metric="loss", group_by=None, parent=None, **kwargs):
+        try:
+            self.logs.clear()
+            if metric not in METRICS:
+                raise ValueError(f"不支持的排序指标：{metric}（可选 {', '.join(METRICS)}）")
+            scope = f"按「{group_by}」分组" if group_by else "全部项目"
+            self._log(f"开始执行{scope}前 {k} 名分析（指标：{metric}）...")
+
+            values = self._metric_values(df, metric).to_numpy(dtype="float64")
+            self._log(f"有效指标数据：{int(np.count_nonzero(~np.isnan(values)))} 行")
+
+            if group_by is None:
+                positions = top_positions(values, k)
+            else:
+                group_col = self._find_col(df, group_by)
+                self._log(f"匹配分组列：{group_col}")
+                keys = df[group_col].astype(object)
+                # 空值与空白分组不能丢弃（groupby 默认会丢弃空值），统一归入“未分类”
+                blank = keys.isna() | (keys.astype(str).str.strip() == "")
+                if blank.any():
+                    keys = keys.mask(blank, UNGROUPED)
+                    self._log(f"分组列为空的 {int(blank.sum())} 行归入「{UNGROUPED}」")
+                groups = keys.reset_index(drop=True).groupby(keys.to_numpy(), sort=True).indices
+                positions = np.concatenate(
+                    [group[top_positions(values[group], k)] for group in groups.values()]
+                    or [np.array([], dtype=np.intp)]
+                )
+                self._log(f"分组数：{len(groups)}")
+
+            self.analyzed_data = df.iloc[positions][self.original_columns]
+            self._log(f"前 {k} 名结果：{len(self.analyzed_data)} 行")
+            return True
+
+        except ValueError as ve:
+            err_msg = f"分析失败：{str(ve)}"
+            self._log(err_msg)
+            self._notify("showerror", "分析错误", err_msg, parent)
+            return False
+        except Exception as e:
+            err_msg = f"分析失败：{str(e)}"
+            self._log(err_msg)
+            self._notify("showerror", "分析错误", err_msg, parent)
+            return False
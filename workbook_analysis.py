@@ -0,0 +1,77 @@
+"""
+多工作表分析：识别工作簿中所有符合台账版式（3-5 行三级表头、含“项目名称”列）的工作表，
+以进程池并行读取并分析，各工作表结果独立返回，由调用方拼接汇总视图。
+
+每个工作进程以只读模式只解析分配给它的工作表；工作表之间已并行，fast 引擎在进程内按单进程解析。
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from excel_reader import XLSX_ENGINE, XLSX_ENGINES, ledger_sheet_names, load_ledger_sheet
+from loss_analyzer import LossDataAnalyzer
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.environ.get("ANALYSIS_SHEET_WORKERS", str(os.cpu_count() or 1)))
+
+
+def analyze_sheet(path, sheet_name, analyzers_config, engine):
+    """读取并分析单个工作表（在工作进程中执行）
+
+    返回 {"sheet_name", "original_columns", "rows", "results", "low_loss"}，results 与 analyzers_config
+    一一对应，元素为命中行 DataFrame（分析失败时为 None）。
+    """
+    if engine == "fast":
+        from xlsx_fast_reader import load_ledger_fast  # 避免循环导入
+        original_columns, df = load_ledger_fast(path, max_workers=1, sheet_name=sheet_name)
+    else:
+        original_columns, df = load_ledger_sheet(path, sheet_name)
+
+    results = []
+    low_loss = pd.DataFrame(columns=original_columns)
+    for cfg in analyzers_config:
+        analyzer = cfg["class"](original_columns=original_columns)
+        if not analyzer.analyze(df=df, **cfg["analyze_kwargs"]):
+            logger.error(f"工作表 {sheet_name}：{analyzer.__class__.__name__} 分析失败：{analyzer.get_logs()}")
+            results.append(None)
+            continue
+        results.append(analyzer.get_analyzed_data())
+        if isinstance(analyzer, LossDataAnalyzer):
+            low_loss = analyzer.get_low_loss_data()
+    return {
+        "sheet_name": sheet_name,
+        "original_columns": original_columns,
+        "rows": len(df),
+        "results": results,
+        "low_loss": low_loss,
+    }
+
+
+class WorkbookAnalysisRunner:
+    def __init__(self, analyzers_config, engine=None, max_workers=MAX_WORKERS):
+        engine = engine or XLSX_ENGINE
+        if engine not in XLSX_ENGINES:
+            raise ValueError(f"不支持的 xlsx 读取引擎：{engine}（可选 {', '.join(XLSX_ENGINES)}）")
+        self.analyzers_config = analyzers_config
+        self.engine = engine
+        self.max_workers = max_workers
+        self.skipped_sheets = []
+
+    def run(self, path):
+        """对工作簿（文件路径）中的所有台账工作表执行分析，按工作表顺序返回各表结果"""
+        sheet_names, self.skipped_sheets = ledger_sheet_names(path)
+        if not sheet_names:
+            raise ValueError("工作簿中没有符合台账版式（3-5 行表头含“项目名称”）的工作表")
+        if self.skipped_sheets:
+            logger.info(f"跳过不符合台账版式的工作表：{', '.join(self.skipped_sheets)}")
+
+        workers = min(self.max_workers, len(sheet_names))
+        args = [(path, name, self.analyzers_config, self.engine) for name in sheet_names]
+        if workers <= 1:
+            return [analyze_sheet(*a) for a in args]
+        logger.info(f"多工作表并行分析：{len(sheet_names)} 个工作表，{workers} 个进程")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(analyze_sheet, *zip(*args)))
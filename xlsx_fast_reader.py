@@ -0,0 +1,307 @@
+"""
+xlsx 多进程读取引擎：针对固定台账版式（3-5 行三级表头，第 6 行起为数据，遇首列为空的行即停止），
+直接解析工作表 XML，按行区间切分后交给多个工作进程并行解码单元格，再按列拼接为类型化 DataFrame。
+
+共享字符串表、日期样式与日期基准仍由 openpyxl 的工作簿读取器（只读模式）读取，单元格取值规则与 openpyxl 一致，
+original_columns 与数据同 load_ledger 的 openpyxl 引擎完全相同。工作表 XML 会整体解压到内存。
+"""
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.xml.constants import ARC_STYLE
+from openpyxl.xml.functions import fromstring
+
+from excel_reader import DATA_START_ROW, HEADER_ROWS, SHEET_NS, _rewind, build_typed_frame, resolve_header_columns
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.environ.get("ANALYSIS_XLSX_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_BYTES = 8 * 1024 ** 2  # 每个任务处理的 XML 字节数（按行边界对齐）
+MIN_PARALLEL_BYTES = 4 * 1024 ** 2  # 工作表 XML 小于此值时在当前进程解析，省去进程启动开销
+
+_ROW = f"{SHEET_NS}row"
+_CELL = f"{SHEET_NS}c"
+_VALUE = f"{SHEET_NS}v"
+_INLINE = f"{SHEET_NS}is"
+_TEXT = f"{SHEET_NS}t"
+_RUN = f"{SHEET_NS}r"
+
+# 工作进程状态（由 _init_worker 设置；fork 启动时直接继承，不复制 XML）
+_state = {}
+
+
+def _init_worker(xml, wrapper, shared_strings, date_formats, timedelta_formats, epoch, data_merged):
+    _state.update(
+        xml=xml, wrapper=wrapper, shared_strings=shared_strings, date_formats=date_formats,
+        timedelta_formats=timedelta_formats, epoch=epoch, data_merged=data_merged,
+    )
+
+
+def _cast_number(value):
+    """与 openpyxl 一致：含小数点或指数的为 float，否则为 int"""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _text_content(element):
+    """内联字符串文本（普通文本 + 富文本片段，不含注音）"""
+    parts = []
+    for child in element:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag == _RUN:
+            parts.append(child.findtext(_TEXT) or "")
+    return "".join(parts)
+
+
+def _cell_value(cell):
+    data_type = cell.get("t", "n")
+    if data_type == "inlineStr":
+        child = cell.find(_INLINE)
+        return None if child is None else _text_content(child)
+    value = cell.findtext(_VALUE, None) or None
+    if value is None:
+        return None
+    if data_type == "n":
+        value = _cast_number(value)
+        style_id = int(cell.get("s", 0) or 0)
+        if style_id in _state["date_formats"]:
+            try:
+                return from_excel(value, _state["epoch"], timedelta=style_id in _state["timedelta_formats"])
+            except (OverflowError, ValueError):
+                return "#VALUE!"
+        return value
+    if data_type == "s":
+        return _state["shared_strings"][int(value)]
+    if data_type == "b":
+        return bool(int(value))
+    if data_type == "d":
+        return from_ISO8601(value)
+    return value
+
+
+def _in_data_merge(row, col):
+    """数据区合并单元格（左上角以外）在 openpyxl 中取值为空"""
+    for min_row, max_row, min_col, max_col in _state["data_merged"]:
+        if min_row <= row <= max_row and min_col <= col <= max_col and (row, col) != (min_row, min_col):
+            return True
+    return False
+
+
+def parse_row_range(start, end):
+    """解析 XML 中 [start, end) 范围内的 <row> 元素，返回表头单元格、数据列及停止信息"""
+    head, tail = _state["wrapper"]
+    source = BytesIO(head + _state["xml"][start:end] + tail)
+    data_merged = bool(_state["data_merged"])
+
+    header = {}
+    columns = []
+    n_rows = 0
+    first_row = last_row = None
+    stopped = False
+    max_col = 0
+    row_counter = None
+    root = None
+    for event, element in iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        if element.tag != _ROW:
+            continue
+
+        r = element.get("r")
+        if r is not None:
+            row_counter = int(float(r))
+        elif row_counter is None:
+            raise ValueError("工作表行缺少行号，无法分段解析")
+        else:
+            row_counter += 1
+
+        values = {}
+        col_counter = 0
+        for cell in element:
+            if cell.tag != _CELL:
+                continue
+            ref = cell.get("r")
+            col_counter = coordinate_to_tuple(ref)[1] if ref else col_counter + 1
+            max_col = max(max_col, col_counter)
+            if not stopped:
+                values[col_counter] = _cell_value(cell)
+        element.clear()
+        root.clear()
+
+        if row_counter < DATA_START_ROW:
+            header.update(((row_counter, col), value) for col, value in values.items())
+            continue
+        if stopped:
+            continue
+        if data_merged:
+            values = {col: (None if _in_data_merge(row_counter, col) else v) for col, v in values.items()}
+        # 区间内出现行号跳跃（中间为空行）或首列为空即停止
+        if (last_row is not None and row_counter != last_row + 1) or values.get(1) is None:
+            stopped = True
+            continue
+
+        width = max(values) if values else 0
+        for _ in range(len(columns), width):
+            columns.append([None] * n_rows)
+        for col, column in enumerate(columns, start=1):
+            column.append(values.get(col))
+        n_rows += 1
+        if first_row is None:
+            first_row = row_counter
+        last_row = row_counter
+
+    return {
+        "header": header,
+        "columns": columns,
+        "n_rows": n_rows,
+        "first_row": first_row,
+        "last_row": last_row,
+        "stopped": stopped,
+        "max_col": max_col,
+    }
+
+
+def _sheet_layout(xml, chunk_bytes):
+    """定位 sheetData，按行边界切分为若干字节区间，并生成包裹各区间的 XML 首尾"""
+    match = re.search(rb"<(?:(\w+):)?sheetData\b[^>]*?(/?)>", xml)
+    if match is None or match.group(2):
+        return [], (b"", b""), b""
+    prefix = match.group(1) + b":" if match.group(1) else b""
+    start = match.end()
+    end = xml.find(b"</" + prefix + b"sheetData>", start)
+
+    root = re.search(rb"<(?:\w+:)?worksheet\b([^>]*)>", xml)
+    declarations = re.findall(rb'xmlns(?::\w+)?="[^"]*"', root.group(1)) if root else []
+    wrapper = (b"<" + prefix + b"sheetData " + b" ".join(declarations) + b">", b"</" + prefix + b"sheetData>")
+
+    row_open = b"<" + prefix + b"row"
+    has_row_refs = re.search(rb"<(?:\w+:)?row\b[^>]*\br=\"", xml[start:start + 4096]) is not None
+    boundaries = [start]
+    position = start + chunk_bytes
+    while has_row_refs and position < end:
+        i = xml.find(row_open, position, end)
+        while i != -1 and xml[i + len(row_open):i + len(row_open) + 1] not in (b" ", b">", b"/", b"\t", b"\r", b"\n"):
+            i = xml.find(row_open, i + 1, end)
+        if i == -1:
+            break
+        boundaries.append(i)
+        position = i + chunk_bytes
+    boundaries.append(end)
+    return list(zip(boundaries[:-1], boundaries[1:])), wrapper, xml[end:]
+
+
+def _merge_parts(parts):
+    """按行序拼接各区间结果，应用“首列为空即停止”规则，返回 (表头单元格, 数据列, 最大列号)"""
+    header = {}
+    columns = []
+    n_rows = 0
+    max_col = 0
+    expected = DATA_START_ROW
+    stopped = False
+    for part in parts:
+        header.update(part["header"])
+        max_col = max(max_col, part["max_col"])
+        if stopped:
+            continue
+        if part["first_row"] is None:
+            stopped = part["stopped"]
+            continue
+        if part["first_row"] != expected:  # 区间之间缺行，视为空行
+            stopped = True
+            continue
+        for _ in range(len(columns), len(part["columns"])):
+            columns.append([None] * n_rows)
+        for idx, column in enumerate(columns):
+            if idx < len(part["columns"]):
+                column.extend(part["columns"][idx])
+            else:
+                column.extend([None] * part["n_rows"])
+        n_rows += part["n_rows"]
+        expected = part["last_row"] + 1
+        stopped = part["stopped"]
+    return header, columns, n_rows, max_col
+
+
+def read_workbook_parts(source, sheet_name=None):
+    """用 openpyxl 的工作簿读取器（只读模式）取得解码所需的部件
+
+    返回 (工作表 XML, 共享字符串表, 日期样式编号集合, 时长样式编号集合, 日期基准)；
+    工作表的定位与样式解析同 load_workbook，sheet_name 缺省为活动工作表。
+    """
+    reader = ExcelReader(source, read_only=True, data_only=True)
+    try:
+        reader.read_manifest()
+        reader.read_strings()
+        reader.read_workbook()
+        sheets = [
+            (sheet.name, rel.target) for sheet, rel in reader.parser.find_sheets()
+            if rel.target in reader.valid_files
+        ]
+        if sheet_name:
+            targets = dict(sheets)
+            if sheet_name not in targets:
+                raise KeyError(f"Worksheet {sheet_name} does not exist.")
+            target = targets[sheet_name]
+        else:
+            active = next((view.activeTab for view in reader.wb.views if view.activeTab is not None), 0)
+            target = sheets[active][1]
+        date_formats, timedelta_formats = set(), set()
+        if ARC_STYLE in reader.valid_files:
+            stylesheet = Stylesheet.from_tree(fromstring(reader.archive.read(ARC_STYLE)))
+            date_formats, timedelta_formats = stylesheet.date_formats, stylesheet.timedelta_formats
+        return reader.archive.read(target), reader.shared_strings, date_formats, timedelta_formats, reader.wb.epoch
+    finally:
+        reader.archive.close()
+
+
+def load_ledger_fast(source, max_workers=MAX_WORKERS, chunk_bytes=CHUNK_BYTES, sheet_name=None):
+    """多进程读取台账工作簿（路径或文件对象），返回 (原始列名, DataFrame)；sheet_name 缺省为活动工作表"""
+    _rewind(source)
+    xml, shared_strings, date_formats, timedelta_formats, epoch = read_workbook_parts(source, sheet_name)
+
+    ranges, wrapper, tail = _sheet_layout(xml, chunk_bytes)
+    merged_ranges = [
+        CellRange(ref.decode("utf-8"))
+        for ref in re.findall(rb"<(?:\w+:)?mergeCell\b[^>]*\bref=\"([^\"]+)\"", tail)
+    ]
+    data_merged = [
+        (r.min_row, r.max_row, r.min_col, r.max_col)
+        for r in merged_ranges if r.max_row >= DATA_START_ROW
+    ]
+    init_args = (xml, wrapper, shared_strings, date_formats, timedelta_formats, epoch, data_merged)
+
+    workers = min(max_workers, len(ranges))
+    if workers <= 1 or len(xml) < MIN_PARALLEL_BYTES:
+        _init_worker(*init_args)
+        try:
+            parts = [parse_row_range(start, end) for start, end in ranges]
+        finally:
+            _state.clear()
+    else:
+        logger.info(f"多进程读取工作表：{len(ranges)} 段，{workers} 个进程")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            parts = list(pool.map(parse_row_range, *zip(*ranges)))
+    del xml
+
+    header, columns, n_rows, max_col = _merge_parts(parts)
+    # 与 openpyxl 一致：最大列号包含合并区域覆盖的列，空表为 1
+    max_col = max([max_col, 1] + [r.max_col for r in merged_ranges])
+
+    grid = [[header.get((row, col)) for col in range(1, max_col + 1)] for row in range(1, HEADER_ROWS[-1] + 1)]
+    original_columns = resolve_header_columns(grid, merged_ranges, max_col)
+
+    columns = columns[:max_col] + [[None] * n_rows for _ in range(len(columns), max_col)]
+    return original_columns, build_typed_frame(columns, original_columns)